@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Adaptive rasterization DPI per page.
+
+Tesseract reads best when glyphs are roughly 20-40 px tall. A fixed 300 DPI
+is wasteful for statements printed in large fonts and too low for tiny print.
+Each page is first rendered at PREVIEW_DPI, the typical glyph height is
+measured from connected components, and the page is then rasterized at the
+lowest DPI that brings glyphs to TARGET_GLYPH_PX. Pages whose mean word
+confidence stays below ESCALATE_CONFIDENCE are re-rendered at a higher DPI.
+"""
+
+import os
+
+import cv2
+import numpy as np
+from pdf2image import convert_from_path
+
+import deadline
+import ocr_engine
+import page_tiles
+import page_triage
+import refine
+import table_region
+
+ADAPTIVE_DPI = os.environ.get("ADAPTIVE_DPI", "0") == "1"
+
+PREVIEW_DPI = 72
+TARGET_GLYPH_PX = 28
+MIN_DPI = 150
+MAX_DPI = 400
+DPI_STEP = 25
+# Mean word confidence below which a page is re-OCR'd at a higher DPI
+ESCALATE_CONFIDENCE = 70.0
+ESCALATE_FACTOR = 1.5
+
+
+def estimate_glyph_height(gray):
+    """
+    Median height in pixels of the character-like connected components of a
+    grayscale page, or None when the page holds no text.
+    """
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    if count <= 1:
+        return None
+
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    # Drop specks, rules, boxes and logos
+    keep = (heights >= 3) & (heights <= gray.shape[0] * 0.05) & (widths <= heights * 4)
+    if keep.sum() < 10:
+        return None
+    return float(np.median(heights[keep]))
+
+
+def choose_dpi(glyph_height, measured_dpi=PREVIEW_DPI):
+    """
+    Lowest DPI (rounded up to DPI_STEP, within MIN_DPI..MAX_DPI) that makes a
+    glyph measured as glyph_height px at measured_dpi reach TARGET_GLYPH_PX.
+    """
+    if not glyph_height:
+        # No measurable text: keep the old fixed resolution
+        return 300
+    dpi = measured_dpi * TARGET_GLYPH_PX / glyph_height
+    dpi = int(np.ceil(dpi / DPI_STEP) * DPI_STEP)
+    return max(MIN_DPI, min(MAX_DPI, dpi))
+
+
+def render_gray(pdf_path, page_no, dpi, crop_table=False):
+    """
+    Grayscale render of one page, None when pdftoppm fails.
+    """
+    try:
+        pages = convert_from_path(pdf_path, dpi=dpi, first_page=page_no, last_page=page_no, grayscale=True,
+                                  timeout=deadline.call_timeout())
+    except Exception as e:
+        # pdftoppm killed by the request deadline
+        deadline.check()
+        print(f"❌ PDF conversion error on page {page_no}: {e}")
+        return None
+    if not pages:
+        return None
+    gray = np.array(pages[0])
+    if crop_table:
+        gray, _ = table_region.crop_to_table(gray)
+    return gray
+
+
+def ocr_page_adaptive(pdf_path, page_no, config, crop_table=False, page_filter=None, layout=False,
+                      refine_weak=False):
+    """
+    OCRs one page at its adaptive DPI, escalating once on low confidence.
+    Returns a page record: page, text, dpi, confidence, escalated
+    (plus the word boxes under "words" with layout=True).
+    refine_weak re-reads only the weak words (refine.py) before deciding
+    whether the whole page needs the higher DPI.
+    The low DPI preview also feeds page_filter (a page_triage.PageTriage),
+    so blank and repeated pages are skipped before the full render.
+    A page pdftoppm cannot render comes back skipped ("render failed").
+    """
+    failed = {"page": page_no, "text": "", "skipped": "render failed", "dpi": None, "confidence": 0.0,
+              "escalated": False}
+    preview = render_gray(pdf_path, page_no, PREVIEW_DPI)
+    if preview is None:
+        return failed
+
+    if page_filter:
+        reason, coverage = page_filter.check(preview, page_no)
+        if reason:
+            return page_triage.skipped_record(page_no, reason, coverage, dpi=PREVIEW_DPI)
+
+    dpi = choose_dpi(estimate_glyph_height(preview))
+    gray = render_gray(pdf_path, page_no, dpi, crop_table)
+    if gray is None:
+        return failed
+    words = page_tiles.image_to_data(gray, config=f"{config} --dpi {dpi}")
+    refined = 0
+    if refine_weak:
+        words, refined = refine.refine_words(gray, words)
+    confidence = ocr_engine.mean_confidence(words)
+    escalated = False
+
+    if confidence < ESCALATE_CONFIDENCE and dpi < MAX_DPI:
+        high_dpi = min(MAX_DPI, int(dpi * ESCALATE_FACTOR))
+        gray = render_gray(pdf_path, page_no, high_dpi, crop_table)
+        # A failed high DPI render keeps the first reading
+        if gray is not None:
+            retry_words = page_tiles.image_to_data(gray, config=f"{config} --dpi {high_dpi}")
+            retry_confidence = ocr_engine.mean_confidence(retry_words)
+            print(f"DEBUG: Page {page_no} escalated {dpi}->{high_dpi} DPI "
+                  f"(conf {confidence:.1f}->{retry_confidence:.1f})")
+            escalated = True
+            if retry_confidence > confidence:
+                words, confidence, dpi, refined = retry_words, retry_confidence, high_dpi, 0
+
+    record = {
+        "page": page_no,
+        "text": ocr_engine.words_to_text(words),
+        "dpi": dpi,
+        "confidence": round(confidence, 1),
+        "escalated": escalated,
+        "refined": refined,
+    }
+    if layout:
+        record["words"] = words
+    return record
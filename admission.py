@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+Admission control for OCR work.
+
+OCR is CPU bound: running more statements at once than there are cores only
+makes every one of them slower. The controller lets MAX_CONCURRENT_OCR jobs
+run, keeps up to MAX_QUEUE requests waiting and turns everything beyond
+that away at once with Overloaded, which the API maps to 503 + Retry-After. A request that waited QUEUE_TIMEOUT seconds
+without a slot is rejected the same way.
+
+The queue is ordered by job size (pages, known from pdfinfo before any
+rasterizing): shortest job first, with aging so big statements are not
+starved. Long jobs also pause every PAGE_BATCH pages (checkpoint()) and
+let shorter waiting jobs through, so a 2 page statement does not sit
+behind all 80 pages of another one.
+
+Background jobs (the asynchronous lane) use admit(reject=False): they wait
+for a slot without a queue bound or timeout and are counted apart from the
+request queue, but still never run beside more than MAX_CONCURRENT_OCR
+other jobs.
+
+stats() exposes in-flight work, queue depth, wait times and rejections.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import os
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextlib import asynccontextmanager
+
+import deadline
+
+MAX_CONCURRENT_OCR = int(os.environ.get("MAX_CONCURRENT_OCR", str(os.cpu_count() or 1)))
+MAX_QUEUE = int(os.environ.get("MAX_QUEUE", str(2 * MAX_CONCURRENT_OCR)))
+QUEUE_TIMEOUT = float(os.environ.get("QUEUE_TIMEOUT", "30"))
+
+# "sjf" (shortest job first with aging) or "fifo"
+SCHEDULER = os.environ.get("OCR_SCHEDULER", "sjf")
+# Pages of priority a waiting job gains per second
+SJF_AGING = float(os.environ.get("SJF_AGING", "1.0"))
+# Long statements offer their slot to shorter jobs every PAGE_BATCH pages
+PAGE_BATCH = int(os.environ.get("PAGE_BATCH", "8"))
+
+# Weight of the newest sample in the moving averages
+EWMA_ALPHA = 0.2
+
+_current_slot = contextvars.ContextVar("ocr_slot", default=None)
+
+
+class Overloaded(Exception):
+    """No OCR slot now; retry_after is a hint in seconds."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Slot:
+    """
+    One job's claim on an OCR slot. held is False while the job waits,
+    including after it handed the slot to a shorter job at a page batch.
+    """
+
+    def __init__(self, controller, pages, since):
+        self.controller = controller
+        self.pages = pages
+        self.since = since
+        self.loop = asyncio.get_running_loop()
+        self.held = False
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent=MAX_CONCURRENT_OCR, max_queue=MAX_QUEUE, queue_timeout=QUEUE_TIMEOUT,
+                 scheduler=SCHEDULER):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.scheduler = scheduler
+        self._free = max_concurrent
+        # Waiting jobs: {"pages", "since", "seq", "future"}
+        self._waiters = []
+        self._seq = itertools.count()
+        self.in_flight = 0
+        self.queued = 0
+        self.jobs_waiting = 0
+        self.paused = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.yielded = 0
+        self.avg_wait = 0.0
+        self.max_wait = 0.0
+        self.avg_service = 0.0
+
+    def set_concurrency(self, max_concurrent):
+        """
+        Resizes the slot pool (startup autotuning). Only valid while idle.
+        """
+        if self.in_flight or self.queued or self.jobs_waiting or self.paused:
+            raise RuntimeError("Cannot resize the OCR slot pool while jobs are running")
+        self.max_concurrent = max_concurrent
+        self._free = max_concurrent
+
+    def priority(self, pages, since, seq=0, now=None):
+        """
+        Sort key of a waiting job, lowest runs first. Shortest job first: the
+        page count, minus SJF_AGING pages for every second since the job
+        arrived, so a big statement overtakes new small ones eventually.
+        """
+        if self.scheduler == "fifo":
+            return (since, seq)
+        now = time.perf_counter() if now is None else now
+        return (pages - SJF_AGING * (now - since), seq)
+
+    def _next_waiter(self):
+        now = time.perf_counter()
+        return min(self._waiters, key=lambda w: self.priority(w["pages"], w["since"], w["seq"], now))
+
+    def _grant(self):
+        while self._free > 0 and self._waiters:
+            waiter = self._next_waiter()
+            self._waiters.remove(waiter)
+            if waiter["future"].done():
+                continue
+            self._free -= 1
+            waiter["future"].set_result(None)
+
+    def _release(self):
+        self._free += 1
+        self._grant()
+
+    async def _acquire(self, pages, since, timeout=None):
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        waiter = {"pages": pages, "since": since, "seq": next(self._seq), "future": future}
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(future, timeout=timeout)
+        except BaseException:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif future.done() and not future.cancelled():
+                # Granted in the same tick we gave up: pass the slot on
+                self._release()
+            raise
+
+    def retry_after(self):
+        """
+        Seconds until a queued request would likely get a slot.
+        """
+        service = self.avg_service or 5.0
+        backlog = self.queued + self.in_flight
+        return max(1, int(round(service * backlog / max(1, self.max_concurrent))))
+
+    def is_full(self):
+        return self.in_flight >= self.max_concurrent and self.queued >= self.max_queue
+
+    def check(self):
+        """
+        Raises Overloaded right away when a new request could not even queue.
+        Lets endpoints refuse before reading and saving the upload.
+        """
+        if self.is_full():
+            self.rejected += 1
+            raise Overloaded("Server is busy, please retry later.", self.retry_after())
+
+    def _record_wait(self, waited):
+        self.avg_wait = waited if not self.admitted else (1 - EWMA_ALPHA) * self.avg_wait + EWMA_ALPHA * waited
+        self.max_wait = max(self.max_wait, waited)
+        self.admitted += 1
+
+    @asynccontextmanager
+    async def admit(self, reject=True, timeout=None, pages=1):
+        """
+        async with controller.admit(): ... runs the body holding an OCR slot.
+        The body gets the seconds it waited in the queue. timeout (e.g. the
+        request's remaining budget) shortens QUEUE_TIMEOUT. pages (the job
+        size) orders the queue, see priority().
+        """
+        if reject:
+            self.check()
+
+        start = time.perf_counter()
+        slot = Slot(self, pages, start)
+        if reject:
+            self.queued += 1
+            try:
+                wait = self.queue_timeout if timeout is None else min(self.queue_timeout, timeout)
+                await self._acquire(pages, start, timeout=wait)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise Overloaded("Timed out waiting for an OCR slot, please retry later.", self.retry_after())
+            finally:
+                self.queued -= 1
+        else:
+            self.jobs_waiting += 1
+            try:
+                await self._acquire(pages, start)
+            finally:
+                self.jobs_waiting -= 1
+
+        waited = time.perf_counter() - start
+        self._record_wait(waited)
+        slot.held = True
+        self.in_flight += 1
+        started = time.perf_counter()
+        token = _current_slot.set(slot)
+        try:
+            yield waited
+        finally:
+            _current_slot.reset(token)
+            service = time.perf_counter() - started
+            self.avg_service = service if not self.avg_service else \
+                (1 - EWMA_ALPHA) * self.avg_service + EWMA_ALPHA * service
+            if slot.held:
+                slot.held = False
+                self.in_flight -= 1
+                self._release()
+
+    async def yield_slot(self, slot, pages_left):
+        """
+        Hands the slot of a running job to a waiting job that should go
+        first, then queues the rest of the job (pages_left pages, aging from
+        its original arrival) for the next free slot.
+        Returns True when the job paused.
+        """
+        if not slot.held or not self._waiters:
+            return False
+        now = time.perf_counter()
+        best = min(self.priority(w["pages"], w["since"], w["seq"], now) for w in self._waiters)
+        if self.priority(pages_left, slot.since, -1, now) <= best:
+            return False
+
+        slot.held = False
+        self.in_flight -= 1
+        self.yielded += 1
+        self.paused += 1
+        self._release()
+        try:
+            await self._acquire(pages_left, slot.since)
+        finally:
+            self.paused -= 1
+        slot.held = True
+        self.in_flight += 1
+        return True
+
+    def stats(self):
+        return {
+            "scheduler": self.scheduler,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "jobs_waiting": self.jobs_waiting,
+            "paused": self.paused,
+            "queued_pages": sorted(w["pages"] for w in self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "yielded": self.yielded,
+            "avg_wait_ms": round(self.avg_wait * 1000, 1),
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "avg_service_ms": round(self.avg_service * 1000, 1),
+            "retry_after_s": self.retry_after(),
+        }
+
+
+def checkpoint(pages_done, pages_left):
+    """
+    Called by the OCR thread between pages. Every PAGE_BATCH pages a long
+    job offers its slot to shorter waiting jobs and blocks until it is
+    its turn again. Without a slot (CLI, tests) this does nothing.
+    """
+    slot = _current_slot.get()
+    if slot is None or not pages_done or pages_done % PAGE_BATCH or not pages_left:
+        return False
+    future = asyncio.run_coroutine_threadsafe(slot.controller.yield_slot(slot, pages_left), slot.loop)
+    while True:
+        try:
+            paused = future.result(timeout=deadline.POLL_INTERVAL)
+            break
+        except FutureTimeout:
+            try:
+                deadline.check()
+            except deadline.DeadlineExceeded:
+                future.cancel()
+                raise
+    if paused:
+        print(f"DEBUG: Resumed after yielding the OCR slot ({pages_left} pages left)")
+    return paused
+
+
+controller = AdmissionController()
@@ -17,7 +17,8 @@ Improvements by Agent:
 """
 
 import cv2
-import pytesseract
+import ocr_engine
+import image_pipeline
 import re
 import os
 import numpy as np
@@ -25,6 +26,8 @@ from pdf2image import convert_from_path
 
 # Configuration for Tesseract
 CUSTOM_CONFIG = r'--oem 3 --psm 6'
+# Tuned Tesseract profile for this layout (see statement_profiles)
+PROFILE = "phonepe"
 
 # Business Keywords to filter out "Personal" transactions
 BUSINESS_KEYWORDS = {
@@ -87,49 +90,40 @@ def detect_category(description: str, entity: str) -> str:
     
     return entity
 
-def process_image(image_path, debug_save=True):
+def process_image(image_path, debug_save=False):
     """
-    Reads and preprocesses an image for OCR.
+    Reads and preprocesses an image for OCR (see image_pipeline).
+    debug_save writes the binarized image to processed.jpg.
     """
     if not os.path.exists(image_path):
         print(f"❌ Image not found: {image_path}")
         return ""
 
-    img = cv2.imread(image_path)
-    if img is None:
-        print(f"❌ Failed to load image: {image_path}")
+    with open(image_path, "rb") as f:
+        data = f.read()
+    try:
+        processed = image_pipeline.preprocess(image_pipeline.decode_image(data))
+    except image_pipeline.InvalidImage as e:
+        print(f"❌ Failed to load image: {image_path} ({e})")
         return ""
 
-    # Preprocessing
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    gray = cv2.medianBlur(gray, 3)
-
-    _, thresh = cv2.threshold(
-        gray, 150, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
-    )
-
-    # Rescaling
-    scale_percent = 150
-    width = int(thresh.shape[1] * scale_percent / 100)
-    height = int(thresh.shape[0] * scale_percent / 100)
-    resized = cv2.resize(thresh, (width, height), interpolation=cv2.INTER_LINEAR)
-
     if debug_save:
-        cv2.imwrite("processed.jpg", resized)
+        cv2.imwrite("processed.jpg", processed)
 
-    text = pytesseract.image_to_string(resized, config=CUSTOM_CONFIG)
+    text = ocr_engine.image_to_string(processed, config=CUSTOM_CONFIG)
     return text
 
-def extract_text_from_pdf(pdf_path):
+def extract_text_from_pdf(pdf_path, first_page=None, last_page=None):
     """
     Converts PDF pages to images and runs OCR.
+    first_page / last_page (1-based, inclusive) limit rasterization to a page range.
     """
     if not os.path.exists(pdf_path):
         print(f"⚠️ PDF not found: {pdf_path}")
         return ""
 
     try:
-        pages = convert_from_path(pdf_path, dpi=300)
+        pages = convert_from_path(pdf_path, dpi=300, first_page=first_page, last_page=last_page)
     except Exception as e:
         print(f"❌ PDF conversion error: {e}")
         return ""
@@ -138,7 +132,7 @@ def extract_text_from_pdf(pdf_path):
     for page in pages:
         page_np = np.array(page)
         gray = cv2.cvtColor(page_np, cv2.COLOR_BGR2GRAY)
-        text += pytesseract.image_to_string(gray, config=CUSTOM_CONFIG)
+        text += ocr_engine.image_to_string(gray, config=CUSTOM_CONFIG)
     return text
 
 def parse_transactions(text):
@@ -17,14 +17,27 @@ Improvements by Agent:
 """
 
 import cv2
-import pytesseract
+import ocr_engine
+import image_pipeline
+import page_buffers
+import adaptive_dpi
+import table_region
+import page_tiles
+import page_triage
+import raster_budget
+import refine
+import admission
+import deadline
+import statement_profiles
 import re
 import os
 import numpy as np
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 
 # Configuration for Tesseract
 CUSTOM_CONFIG = r'--oem 3 --psm 6'
+# Tuned Tesseract profile for this layout (see statement_profiles)
+PROFILE = "paytm"
 
 # Business Keywords to filter out "Personal" transactions
 BUSINESS_KEYWORDS = {
@@ -111,59 +124,282 @@ def detect_category(description: str, entity: str) -> str:
     
     return entity
 
-def process_image(image_path, debug_save=True):
+def process_image(image_path, debug_save=False):
     """
-    Reads and preprocesses an image for OCR.
+    Reads and preprocesses an image for OCR (see image_pipeline).
+    debug_save writes the binarized image to processed.jpg.
     """
     if not os.path.exists(image_path):
         print(f"❌ Image not found: {image_path}")
         return ""
 
-    img = cv2.imread(image_path)
-    if img is None:
-        print(f"❌ Failed to load image: {image_path}")
+    with open(image_path, "rb") as f:
+        data = f.read()
+    try:
+        processed = image_pipeline.preprocess(image_pipeline.decode_image(data))
+    except image_pipeline.InvalidImage as e:
+        print(f"❌ Failed to load image: {image_path} ({e})")
         return ""
 
-    # Preprocessing
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    gray = cv2.medianBlur(gray, 3)
-
-    _, thresh = cv2.threshold(
-        gray, 150, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
-    )
-
-    # Rescaling
-    scale_percent = 150
-    width = int(thresh.shape[1] * scale_percent / 100)
-    height = int(thresh.shape[0] * scale_percent / 100)
-    resized = cv2.resize(thresh, (width, height), interpolation=cv2.INTER_LINEAR)
-
     if debug_save:
-        cv2.imwrite("processed.jpg", resized)
+        cv2.imwrite("processed.jpg", processed)
 
-    text = pytesseract.image_to_string(resized, config=CUSTOM_CONFIG)
+    text = ocr_engine.image_to_string(processed, config=CUSTOM_CONFIG)
     return text
 
-def extract_text_from_pdf(pdf_path):
+def prepare_page(page, crop_table=False):
+    """
+    Converts a rasterized page to grayscale, optionally cropped to its
+    transaction table. Returns (gray, table_region).
+    """
+    page_np = np.array(page)
+    gray = cv2.cvtColor(page_np, cv2.COLOR_BGR2GRAY) if page_np.ndim == 3 else page_np
+    if crop_table:
+        return table_region.crop_to_table(gray)
+    return gray, None
+
+def ocr_pdf_pages(pdf_path, first_page=None, last_page=None, adaptive=None, crop_table=None, triage=None,
+                  profile=None, layout=False, refine_weak=None, dpi=None, config=None):
     """
     Converts PDF pages to images and runs OCR.
+    Returns one record per page: {"page": n, "text": ..., plus OCR metadata}.
+    first_page / last_page (1-based, inclusive) limit rasterization to a page range.
+    adaptive picks the DPI per page, crop_table OCRs only the transaction table,
+    triage skips blank and repeated pages (all default to their env settings).
+    Skipped pages have an empty text and the reason under "skipped" (also
+    pages pdftoppm could not render: "render failed").
+    profile selects a statement_profiles tuning (DPI, psm, dictionary, whitelist).
+    layout keeps the word boxes of each page under "words" (for layout_parser).
+    refine_weak re-OCRs only low confidence words; it applies wherever word
+    boxes are read (adaptive and layout OCR), defaulting to REFINE.
+    dpi / config override the fixed DPI and the Tesseract options (see
+    processing_tiers). Under an OCR slot, long runs pause between page
+    batches for shorter jobs (admission.checkpoint). Pages are rendered one
+    at a time, each under a raster_budget reservation of its size.
     """
     if not os.path.exists(pdf_path):
         print(f"⚠️ PDF not found: {pdf_path}")
-        return ""
-
+        return []
+
+    first_page = first_page or 1
+    adaptive = adaptive_dpi.ADAPTIVE_DPI if adaptive is None else adaptive
+    crop_table = table_region.TABLE_CROP if crop_table is None else crop_table
+    triage = page_triage.PAGE_TRIAGE if triage is None else triage
+    refine_weak = refine.REFINE if refine_weak is None else refine_weak
+    page_filter = page_triage.PageTriage() if triage else None
+    if config is None:
+        config = statement_profiles.get_config(profile) if profile else CUSTOM_CONFIG
+    if dpi is None:
+        dpi = statement_profiles.get_profile(profile)["dpi"] if profile else 300
+
+    # Page sizes decide how much raster memory each page reserves
+    page_count, sizes = raster_budget.page_sizes(pdf_path, first_page, last_page)
+    if page_count is None and last_page is None:
+        try:
+            page_count = pdfinfo_from_path(pdf_path, timeout=deadline.call_timeout())["Pages"]
+        except Exception as e:
+            deadline.check()
+            print(f"❌ PDF conversion error: {e}")
+            return []
+    last_page = min(last_page, page_count) if last_page and page_count else (last_page or page_count)
+    if last_page < first_page:
+        return []
+
+    if adaptive:
+        records = []
+        for page_no in range(first_page, last_page + 1):
+            try:
+                deadline.check()
+                admission.checkpoint(page_no - first_page, last_page - page_no + 1)
+                # Worst case: the page escalates to MAX_DPI
+                nbytes = raster_budget.estimate_page_bytes(sizes.get(page_no), adaptive_dpi.MAX_DPI,
+                                                           raster_budget.GRAY_BYTES_PER_PIXEL)
+                with raster_budget.budget.reserve(nbytes):
+                    records.append(adaptive_dpi.ocr_page_adaptive(pdf_path, page_no, config, crop_table=crop_table,
+                                                                  page_filter=page_filter, layout=layout,
+                                                                  refine_weak=refine_weak))
+            except deadline.DeadlineExceeded as e:
+                return stop_at_deadline(records, page_no, last_page, e)
+        return records
+
+    if page_buffers.OCR_WORKERS > 1:
+        return ocr_pages_in_workers(pdf_path, first_page, last_page, sizes, dpi, config, page_filter=page_filter,
+                                    crop_table=crop_table, layout=layout, refine_weak=refine_weak)
+
+    records = []
+    for page_no in range(first_page, last_page + 1):
+        try:
+            deadline.check()
+            admission.checkpoint(page_no - first_page, last_page - page_no + 1)
+            # One page at a time, rendered only once its raster fits the budget
+            with raster_budget.budget.reserve(raster_budget.estimate_page_bytes(sizes.get(page_no), dpi)):
+                page = render_page(pdf_path, page_no, dpi)
+                if page is None:
+                    records.append({"page": page_no, "text": "", "skipped": "render failed", "dpi": dpi})
+                    continue
+                gray, _ = prepare_page(page)
+                del page
+                if page_filter:
+                    reason, coverage = page_filter.check(gray, page_no)
+                    if reason:
+                        records.append(page_triage.skipped_record(page_no, reason, coverage, dpi=dpi))
+                        continue
+
+                region = None
+                if crop_table:
+                    gray, region = table_region.crop_to_table(gray)
+                record = {"page": page_no, "dpi": dpi, "table_region": region}
+                # Very tall pages are split at blank rows and OCR'd in parallel
+                if layout:
+                    words = page_tiles.image_to_data(gray, config=config)
+                    if refine_weak:
+                        words, record["refined"] = refine.refine_words(gray, words)
+                    record["words"] = words
+                    record["text"] = ocr_engine.words_to_text(words)
+                else:
+                    record["text"] = page_tiles.image_to_string(gray, config=config)
+                records.append(record)
+        except deadline.DeadlineExceeded as e:
+            return stop_at_deadline(records, page_no, last_page, e)
+    return records
+
+def ocr_pages_in_workers(pdf_path, first_page, last_page, sizes, dpi, config, page_filter=None,
+                         crop_table=False, layout=False, refine_weak=False):
+    """
+    ocr_pdf_pages for OCR_WORKERS > 1. Pages are rendered one at a time,
+    written once into shared memory and OCR'd (tiled when very tall) in the
+    worker pool. Each page reserves its RGB render plus its grayscale copy;
+    the grayscale share stays reserved until the workers are done with it.
+    The pages rendered so far go to the workers as one batch when the next
+    page does not fit the raster budget, and at every admission checkpoint,
+    so no shared memory is held while the slot is handed to another job.
+    """
+    budget = raster_budget.budget
+    records = []
+    batch = []  # (record, buffer, reserved bytes)
+
+    def ocr_batch():
+        if not batch:
+            return
+        try:
+            results = page_buffers.ocr_buffers_in_workers([buf for _, buf, _ in batch], config, layout=layout,
+                                                          refine_weak=refine_weak)
+            for (record, _, _), result in zip(batch, results):
+                if result is None:
+                    record.update(text="", skipped="deadline")
+                    continue
+                if layout:
+                    record["words"] = result
+                    result = ocr_engine.words_to_text(result)
+                record["text"] = result
+        finally:
+            budget.release(sum(nbytes for _, _, nbytes in batch))
+            batch.clear()
+
+    # Each prepared page is written once into shared memory; workers read views
+    with page_buffers.PageBufferPool() as pool:
+        try:
+            for page_no in range(first_page, last_page + 1):
+                try:
+                    if (page_no - first_page) % admission.PAGE_BATCH == 0:
+                        ocr_batch()
+                    deadline.check()
+                    admission.checkpoint(page_no - first_page, last_page - page_no + 1)
+                    gray_bytes = raster_budget.estimate_page_bytes(sizes.get(page_no), dpi, 1)
+                    render_bytes = raster_budget.estimate_page_bytes(sizes.get(page_no), dpi, 3)
+                    if not budget.try_acquire(gray_bytes + render_bytes):
+                        # Our own pending pages may be what fills the budget
+                        ocr_batch()
+                        budget.acquire(gray_bytes + render_bytes)
+                except deadline.DeadlineExceeded as e:
+                    ocr_batch()
+                    return stop_at_deadline(records, page_no, last_page, e)
+
+                reserved = gray_bytes + render_bytes
+                try:
+                    page = render_page(pdf_path, page_no, dpi)
+                    if page is None:
+                        records.append({"page": page_no, "text": "", "skipped": "render failed", "dpi": dpi})
+                        continue
+                    # Convert straight into the segment, no intermediate copy
+                    page_np = np.array(page)
+                    del page
+                    buf = pool.allocate(page_np.shape[:2])
+                    cv2.cvtColor(page_np, cv2.COLOR_BGR2GRAY, dst=buf.array)
+                    del page_np
+                    budget.release(render_bytes)
+                    reserved = gray_bytes
+
+                    if page_filter:
+                        reason, coverage = page_filter.check(buf.array, page_no)
+                        if reason:
+                            buf.release()
+                            records.append(page_triage.skipped_record(page_no, reason, coverage, dpi=dpi))
+                            continue
+
+                    region = None
+                    if crop_table:
+                        cropped, region = table_region.crop_to_table(buf.array)
+                        if region is not None:
+                            # `cropped` is a view into buf: copy it out before releasing
+                            cropped_buf = pool.put(cropped)
+                            buf.release()
+                            buf = cropped_buf
+                    record = {"page": page_no, "dpi": dpi, "table_region": region}
+                    records.append(record)
+                    batch.append((record, buf, reserved))
+                    reserved = 0
+                finally:
+                    if reserved:
+                        budget.release(reserved)
+            ocr_batch()
+        finally:
+            # On errors, whatever is still batched gives its memory back
+            budget.release(sum(nbytes for _, _, nbytes in batch))
+            batch.clear()
+    return records
+
+def render_page(pdf_path, page_no, dpi):
+    """
+    Rasterizes one page (PIL image), None when pdftoppm fails.
+    """
     try:
-        pages = convert_from_path(pdf_path, dpi=300)
+        pages = convert_from_path(pdf_path, dpi=dpi, first_page=page_no, last_page=page_no,
+                                  timeout=deadline.call_timeout())
     except Exception as e:
-        print(f"❌ PDF conversion error: {e}")
-        return ""
+        # pdftoppm is killed when the request runs out of time
+        deadline.check()
+        print(f"❌ PDF conversion error on page {page_no}: {e}")
+        return None
+    return pages[0] if pages else None
 
-    text = ""
-    for page in pages:
-        page_np = np.array(page)
-        gray = cv2.cvtColor(page_np, cv2.COLOR_BGR2GRAY)
-        text += pytesseract.image_to_string(gray, config=CUSTOM_CONFIG)
-    return text
+def stop_at_deadline(records, page_no, last_page, error):
+    """
+    Ends OCR at page_no when the request deadline expired. With a partial
+    deadline the finished records are returned and the remaining pages are
+    marked as skipped; otherwise the error is raised.
+    """
+    active = deadline.current()
+    if active is None or not active.partial:
+        raise error
+    print(f"DEBUG: {error}: returning pages before {page_no}")
+    for n in range(page_no, last_page + 1):
+        records.append({"page": n, "text": "", "skipped": "deadline"})
+    return records
+
+def extract_pages_from_pdf(pdf_path, first_page=None, last_page=None, profile=None):
+    """
+    Converts PDF pages to images and runs OCR.
+    Returns one text per page.
+    """
+    return [p["text"] for p in ocr_pdf_pages(pdf_path, first_page=first_page, last_page=last_page, profile=profile)]
+
+def extract_text_from_pdf(pdf_path, first_page=None, last_page=None):
+    """
+    Converts PDF pages to images and runs OCR.
+    first_page / last_page (1-based, inclusive) limit rasterization to a page range.
+    """
+    return "".join(extract_pages_from_pdf(pdf_path, first_page=first_page, last_page=last_page))
 
 def parse_transactions(text):
     """
@@ -16,7 +16,7 @@ Improvements by Agent:
 """
 
 import cv2
-import pytesseract
+import ocr_engine
 import re
 import os
 import numpy as np
@@ -133,19 +133,20 @@ def process_image(image_path, debug_save=True):
     if debug_save:
         cv2.imwrite("processed.jpg", resized)
 
-    text = pytesseract.image_to_string(resized, config=CUSTOM_CONFIG)
+    text = ocr_engine.image_to_string(resized, config=CUSTOM_CONFIG)
     return text
 
-def extract_text_from_pdf(pdf_path):
+def extract_text_from_pdf(pdf_path, first_page=None, last_page=None):
     """
     Converts PDF pages to images and runs OCR.
+    first_page / last_page (1-based, inclusive) limit rasterization to a page range.
     """
     if not os.path.exists(pdf_path):
         print(f"⚠️ PDF not found: {pdf_path}")
         return ""
 
     try:
-        pages = convert_from_path(pdf_path, dpi=300)
+        pages = convert_from_path(pdf_path, dpi=300, first_page=first_page, last_page=last_page)
     except Exception as e:
         print(f"❌ PDF conversion error: {e}")
         return ""
@@ -154,7 +155,7 @@ def extract_text_from_pdf(pdf_path):
     for page in pages:
         page_np = np.array(page)
         gray = cv2.cvtColor(page_np, cv2.COLOR_BGR2GRAY)
-        text += pytesseract.image_to_string(gray, config=CUSTOM_CONFIG)
+        text += ocr_engine.image_to_string(gray, config=CUSTOM_CONFIG)
     return text
 
 def parse_transactions(text):
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+One CPU budget for Tesseract (OpenMP), OpenCV and our own parallelism.
+
+Left alone, every Tesseract process starts up to 4 OpenMP threads and
+OpenCV starts one thread per core in every process. With several requests
+or worker processes on top, an 8 core box runs 60+ runnable threads and
+throughput drops. Here the cores are split between the OCR calls that run
+at the same time:
+
+- each Tesseract call gets OMP_THREAD_LIMIT = cores // concurrent calls
+  (at most MAX_TESSERACT_THREADS, OpenMP gains little beyond that)
+- OpenCV gets cores // MAX_CONCURRENT_OCR threads in the API process and
+  cores // OCR_WORKERS threads in each worker process
+- worker processes use a fixed share instead of counting calls
+- pytesseract mode cannot pass an environment per call; it inherits the
+  static share from os.environ
+
+CPU_AUTOTUNE=1 benchmarks a few (concurrency, threads per call)
+combinations on a synthetic statement page at startup and keeps the one
+with the best pages per second (see autotune()). TESSERACT_THREADS fixes
+the threads per call by hand. Under gunicorn the benchmark runs once in the
+master on one worker's share of the cores (gunicorn_conf.when_ready) and
+the forked workers inherit its result; workers benchmarking at the same
+time would only measure each other.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+CPU_AUTOTUNE = os.environ.get("CPU_AUTOTUNE", "0") == "1"
+MAX_TESSERACT_THREADS = 4
+AUTOTUNE_PAGES = 8
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# Under gunicorn every worker process owns its share of the machine
+CORES = max(1, available_cores() // int(os.environ.get("WEB_CONCURRENCY", "1")))
+
+# Fixed threads per Tesseract call (env, worker share or autotune), None = dynamic
+_fixed_threads = int(os.environ["TESSERACT_THREADS"]) if os.environ.get("TESSERACT_THREADS") else None
+_active_calls = 0
+_lock = threading.Lock()
+_last_autotune = None
+
+
+def share(parallel, cap=None):
+    """
+    Threads each of `parallel` concurrent users gets.
+    """
+    threads = max(1, CORES // max(1, parallel))
+    return min(threads, cap) if cap else threads
+
+
+def tesseract_threads():
+    """
+    OMP_THREAD_LIMIT for the next Tesseract call.
+    """
+    if _fixed_threads:
+        return _fixed_threads
+    with _lock:
+        active = _active_calls
+    return share(active, MAX_TESSERACT_THREADS)
+
+
+@contextmanager
+def ocr_call():
+    """
+    Wraps one Tesseract subprocess; yields the environment to start it with.
+    """
+    global _active_calls
+    with _lock:
+        _active_calls += 1
+    try:
+        env = dict(os.environ, OMP_THREAD_LIMIT=str(tesseract_threads()))
+        yield env
+    finally:
+        with _lock:
+            _active_calls -= 1
+
+
+def configure(concurrency, fixed=False):
+    """
+    Sets OpenCV's thread pool for `concurrency` parallel OCR jobs in this
+    process. fixed=True also pins the Tesseract share (worker processes).
+    """
+    global _fixed_threads
+    cv2.setNumThreads(share(concurrency))
+    if fixed and not os.environ.get("TESSERACT_THREADS"):
+        _fixed_threads = share(concurrency, MAX_TESSERACT_THREADS)
+    # Inherited by Tesseract runs that do not go through ocr_call() (pytesseract mode)
+    os.environ["OMP_THREAD_LIMIT"] = str(_fixed_threads or share(concurrency, MAX_TESSERACT_THREADS))
+
+
+def configure_worker(workers):
+    """
+    ProcessPoolExecutor initializer: each worker owns cores // workers.
+    """
+    configure(workers, fixed=True)
+
+
+def last_autotune():
+    """
+    Result of the autotune run in this process (or the gunicorn master), None if none ran.
+    """
+    return _last_autotune
+
+
+def stats():
+    with _lock:
+        active = _active_calls
+    return {
+        "cores": CORES,
+        "active_tesseract_calls": active,
+        "tesseract_threads": _fixed_threads or share(max(1, active), MAX_TESSERACT_THREADS),
+        "fixed": bool(_fixed_threads),
+        "opencv_threads": cv2.getNumThreads(),
+        "autotune": _last_autotune,
+    }
+
+
+# ---------------------------------------------------------
+# Self-tuning
+# ---------------------------------------------------------
+def synthetic_page():
+    """
+    A statement-like page (300 DPI A4 width, table rows) for benchmarks.
+    """
+    page = np.full((1400, 2480), 255, dtype=np.uint8)
+    for i in range(18):
+        y = 80 + i * 70
+        cv2.putText(page, "Oct 23, 2025", (80, y), cv2.FONT_HERSHEY_SIMPLEX, 1.1, 0, 2)
+        cv2.putText(page, f"Paid to MERCHANT {i:02d} PVT LTD", (600, y), cv2.FONT_HERSHEY_SIMPLEX, 1.1, 0, 2)
+        cv2.putText(page, "DEBIT", (1700, y), cv2.FONT_HERSHEY_SIMPLEX, 1.1, 0, 2)
+        cv2.putText(page, f"Rs {150 + i * 37}.00", (2050, y), cv2.FONT_HERSHEY_SIMPLEX, 1.1, 0, 2)
+    return page
+
+
+def candidates(cores=None):
+    """
+    (concurrency, threads per call) pairs worth trying on this machine.
+    """
+    cores = cores or CORES
+    pairs = set()
+    for threads in (1, 2, MAX_TESSERACT_THREADS):
+        for concurrency in (1, max(1, cores // 2), cores):
+            if concurrency * threads <= cores * 2:
+                pairs.add((concurrency, min(threads, cores)))
+    return sorted(pairs)
+
+
+def benchmark(ocr, image, concurrency, threads, pages=AUTOTUNE_PAGES):
+    """
+    Pages per second OCR'ing `pages` copies of image with `concurrency`
+    parallel calls limited to `threads` threads each.
+    """
+    global _fixed_threads
+    previous = _fixed_threads
+    _fixed_threads = threads
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda _: ocr(image), range(max(pages, concurrency))))
+        return max(pages, concurrency) / (time.perf_counter() - start)
+    finally:
+        _fixed_threads = previous
+
+
+def autotune(ocr=None, image=None, pairs=None):
+    """
+    Benchmarks the candidate pairs and applies the fastest: its threads per
+    call become fixed. Returns {"concurrency", "threads", "pages_per_second", "results"}.
+    """
+    global _fixed_threads, _last_autotune
+    if ocr is None:
+        import ocr_engine
+        ocr = lambda img: ocr_engine.image_to_string(img, config="--oem 3 --psm 6")
+    image = synthetic_page() if image is None else image
+
+    results = []
+    for concurrency, threads in pairs or candidates():
+        rate = benchmark(ocr, image, concurrency, threads)
+        results.append({"concurrency": concurrency, "threads": threads, "pages_per_second": round(rate, 2)})
+        print(f"DEBUG: Autotune {concurrency} x {threads} threads -> {rate:.2f} pages/s")
+
+    best = max(results, key=lambda r: r["pages_per_second"])
+    _fixed_threads = best["threads"]
+    configure(best["concurrency"])
+    os.environ["OMP_THREAD_LIMIT"] = str(_fixed_threads)
+    _last_autotune = dict(best, results=results)
+    print(f"✅ CPU budget: {best['concurrency']} concurrent OCR calls x {best['threads']} threads")
+    return _last_autotune
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Request deadlines and cancellation for the OCR pipeline.
+
+A Deadline carries the time budget of one request and a cancel flag (set
+when the client disconnects). It is activated for the thread that does the
+OCR work, so the deep stages pick it up without extra parameters:
+
+- ocr_engine kills the running Tesseract process when the budget is spent
+  or the request is cancelled
+- ocr_pdf_pages stops before the next page and, with partial=True, returns
+  the pages finished so far instead of failing
+- rasterization and worker pool waits get the remaining time as timeout
+
+Code that is not running under a deadline sees current() == None and
+behaves exactly as before.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Default budget per request in seconds (0 = none)
+REQUEST_TIMEOUT = float(os.environ.get("REQUEST_TIMEOUT", "0"))
+# How often blocking waits look at the cancel flag
+POLL_INTERVAL = 0.2
+
+_current = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request ran out of time or was cancelled."""
+
+
+class Deadline:
+    def __init__(self, seconds=None, partial=False):
+        self.seconds = seconds or None
+        self.partial = partial
+        self.start = time.monotonic()
+        self.expires_at = self.start + seconds if seconds else None
+        self._cancelled = threading.Event()
+        self.reason = None
+
+    def remaining(self):
+        """
+        Seconds left (never negative), None without a budget.
+        """
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+    def cancel(self, reason="cancelled"):
+        self.reason = reason
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def expired(self):
+        return self.cancelled or (self.expires_at is not None and time.monotonic() >= self.expires_at)
+
+    def check(self):
+        """
+        Raises DeadlineExceeded once the budget is spent or the request was cancelled.
+        """
+        if self.cancelled:
+            raise DeadlineExceeded(self.reason)
+        if self.expires_at is not None and time.monotonic() >= self.expires_at:
+            raise DeadlineExceeded(f"deadline of {self.seconds:g}s exceeded")
+
+    def timeout(self, default=None):
+        """
+        Timeout for a blocking call: the remaining budget, capped by default.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return remaining if default is None else min(default, remaining)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def activate(deadline):
+    """
+    Makes `deadline` the current deadline of this thread / context.
+    """
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def check():
+    """
+    current().check() when a deadline is active.
+    """
+    deadline = current()
+    if deadline is not None:
+        deadline.check()
+
+
+def call_timeout(default=None):
+    """
+    Timeout for a blocking call under the current deadline (or default).
+    """
+    deadline = current()
+    return deadline.timeout(default) if deadline is not None else default
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Cheap first-page probe that picks the statement profile before the full OCR.
+
+Only the top PROBE_STRIP of page 1 is rendered at PROBE_DPI and OCR'd. The
+brand name in the header (PhonePe, Paytm) decides the profile; without one,
+the date style of the first rows does (the same rules as
+statement_router.detect_date_format, but only when they are conclusive).
+The full pass then runs straight away with the profile's DPI, psm, words
+and whitelist, and the parser is chosen from the probed date format.
+"""
+
+import os
+import re
+
+import numpy as np
+from pdf2image import convert_from_path
+
+import deadline
+import ocr_engine
+from statement_router import profile_for_format
+
+FORMAT_PROBE = os.environ.get("FORMAT_PROBE", "1") == "1"
+
+PROBE_DPI = 100
+# Fraction of the page height that is OCR'd (header + first rows)
+PROBE_STRIP = 0.35
+PROBE_CONFIG = r'--oem 3 --psm 6'
+
+BRAND_PROFILES = {
+    "phonepe": ("phonepe", "MM/DD/YYYY"),
+    "paytm": ("paytm", "DD/MM/YYYY"),
+}
+
+NUMERIC_DATE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})')
+MONTH_FIRST = re.compile(r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},\s+\d{4}')
+DAY_FIRST = re.compile(r'\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\b')
+
+
+def conclusive_date_format(text):
+    """
+    'MM/DD/YYYY' or 'DD/MM/YYYY' when the text proves one, else None.
+    """
+    for m in NUMERIC_DATE.finditer(text):
+        first, second = int(m.group(1)), int(m.group(2))
+        if first > 12:
+            return 'DD/MM/YYYY'
+        if second > 12:
+            return 'MM/DD/YYYY'
+    if MONTH_FIRST.search(text):
+        return 'MM/DD/YYYY'
+    if DAY_FIRST.search(text):
+        return 'DD/MM/YYYY'
+    return None
+
+
+def classify_text(text):
+    """
+    Returns {"profile", "date_format", "source"} for probe text.
+    profile and date_format are None when nothing was conclusive.
+    """
+    squashed = re.sub(r'\s+', '', text.lower())
+    # The header brand comes first; later mentions are payees ("Paid to PhonePe ...")
+    found = [(squashed.find(brand), brand) for brand in BRAND_PROFILES if brand in squashed]
+    if found:
+        profile, date_format = BRAND_PROFILES[min(found)[1]]
+        return {"profile": profile, "date_format": date_format, "source": "brand"}
+
+    date_format = conclusive_date_format(text)
+    if date_format:
+        return {"profile": profile_for_format(date_format), "date_format": date_format, "source": "dates"}
+    return {"profile": None, "date_format": None, "source": None}
+
+
+def probe_statement(pdf_path, page_no=1):
+    """
+    Renders the top strip of one page at PROBE_DPI and classifies it.
+    Never raises (except for the request deadline): a failed probe just
+    leaves the choice to the full pass.
+    """
+    try:
+        pages = convert_from_path(pdf_path, dpi=PROBE_DPI, first_page=page_no, last_page=page_no,
+                                  grayscale=True)
+        if not pages:
+            return classify_text("")
+        gray = np.array(pages[0])
+        strip = gray[: int(gray.shape[0] * PROBE_STRIP)]
+        result = classify_text(ocr_engine.image_to_string(strip, config=PROBE_CONFIG))
+    except deadline.DeadlineExceeded:
+        raise
+    except Exception as e:
+        print(f"⚠️ Format probe failed: {e}")
+        return classify_text("")
+
+    print(f"DEBUG: Format probe -> profile={result['profile']} format={result['date_format']} ({result['source']})")
+    return result
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Gunicorn settings for production: several Uvicorn workers forked from one
+preloaded master.
+
+    gunicorn -c gunicorn_conf.py main:app
+
+- preload_app imports main (cv2, NumPy, Tesseract setup, all modules) in
+  the master; when_ready() also writes the statement profile files,
+  fills the regex cache by parsing sample statements and freezes the heap
+  (gc.freeze), so the forked workers share those pages copy-on-write
+- workers = min(cores // CORES_PER_WORKER, memory // WORKER_MEMORY_MB),
+  WEB_CONCURRENCY overrides; the count is exported so every worker's
+  admission slots and CPU budget get their share of the cores
+- each worker's raster budget (RASTER_MEMORY_MB) is RASTER_SHARE of its
+  WORKER_MEMORY_MB, so the workers together stay within the planned memory
+- workers are recycled after MAX_REQUESTS requests (with jitter) and, via
+  worker_recycle, once their RSS passes MAX_WORKER_RSS_MB
+
+Client addresses come from X-Forwarded-For only for proxies listed in
+FORWARDED_ALLOW_IPS (default 127.0.0.1). On Render the app is only reachable
+through its proxy, so render.yaml sets "*"; rate limiting by IP and request
+coalescing are keyed on that address.
+
+Async-lane jobs are shared through job_store on disk. Rate-limit buckets
+and request coalescing stay per worker: each worker enforces
+1/WEB_CONCURRENCY of every tenant's limit, and identical requests are only
+coalesced when they reach the same worker.
+"""
+
+import gc
+import os
+
+# Cores each worker is planned with (its OCR slots run in parallel)
+CORES_PER_WORKER = int(os.environ.get("CORES_PER_WORKER", "2"))
+# Planned memory per worker: page rasters, Tesseract, OpenCV buffers
+WORKER_MEMORY_MB = int(os.environ.get("WORKER_MEMORY_MB", "600"))
+MAX_WORKERS = int(os.environ.get("MAX_WORKERS", "16"))
+# Share of a worker's memory its in-flight page rasters may take
+RASTER_SHARE = 0.5
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def available_memory_mb():
+    """
+    Container memory limit (cgroup v2 / v1) or MemAvailable, in MB.
+    """
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            # "max" or a huge number means no limit
+            if value.isdigit() and int(value) < 1 << 60:
+                return int(value) // (1024 * 1024)
+        except OSError:
+            continue
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return WORKER_MEMORY_MB
+
+
+def worker_count(cores=None, memory_mb=None):
+    cores = cores or available_cores()
+    memory_mb = memory_mb or available_memory_mb()
+    by_cpu = max(1, cores // CORES_PER_WORKER)
+    by_memory = max(1, memory_mb // WORKER_MEMORY_MB)
+    return max(1, min(by_cpu, by_memory, MAX_WORKERS))
+
+
+workers = int(os.environ.get("WEB_CONCURRENCY") or worker_count())
+
+# Read by the workers: admission slots and CPU threads are split between them
+os.environ["WEB_CONCURRENCY"] = str(workers)
+os.environ.setdefault("MAX_CONCURRENT_OCR", str(max(1, available_cores() // workers)))
+os.environ.setdefault("RASTER_MEMORY_MB", str(max(64, int(WORKER_MEMORY_MB * RASTER_SHARE))))
+os.environ.setdefault("MAX_WORKER_RSS_MB", str(int(WORKER_MEMORY_MB * 1.5)))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+# Passed on to the Uvicorn workers (proxy headers)
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+max_requests = int(os.environ.get("MAX_REQUESTS", "500"))
+max_requests_jitter = max(1, max_requests // 10)
+# Long statements run for minutes; let them finish when a worker is recycled
+timeout = int(os.environ.get("WORKER_TIMEOUT", "300"))
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "120"))
+keepalive = 5
+accesslog = "-"
+
+
+def warm_shared_state():
+    """
+    Builds what every worker would otherwise build on its first request.
+    """
+    import statement_profiles
+    from statement_router import parse_extracted_text
+
+    for name in statement_profiles.PROFILES:
+        statement_profiles.get_config(name)
+
+    # Compiles the parsers' patterns into the re cache
+    samples = {
+        "MM/DD/YYYY": "Oct 23, 2025 Paid to Sample Store DEBIT ₹150\n10:15 am Transaction ID T123\n",
+        "DD/MM/YYYY": "23 Oct Paid to Sample Store - Rs.150\n10:15 AM UPI Ref No: 123\n",
+    }
+    for date_format, text in samples.items():
+        parse_extracted_text(text, date_format=date_format)
+
+
+def autotune_once(server):
+    """
+    CPU_AUTOTUNE=1: benchmarks once here instead of in every worker at the
+    same time. The master holds one worker's share of the cores (cpu_budget
+    reads WEB_CONCURRENCY), so the result fits each worker; workers inherit
+    it through the fork and only size their OCR slots from it.
+    """
+    import cpu_budget
+
+    if not cpu_budget.CPU_AUTOTUNE:
+        return
+    try:
+        best = cpu_budget.autotune()
+    except Exception as e:
+        server.log.warning(f"CPU autotune failed, keeping defaults: {e}")
+        return
+    os.environ["TESSERACT_THREADS"] = str(best["threads"])
+    os.environ["MAX_CONCURRENT_OCR"] = str(best["concurrency"])
+
+
+def when_ready(server):
+    warm_shared_state()
+    autotune_once(server)
+    # Objects created so far are never collected: the GC stops touching
+    # (and un-sharing) their pages in the workers
+    gc.freeze()
+    server.log.info(f"Preloaded shared state, {workers} workers")
+
+
+def post_fork(server, worker):
+    # Lets worker_recycle know it may ask gunicorn for a replacement
+    os.environ["GUNICORN_WORKER"] = "1"
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Liveness and readiness checks for the orchestrator and load balancer.
+
+- liveness: the process answers; nothing external is touched
+- readiness: Tesseract and poppler actually work (a cached self-test on a
+  generated page and a generated one page PDF), the worker pool is not
+  broken, the OCR store is writable and the instance is not saturated
+  (every OCR slot busy and the queue full)
+
+The self-test costs ~100 ms of OCR, so its result is cached for
+HEALTH_CACHE_SECONDS and probes in between only read the cache.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+from pdf2image import convert_from_path
+
+import admission
+import ingest_guard
+import ocr_engine
+import ocr_store
+import page_buffers
+import raster_budget
+
+HEALTH_CACHE_SECONDS = float(os.environ.get("HEALTH_CACHE_SECONDS", "60"))
+SELF_TEST_TIMEOUT = 10
+SELF_TEST_TEXT = "OCR 4021"
+
+STARTED_AT = time.time()
+
+_self_test = None
+_self_test_lock = threading.Lock()
+
+
+def _timed(check):
+    start = time.perf_counter()
+    try:
+        result = dict(check(), ok=True)
+    except Exception as e:
+        result = {"ok": False, "error": f"{type(e).__name__}: {e}".strip()}
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+def check_tesseract():
+    """
+    OCRs a rendered line of text. The text must come back, digits included.
+    """
+    image = np.full((80, 420), 255, dtype=np.uint8)
+    cv2.putText(image, SELF_TEST_TEXT, (10, 58), cv2.FONT_HERSHEY_SIMPLEX, 1.6, 0, 3)
+    text = ocr_engine.image_to_string(image, config="--oem 3 --psm 7", timeout=SELF_TEST_TIMEOUT).strip()
+    if "4021" not in text.replace(" ", ""):
+        raise RuntimeError(f"unexpected OCR output {text!r}")
+    return {"text": text}
+
+
+def check_poppler():
+    """
+    Writes a one page PDF and reads it back with pdfinfo and pdftoppm.
+    """
+    workdir = tempfile.mkdtemp(prefix="health_")
+    try:
+        pdf_path = os.path.join(workdir, "self_test.pdf")
+        Image.new("RGB", (200, 100), "white").save(pdf_path)
+        info = ingest_guard.inspect_pdf(pdf_path, max_pages=1)
+        pages = convert_from_path(pdf_path, dpi=36, timeout=SELF_TEST_TIMEOUT)
+        if info["pages"] != 1 or len(pages) != 1:
+            raise RuntimeError(f"expected 1 page, got {info['pages']} / {len(pages)}")
+        return {"pages": info["pages"]}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def self_test(force=False):
+    """
+    Cached result of the Tesseract and poppler checks.
+    """
+    global _self_test
+    with _self_test_lock:
+        stale = _self_test is None or time.time() - _self_test["checked_at"] > HEALTH_CACHE_SECONDS
+        if force or stale:
+            tesseract = _timed(check_tesseract)
+            poppler = _timed(check_poppler)
+            _self_test = {
+                "ok": tesseract["ok"] and poppler["ok"],
+                "tesseract": tesseract,
+                "poppler": poppler,
+                "checked_at": time.time(),
+            }
+            if not _self_test["ok"]:
+                print(f"⚠️ OCR self-test failed: tesseract={tesseract} poppler={poppler}")
+        return dict(_self_test, age_s=round(time.time() - _self_test["checked_at"], 1))
+
+
+def store_status():
+    """
+    The OCR store must be writable, or finished work cannot be kept.
+    Only stats the directory: probes must not scale with the stored corpus.
+    """
+    directory = ocr_store.OCR_STORE_DIR
+    exists = os.path.isdir(directory)
+    writable = os.access(directory if exists else os.path.dirname(os.path.abspath(directory)), os.W_OK)
+    return {"ok": writable, "dir": directory}
+
+
+def saturation():
+    stats = admission.controller.stats()
+    return {
+        "saturated": admission.controller.is_full(),
+        "utilization": round(stats["in_flight"] / max(1, stats["max_concurrent"]), 2),
+        "in_flight": stats["in_flight"],
+        "max_concurrent": stats["max_concurrent"],
+        "queue_depth": stats["queue_depth"],
+        "max_queue": stats["max_queue"],
+        "jobs_waiting": stats["jobs_waiting"],
+        "retry_after_s": stats["retry_after_s"],
+    }
+
+
+def liveness():
+    return {"status": "ok", "uptime_s": round(time.time() - STARTED_AT, 1)}
+
+
+def readiness():
+    """
+    Returns (ready, report). Not ready when OCR is broken or the instance
+    cannot take another request.
+    """
+    checks = self_test()
+    pool = page_buffers.pool_status()
+    store = store_status()
+    load = saturation()
+
+    problems = []
+    if not checks["tesseract"]["ok"]:
+        problems.append("tesseract")
+    if not checks["poppler"]["ok"]:
+        problems.append("poppler")
+    if pool["broken"]:
+        problems.append("worker_pool")
+    if not store["ok"]:
+        problems.append("ocr_store")
+    if load["saturated"]:
+        problems.append("saturated")
+
+    report = {
+        "status": "ready" if not problems else "not_ready",
+        "problems": problems,
+        "self_test": checks,
+        "worker_pool": pool,
+        "load": load,
+        "raster_memory": raster_budget.budget.stats(),
+        "cache": {"self_test_age_s": checks["age_s"], "self_test_ttl_s": HEALTH_CACHE_SECONDS, "ocr_store": store},
+    }
+    return not problems, report
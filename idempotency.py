@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Idempotency keys and coalescing of identical requests.
+
+Mobile clients retry uploads on flaky networks, often while the first
+attempt is still being OCR'd. Requests are keyed by their Idempotency-Key
+header or, without one, by a hash of the upload and the options, scoped
+to the tenant. Then:
+
+- a request whose key is in flight attaches to that computation and gets
+  its result ("joined"); the OCR is only cancelled when every attached
+  client has disconnected
+- a request whose key finished within IDEMPOTENCY_TTL seconds gets the
+  stored response ("replayed")
+- reusing an Idempotency-Key with a different upload or options is a
+  client error (KeyReused, 422)
+
+Only successful, complete responses are stored; a failed computation
+fails the requests attached to it, and the next retry runs again. A
+response cut short by its deadline (partial) still goes to the requests
+attached to it, but is not replayed: a retry, possibly with a longer
+timeout, runs again.
+
+Entries live in process memory, so under gunicorn coalescing only works
+within one worker. A retry that lands on another worker is computed again
+(and reusing a key there is not detected); the responses are still correct,
+only the duplicate OCR is not saved.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+IDEMPOTENCY_TTL = float(os.environ.get("IDEMPOTENCY_TTL", "600"))
+MAX_ENTRIES = int(os.environ.get("IDEMPOTENCY_MAX_ENTRIES", "1000"))
+
+HEADER = "idempotency-key"
+
+
+class KeyReused(Exception):
+    """The Idempotency-Key was used before for a different request."""
+
+
+def fingerprint(content_digest, options):
+    """
+    Hash of the upload (a hex digest) and the options that change the result.
+    """
+    payload = json.dumps(options, sort_keys=True, default=str)
+    return hashlib.sha256(f"{content_digest}|{payload}".encode("utf-8")).hexdigest()
+
+
+def request_key(tenant, idempotency_key, request_fingerprint):
+    if idempotency_key:
+        return f"key:{tenant}:{idempotency_key}"
+    return f"content:{tenant}:{request_fingerprint}"
+
+
+class Coalescer:
+    def __init__(self, ttl=IDEMPOTENCY_TTL, max_entries=MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> {"fingerprint", "future", "clients", "expires"}
+        self._entries = {}
+        self.computed = 0
+        self.joined = 0
+        self.replayed = 0
+
+    def _evict(self, now):
+        for key, entry in list(self._entries.items()):
+            if entry["expires"] is not None and entry["expires"] <= now:
+                del self._entries[key]
+        if len(self._entries) >= self.max_entries:
+            done = sorted((e["expires"], k) for k, e in self._entries.items() if e["expires"] is not None)
+            for _, key in done[: len(self._entries) - self.max_entries + 1]:
+                del self._entries[key]
+
+    async def run(self, key, request_fingerprint, compute, client=None, cacheable=None):
+        """
+        Returns (response, outcome) with outcome "computed", "joined" or
+        "replayed". compute(abandoned) is awaited for new keys; abandoned()
+        tells it whether every attached client has gone away. client is an
+        object with an async is_disconnected() (the request). cacheable(response)
+        False keeps a response from being replayed later (default: all are).
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry["expires"] is not None and entry["expires"] <= now:
+            del self._entries[key]
+            entry = None
+
+        if entry is not None:
+            if entry["fingerprint"] != request_fingerprint:
+                raise KeyReused("Idempotency-Key was already used for a different request.")
+            if entry["expires"] is not None:
+                self.replayed += 1
+                return entry["future"].result(), "replayed"
+            self.joined += 1
+            entry["clients"].append(client)
+            try:
+                return await asyncio.shield(entry["future"]), "joined"
+            finally:
+                entry["clients"].remove(client)
+
+        self._evict(now)
+        entry = {
+            "fingerprint": request_fingerprint,
+            "future": asyncio.get_running_loop().create_future(),
+            "clients": [client],
+            "expires": None,
+        }
+        self._entries[key] = entry
+
+        async def abandoned():
+            for attached in list(entry["clients"]):
+                if attached is None or not await attached.is_disconnected():
+                    return False
+            return True
+
+        self.computed += 1
+        try:
+            response = await compute(abandoned)
+        except BaseException as e:
+            self._entries.pop(key, None)
+            if not isinstance(e, asyncio.CancelledError):
+                entry["future"].set_exception(e)
+                # Retrieved by joined requests, if any
+                entry["future"].exception()
+            else:
+                entry["future"].cancel()
+            raise
+        entry["future"].set_result(response)
+        if cacheable is None or cacheable(response):
+            entry["expires"] = time.monotonic() + self.ttl
+        else:
+            # Requests already attached keep their future; new ones run again
+            self._entries.pop(key, None)
+        return response, "computed"
+
+    def stats(self):
+        return {
+            "ttl_s": self.ttl,
+            "entries": len(self._entries),
+            "in_flight": sum(1 for e in self._entries.values() if e["expires"] is None),
+            "computed": self.computed,
+            "joined": self.joined,
+            "replayed": self.replayed,
+        }
+
+
+coalescer = Coalescer()
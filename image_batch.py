@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+One Tesseract run for many screenshots.
+
+A PhonePe / Paytm transaction screenshot holds a few hundred pixels of text;
+starting Tesseract and loading its model costs more than reading it. Batch
+uploads are therefore:
+
+1. preprocessed one by one (image_pipeline: grayscale, scale, binarize)
+2. stacked top to bottom on one white canvas, separated by SEPARATOR_PX of
+   blank paper so Tesseract never joins lines of two screenshots
+3. OCR'd once with word boxes (image_to_data)
+4. split back: every word belongs to the tile that contains its centre
+
+Canvases are capped at MAX_CANVAS_HEIGHT px (Tesseract/Leptonica refuse very
+tall images), so a large batch becomes a few canvases instead of one.
+"""
+
+import numpy as np
+
+import image_pipeline
+import ocr_engine
+
+SEPARATOR_PX = 60
+MAX_CANVAS_HEIGHT = 30000
+MAX_BATCH_IMAGES = 50
+
+
+def plan_canvases(sizes, separator=SEPARATOR_PX, max_height=MAX_CANVAS_HEIGHT):
+    """
+    Places tiles of the given (height, width) sizes on canvases.
+    Returns [{"shape": (h, w), "tiles": [(index, top, left), ...]}, ...].
+    """
+    canvases = []
+    current = None
+    for index, (height, width) in enumerate(sizes):
+        if current is None or current["height"] + separator + height > max_height:
+            current = {"height": separator, "width": 0, "tiles": []}
+            canvases.append(current)
+        current["tiles"].append((index, current["height"], separator))
+        current["height"] += height + separator
+        current["width"] = max(current["width"], width + 2 * separator)
+    return [{"shape": (c["height"], c["width"]), "tiles": c["tiles"]} for c in canvases]
+
+
+def compose(tiles, plan):
+    """
+    Pastes binarized tiles onto one white canvas following a plan entry.
+    """
+    canvas = np.full(plan["shape"], 255, dtype=np.uint8)
+    for index, top, left in plan["tiles"]:
+        tile = tiles[index]
+        canvas[top:top + tile.shape[0], left:left + tile.shape[1]] = tile
+    return canvas
+
+
+def split_words(words, tiles, plan):
+    """
+    Returns {tile_index: [word, ...]} with coordinates relative to the tile.
+    Words whose centre lies in a separator are dropped.
+    """
+    by_tile = {index: [] for index, _, _ in plan["tiles"]}
+    for w in words:
+        cx = w["left"] + w["width"] / 2
+        cy = w["top"] + w["height"] / 2
+        for index, top, left in plan["tiles"]:
+            height, width = tiles[index].shape
+            if top <= cy < top + height and left <= cx < left + width:
+                by_tile[index].append(dict(w, top=w["top"] - top, left=w["left"] - left))
+                break
+    return by_tile
+
+
+def ocr_image_batch(images, config, layout=False):
+    """
+    OCRs many encoded images with one Tesseract call per canvas.
+    Returns one page record per input, in order; images that cannot be
+    decoded get an empty text and the reason under "error".
+    """
+    records = [{"page": i + 1, "text": ""} for i in range(len(images))]
+    tiles = {}
+    for i, data in enumerate(images):
+        try:
+            gray = image_pipeline.decode_image(data)
+        except image_pipeline.InvalidImage as e:
+            records[i]["error"] = str(e)
+            continue
+        # preprocess returns a reused buffer: keep a copy per tile
+        tiles[i] = image_pipeline.preprocess(gray).copy()
+        records[i]["image_size"] = [gray.shape[1], gray.shape[0]]
+
+    order = sorted(tiles)
+    plans = plan_canvases([tiles[i].shape for i in order])
+    for canvas_no, plan in enumerate(plans):
+        # Plan indexes are positions in `order`; map them back to input indexes
+        plan = {"shape": plan["shape"], "tiles": [(order[k], top, left) for k, top, left in plan["tiles"]]}
+        words = ocr_engine.image_to_data(compose(tiles, plan), config=config)
+        for index, tile_words in split_words(words, tiles, plan).items():
+            records[index]["text"] = ocr_engine.words_to_text(tile_words)
+            records[index]["canvas"] = canvas_no
+            if layout:
+                records[index]["words"] = tile_words
+
+    print(f"DEBUG: OCR'd {len(tiles)} images in {len(plans)} Tesseract call(s)")
+    return records
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+In-memory OCR path for screenshot uploads (PhonePe / Paytm app screens).
+
+The old process_image read the file back from disk in colour, binarized it,
+upscaled the binary image by 150% (which turns every glyph edge into
+jagged staircases) and wrote processed.jpg on every call. Here:
+
+- the upload bytes are decoded straight to grayscale with cv2.imdecode
+  (no temp file, no colour conversion)
+- the image header is checked first so oversized images are refused before
+  their pixels are allocated
+- dark mode screens are inverted to dark text on light background
+- the scale is picked from the measured glyph height (adaptive_dpi) and
+  applied to the grayscale image BEFORE denoising and thresholding
+- the upscale never takes the image past MAX_SCALED_PIXELS
+- the resize / blur / threshold outputs reuse per-thread buffers of the
+  same shape instead of allocating three new images per request; images
+  above MAX_REUSED_PIXELS get throwaway buffers, so one huge upload does
+  not stay allocated in every threadpool thread
+- the working images are reserved in raster_budget like PDF pages
+- OCR goes through page_tiles, so tall scrolled screenshots are cut under
+  Tesseract's height limit
+- nothing is written to disk
+"""
+
+import io
+import math
+import threading
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import adaptive_dpi
+import ocr_engine
+import page_tiles
+import raster_budget
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+# Decoded size limit (a 4K phone screenshot is ~10M pixels)
+MAX_IMAGE_PIXELS = 40_000_000
+
+# Size after upscaling; larger images get a smaller scale
+MAX_SCALED_PIXELS = 40_000_000
+# Biggest scratch buffers kept per thread between requests (a 4K screenshot at 1.5x)
+MAX_REUSED_PIXELS = 16_000_000
+
+MIN_SCALE = 1.0
+MAX_SCALE = 3.0
+# Used when no glyph height can be measured (matches the old fixed upscale)
+DEFAULT_SCALE = 1.5
+
+_local = threading.local()
+
+
+class InvalidImage(ValueError):
+    """The upload is not a decodable image or is too large."""
+
+
+def _buffer(name, shape):
+    """
+    Per thread scratch image reused across requests of the same size.
+    """
+    buffers = getattr(_local, "buffers", None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    buf = buffers.get(name)
+    if buf is None or buf.shape != shape:
+        if shape[0] * shape[1] > MAX_REUSED_PIXELS:
+            # Not kept: drop the old one too so the thread holds nothing large
+            buffers.pop(name, None)
+            return np.empty(shape, dtype=np.uint8)
+        buf = buffers[name] = np.empty(shape, dtype=np.uint8)
+    return buf
+
+
+def decode_image(data, max_pixels=MAX_IMAGE_PIXELS):
+    """
+    Decodes image bytes to a grayscale array. Raises InvalidImage.
+    """
+    try:
+        # Header only: PIL does not decode pixels until asked to
+        width, height = Image.open(io.BytesIO(data)).size
+    except Exception:
+        raise InvalidImage("File is not a supported image.")
+    if width * height > max_pixels:
+        raise InvalidImage(f"Image is {width}x{height} pixels; the limit is {max_pixels} pixels.")
+
+    gray = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise InvalidImage("File is not a supported image.")
+    return gray
+
+
+def choose_scale(gray):
+    """
+    Upscale factor bringing the median glyph to adaptive_dpi.TARGET_GLYPH_PX,
+    limited so the result stays within MAX_SCALED_PIXELS.
+    """
+    glyph_height = adaptive_dpi.estimate_glyph_height(gray)
+    if not glyph_height:
+        scale = DEFAULT_SCALE
+    else:
+        scale = max(MIN_SCALE, min(MAX_SCALE, adaptive_dpi.TARGET_GLYPH_PX / glyph_height))
+    return min(scale, max_scale(gray.shape))
+
+
+def max_scale(shape):
+    return math.sqrt(MAX_SCALED_PIXELS / max(1, shape[0] * shape[1]))
+
+
+def estimate_bytes(shape):
+    """
+    Worst-case working memory of preprocess() plus the decoded image.
+    """
+    pixels = shape[0] * shape[1]
+    scaled = pixels * min(MAX_SCALE, max_scale(shape)) ** 2
+    # Decoded gray (+ inverted copy) and the resized / blurred / binary images
+    return int(2 * pixels + 3 * scaled)
+
+
+def preprocess(gray):
+    """
+    Grayscale screenshot -> binary image ready for Tesseract.
+    Order: invert dark mode, resize (on grayscale), median blur, Otsu.
+    The returned array is a reused buffer: OCR it before the next call.
+    """
+    if gray.mean() < 110:
+        # Dark mode: light text on dark background
+        gray = cv2.bitwise_not(gray)
+
+    scale = choose_scale(gray)
+    if scale != 1.0:
+        size = (int(round(gray.shape[1] * scale)), int(round(gray.shape[0] * scale)))
+        resized = _buffer("resized", (size[1], size[0]))
+        cv2.resize(gray, size, dst=resized, interpolation=cv2.INTER_CUBIC)
+    else:
+        resized = gray
+
+    blurred = _buffer("blurred", resized.shape)
+    cv2.medianBlur(resized, 3, dst=blurred)
+    binary = _buffer("binary", resized.shape)
+    cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=binary)
+    return binary
+
+
+def ocr_image_bytes(data, config, layout=False):
+    """
+    OCRs an uploaded image without touching the disk.
+    Returns a page record like bank_statement2_ocr.ocr_pdf_pages does.
+    """
+    gray = decode_image(data)
+    record = {"page": 1, "image_size": [gray.shape[1], gray.shape[0]]}
+    with raster_budget.budget.reserve(estimate_bytes(gray.shape)):
+        binary = preprocess(gray)
+        if layout:
+            record["words"] = page_tiles.image_to_data(binary, config=config)
+            record["text"] = ocr_engine.words_to_text(record["words"])
+        else:
+            record["text"] = page_tiles.image_to_string(binary, config=config)
+    return record
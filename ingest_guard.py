@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Ingestion guard for uploaded statements.
+
+Rejects oversized work before any rasterization happens:
+- request bodies are counted as they arrive (UploadSizeLimit) and cut off
+  with 413 once they pass MAX_UPLOAD_BYTES, whether or not the client sent
+  a Content-Length; Starlette would otherwise spool the whole upload before
+  the endpoint runs
+- the spooled upload is copied to disk in chunks and aborted once it passes MAX_UPLOAD_BYTES
+- the PDF page count and page sizes are read with `pdfinfo` (milliseconds,
+  nothing is rendered) and checked against MAX_PDF_PAGES / MAX_PAGE_AREA_SQIN
+- documents above ASYNC_PAGE_THRESHOLD pages go to the asynchronous lane
+  instead of blocking the request
+"""
+
+import os
+import re
+import subprocess
+
+from starlette.exceptions import HTTPException
+
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.environ.get("MAX_PDF_PAGES", "60"))
+ASYNC_PAGE_THRESHOLD = int(os.environ.get("ASYNC_PAGE_THRESHOLD", "15"))
+# Largest page we are willing to rasterize, in square inches (A3 is ~194)
+MAX_PAGE_AREA_SQIN = float(os.environ.get("MAX_PAGE_AREA_SQIN", "400"))
+PDFINFO_TIMEOUT = 5
+# Room for the multipart envelope around the file
+ENVELOPE_BYTES = 64 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+# Decisions returned by check_pdf_limits
+ACCEPT = "accept"
+ASYNC = "async"
+REJECT = "reject"
+# Not too big, just wrong: an empty document or a page range outside it
+INVALID = "invalid"
+
+PAGE_SIZE_RE = re.compile(r'^Page\s+(\d+)\s+size:\s+([\d.]+)\s+x\s+([\d.]+)\s+pts', re.MULTILINE)
+PAGES_RE = re.compile(r'^Pages:\s+(\d+)', re.MULTILINE)
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class InvalidPDF(Exception):
+    pass
+
+
+class UploadSizeLimit:
+    """
+    ASGI middleware counting request body bytes as the server receives them.
+
+    Past max_bytes the next receive() raises a 413 HTTPException; FastAPI
+    lets it through the form parsing and the exception middleware answers
+    it, so an oversized (or chunked, length-less) upload is never spooled
+    in full.
+    """
+
+    def __init__(self, app, max_bytes=None):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        max_bytes = (MAX_UPLOAD_BYTES + ENVELOPE_BYTES) if self.max_bytes is None else self.max_bytes
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    raise HTTPException(status_code=413, detail="Upload too large.")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def save_upload_capped(src, dest_path, max_bytes=None, digest=None):
+    """
+    Copies a file-like upload to dest_path in chunks.
+    Raises UploadTooLarge (and removes the partial file) once max_bytes is exceeded.
+    digest (a hashlib object) is fed every chunk on the way.
+    Returns the number of bytes written.
+    """
+    max_bytes = MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    written = 0
+    try:
+        with open(dest_path, "wb") as out:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit.")
+                if digest is not None:
+                    digest.update(chunk)
+                out.write(chunk)
+    except UploadTooLarge:
+        os.remove(dest_path)
+        raise
+    return written
+
+
+def parse_pdfinfo(output):
+    """
+    Parses `pdfinfo -f 1 -l N` output into page count and per page sizes (points).
+    """
+    pages_match = PAGES_RE.search(output)
+    if not pages_match:
+        raise InvalidPDF("pdfinfo did not report a page count.")
+
+    # page number -> (width, height)
+    sizes = {int(n): (float(w), float(h)) for n, w, h in PAGE_SIZE_RE.findall(output)}
+    return {"pages": int(pages_match.group(1)), "page_sizes": sizes}
+
+
+def inspect_pdf(pdf_path, max_pages=None, first_page=1):
+    """
+    Reads the page count and the size of max_pages pages from first_page on
+    without rendering anything.
+    """
+    max_pages = MAX_PDF_PAGES if max_pages is None else max_pages
+
+    with open(pdf_path, "rb") as f:
+        if not f.read(1024).lstrip().startswith(b"%PDF-"):
+            raise InvalidPDF("File is not a PDF.")
+
+    # Ask for one page more than allowed so an oversized document is visible
+    cmd = ["pdfinfo", "-f", str(first_page), "-l", str(first_page + max_pages), pdf_path]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, timeout=PDFINFO_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise InvalidPDF("PDF metadata could not be read in time.")
+    except FileNotFoundError:
+        raise InvalidPDF("pdfinfo (poppler) is not installed.")
+
+    if proc.returncode:
+        raise InvalidPDF(proc.stderr.decode("utf-8", errors="replace").strip() or "Unreadable PDF.")
+    return parse_pdfinfo(proc.stdout.decode("utf-8", errors="replace"))
+
+
+def check_pdf_limits(info, first_page=None, last_page=None):
+    """
+    Returns (decision, reason) for the output of inspect_pdf.
+    Only the pages inside first_page..last_page count towards the limits.
+    """
+    if info["pages"] == 0:
+        return INVALID, "PDF has no pages."
+
+    first_page = first_page or 1
+    last_page = min(last_page or info["pages"], info["pages"])
+    pages = last_page - first_page + 1
+    if pages < 1:
+        return INVALID, f"Page range {first_page}-{last_page} is outside the document ({info['pages']} pages)."
+    if pages > MAX_PDF_PAGES:
+        return REJECT, f"PDF has {pages} pages; the limit is {MAX_PDF_PAGES}."
+
+    for i, (w, h) in sorted(info["page_sizes"].items()):
+        if i < first_page or i > last_page:
+            continue
+        area = (w / 72.0) * (h / 72.0)
+        if area > MAX_PAGE_AREA_SQIN:
+            return REJECT, f"Page {i} is {area:.0f} sq in; the limit is {MAX_PAGE_AREA_SQIN:.0f}."
+
+    if pages > ASYNC_PAGE_THRESHOLD:
+        return ASYNC, f"PDF has {pages} pages; processing asynchronously."
+    return ACCEPT, ""
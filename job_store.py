@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Status and results of asynchronous-lane jobs, on disk.
+
+Under gunicorn a job runs in the worker that accepted the upload, while
+`GET /jobs/{id}` may land on any worker. Jobs are therefore kept as one
+JSON file each under JOB_STORE_DIR (next to the OCR store), which every
+worker process reads. Only the worker running a job writes its file, and
+writes replace the file atomically.
+"""
+
+import json
+import os
+import time
+
+import ocr_store
+
+JOB_STORE_DIR = os.environ.get("JOB_STORE_DIR", os.path.join("data", "jobs"))
+
+
+def _job_path(job_id):
+    # Job IDs are UUIDs, checked like document IDs
+    if not ocr_store.DOCUMENT_ID_RE.match(job_id or ""):
+        raise ValueError(f"Invalid job id: {job_id!r}")
+    return os.path.join(JOB_STORE_DIR, f"{job_id}.json")
+
+
+def _write(job_id, job):
+    os.makedirs(JOB_STORE_DIR, exist_ok=True)
+    path = _job_path(job_id)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(job, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+
+def create_job(job_id, **fields):
+    job = dict(fields, status="queued", updated_at=time.time())
+    _write(job_id, job)
+    return job
+
+
+def update_job(job_id, **fields):
+    """
+    Merges fields into the stored job (called by the worker running it).
+    """
+    job = load_job(job_id) or {}
+    job.update(fields, updated_at=time.time())
+    _write(job_id, job)
+    return job
+
+
+def load_job(job_id):
+    """
+    Returns the stored job, or None if the job is unknown.
+    """
+    try:
+        path = _job_path(job_id)
+    except ValueError:
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
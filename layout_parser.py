@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Column based parser for word level OCR output (ocr_engine.image_to_data).
+
+The PhonePe statement is a real table:
+
+    Date           | Transaction Details        | Type   | Amount
+    Oct 23, 2025   | Paid to RAKESH KUMAR       | DEBIT  | ₹40
+    10:15 am       | Transaction ID T2510...    |        |
+                   | UTR No. 5123...            |        |
+
+image_to_string flattens that into one line of text per row, and the text
+parser then has to find the amount as "first number after DEBIT". Here each
+word is assigned to a column from the x positions of the header words, so:
+
+- a row starts on a line whose Date cell holds a date
+- Type is read from the Type cell, Amount from the Amount cell only
+- the description is the Details cell up to the first metadata line
+  (Transaction ID, UTR No, Paid by ...)
+
+Pages without a recognizable header reuse the columns of the previous page.
+parse_pages returns None when no page had a header so the caller can fall
+back to the text parser.
+"""
+
+import re
+
+from bank_statement1_ocr import extract_entity, detect_category
+
+COLUMNS = ("date", "details", "type", "amount")
+
+# Header words -> column; the first match per column wins
+HEADER_WORDS = {
+    "date": "date",
+    "transaction": "details",
+    "details": "details",
+    "type": "type",
+    "amount": "amount",
+}
+
+DATE_START = re.compile(
+    r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},\s+\d{4}'
+    r'|\d{1,2}/\d{1,2}/\d{4}'
+)
+TYPE_WORD = re.compile(r'\b(DEBIT|CREDIT)\b', re.IGNORECASE)
+METADATA_LINE = re.compile(r'^(Paid by|Transaction ID|UTR No|Ref)', re.IGNORECASE)
+CURRENCY_MARK = re.compile(r'^(?:₹|Rs\.?|INR)\s*', re.IGNORECASE)
+NUMBER = re.compile(r'[\d,]+(?:\.\d+)?')
+
+# Characters the rupee sign is misread as when Tesseract drops it
+RUPEE_MISREADS = ("7", "2")
+
+
+def group_lines(words):
+    """
+    Groups words into visual lines by their vertical centre.
+    Returns [[word, ...], ...] top to bottom, each line sorted left to right.
+    """
+    if not words:
+        return []
+    ordered = sorted(words, key=lambda w: w["top"] + w["height"] / 2)
+    heights = sorted(w["height"] for w in ordered)
+    tolerance = max(2, heights[len(heights) // 2] / 2)
+
+    lines = []
+    current = []
+    current_centre = None
+    for w in ordered:
+        centre = w["top"] + w["height"] / 2
+        if current and centre - current_centre > tolerance:
+            lines.append(sorted(current, key=lambda x: x["left"]))
+            current = []
+        current.append(w)
+        current_centre = sum(x["top"] + x["height"] / 2 for x in current) / len(current)
+    if current:
+        lines.append(sorted(current, key=lambda x: x["left"]))
+    return lines
+
+
+def _plain(text):
+    return re.sub(r'[^a-z]', '', text.lower())
+
+
+def find_columns(line):
+    """
+    Returns the left edges {column: x} if `line` is the table header
+    (needs at least the Date and Amount headers), else None.
+    """
+    lefts = {}
+    for w in line:
+        column = HEADER_WORDS.get(_plain(w["text"]))
+        if column and column not in lefts:
+            lefts[column] = w["left"]
+    if "date" not in lefts or "amount" not in lefts:
+        return None
+    return lefts
+
+
+def column_bounds(lefts, char_height):
+    """
+    Turns header left edges into [(column, start_x), ...] sorted by x.
+    Boundaries sit a little left of each header, since cells are left
+    aligned with their header but right aligned amounts may start earlier.
+    """
+    margin = char_height
+    bounds = sorted(lefts.items(), key=lambda item: item[1])
+    return [(column, x - margin if i else float("-inf")) for i, (column, x) in enumerate(bounds)]
+
+
+def assign_cells(line, bounds):
+    """
+    Splits one line into {column: [word, ...]} by word centre.
+    """
+    cells = {column: [] for column, _ in bounds}
+    for w in line:
+        centre = w["left"] + w["width"] / 2
+        column = bounds[0][0]
+        for name, start in bounds:
+            if centre >= start:
+                column = name
+        cells[column].append(w)
+    return cells
+
+
+def _cell_text(cell):
+    return " ".join(w["text"] for w in cell)
+
+
+def parse_amount(text):
+    """
+    Amount from an Amount cell. The misread rupee sign heuristic of the text
+    parser only applies when no currency mark was recognized.
+    """
+    text = text.strip()
+    marked = CURRENCY_MARK.match(text)
+    if marked:
+        text = text[marked.end():]
+    match = NUMBER.search(text)
+    if not match:
+        return None
+    amount = match.group(0).replace(",", "").strip(".")
+    if not marked and len(amount) > 1 and amount[0] in RUPEE_MISREADS:
+        amount = amount[1:]
+    return amount or None
+
+
+def _finish(row):
+    description_lines = []
+    for line in row["details"]:
+        if METADATA_LINE.match(line):
+            break
+        description_lines.append(line)
+    description = " ".join(" ".join(description_lines).split()) or "UNKNOWN"
+
+    type_match = TYPE_WORD.search(" ".join(row["type"])) or TYPE_WORD.search(row["first_line"])
+    amount = None
+    for text in row["amount"]:
+        amount = parse_amount(text)
+        if amount:
+            break
+
+    entity = extract_entity(description)
+    return {
+        "Date": row["date"],
+        "Description": description,
+        "Type": type_match.group(1).upper() if type_match else "UNKNOWN",
+        "Amount": amount,
+        "Category": detect_category(description, entity),
+        "Confidence": round(min(row["confs"]), 1) if row["confs"] else None,
+    }
+
+
+def parse_words(words, bounds=None):
+    """
+    Parses the words of one page. Returns (transactions, bounds); bounds is
+    None when neither this page nor the caller provided a header.
+    """
+    lines = group_lines(words)
+    transactions = []
+    row = None
+
+    for line in lines:
+        lefts = find_columns(line)
+        if lefts:
+            heights = sorted(w["height"] for w in line)
+            bounds = column_bounds(lefts, heights[len(heights) // 2])
+            continue
+        if bounds is None:
+            continue
+
+        cells = assign_cells(line, bounds)
+        date_text = _cell_text(cells.get("date", []))
+        date_match = DATE_START.search(date_text)
+        if date_match:
+            if row:
+                transactions.append(_finish(row))
+            row = {"date": date_match.group(0), "details": [], "type": [], "amount": [],
+                   "first_line": _cell_text(line), "confs": []}
+        if row is None:
+            continue
+
+        for column in ("details", "type", "amount"):
+            text = _cell_text(cells.get(column, []))
+            if text:
+                row[column].append(text)
+        row["confs"] += [w["conf"] for column in ("type", "amount")
+                         for w in cells.get(column, []) if w["conf"] >= 0]
+
+    if row:
+        transactions.append(_finish(row))
+    return transactions, bounds
+
+
+def parse_pages(pages):
+    """
+    Parses page records carrying "words". Returns the transactions, or None
+    when no table header was found (use the text parser then).
+    """
+    transactions = []
+    bounds = None
+    found_header = False
+    for page in pages:
+        words = page.get("words")
+        if not words:
+            continue
+        page_transactions, bounds = parse_words(words, bounds)
+        found_header = found_header or bounds is not None
+        transactions.extend(page_transactions)
+    if not found_header or not transactions:
+        return None
+    return transactions
@@ -1,14 +1,37 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Request, Query
 from fastapi.responses import JSONResponse, RedirectResponse
-import re
+from starlette.concurrency import run_in_threadpool
 import shutil
 import os
 import uuid
 import sys
+import asyncio
+from contextlib import asynccontextmanager
 import pytesseract
-import bank_statement1_ocr
 import bank_statement2_ocr
-from typing import List
+import admission
+import cpu_budget
+import deadline
+import ingest_guard
+import image_batch
+import image_pipeline
+import format_probe
+import hashlib
+import idempotency
+import job_store
+import health
+import processing_tiers
+import page_selection
+import raster_budget
+import rate_limit
+import refine
+import ocr_engine
+import ocr_store
+import statement_profiles
+import worker_recycle
+from statement_router import detect_date_format, parse_pages
+from datetime import date
+from typing import List, Optional
 
 # Setup Tesseract Path for Docker/Linux environments
 def setup_tesseract():
@@ -34,37 +57,61 @@ def setup_tesseract():
 
 setup_tesseract()
 
-def detect_date_format(text: str) -> str:
+async def apply_cpu_budget():
     """
-    Heuristic to detect date format in text.
-    Returns 'MM/DD/YYYY' or 'DD/MM/YYYY'.
-    Defaults to 'DD/MM/YYYY' if ambiguous or not found.
+    Splits the cores between concurrent OCR calls; CPU_AUTOTUNE=1 measures
+    the best split first and sizes the admission slots to match.
     """
-    # Look for numeric dates like XX/YY/ZZZZ
-    matches = re.findall(r'(\d{1,2})/(\d{1,2})/(\d{4})', text)
-    
-    for m in matches:
-        val1, val2, year = map(int, m)
-        
-        # If val1 > 12, it must be Day => DD/MM/YYYY
-        if val1 > 12:
-            return 'DD/MM/YYYY'
-        # If val2 > 12, it must be Day => MM/DD/YYYY
-        if val2 > 12:
-            return 'MM/DD/YYYY'
-            
-    # Fallback to checking Month names if numeric not found
-    if re.search(r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},\s+\d{4}', text):
-        return 'MM/DD/YYYY' # bank_statement1_ocr style
-        
-    return 'DD/MM/YYYY' # Default to 2
+    best = None
+    if cpu_budget.CPU_AUTOTUNE:
+        # Under gunicorn the master has measured once for all workers
+        best = cpu_budget.last_autotune()
+        if best is None:
+            try:
+                best = await run_in_threadpool(cpu_budget.autotune)
+            except Exception as e:
+                print(f"⚠️ CPU autotune failed, keeping defaults: {e}")
+    if best:
+        admission.controller.set_concurrency(best["concurrency"])
+    cpu_budget.configure(admission.controller.max_concurrent)
 
-app = FastAPI(title="Bank Statement OCR API")
+async def warm_self_test():
+    """
+    Runs the OCR self-test once so the first readiness probe has a result.
+    """
+    await run_in_threadpool(health.self_test)
+
+@asynccontextmanager
+async def lifespan(app):
+    await apply_cpu_budget()
+    await warm_self_test()
+    yield
+
+app = FastAPI(title="Bank Statement OCR API", lifespan=lifespan)
+# Cuts off bodies past MAX_UPLOAD_BYTES while they arrive, with or without Content-Length
+app.add_middleware(ingest_guard.UploadSizeLimit)
 
 @app.get("/", include_in_schema=False)
 async def root():
     return RedirectResponse(url="/docs")
 
+@app.get("/healthz")
+async def healthz():
+    """
+    Liveness: the process is up. Does not touch Tesseract.
+    """
+    return health.liveness()
+
+@app.get("/readyz")
+async def readyz():
+    """
+    Readiness: Tesseract / poppler self-test (cached), worker pool, OCR store
+    and saturation. 503 when this instance should not get new requests.
+    """
+    ready, report = await run_in_threadpool(health.readiness)
+    headers = {"Retry-After": str(report["load"]["retry_after_s"])} if not ready else None
+    return JSONResponse(status_code=200 if ready else 503, content=report, headers=headers)
+
 
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -221,70 +268,541 @@ def format_transactions_text(transactions: List[dict]) -> str:
 
     return "\n".join(output)
 
+def build_response(pages: List[dict], filename: str, date_from: Optional[date] = None,
+                   date_to: Optional[date] = None, date_format: Optional[str] = None) -> dict:
+    """
+    Routes the OCR'd pages to the right parser and builds the API response.
+    A known date_format (from the first-page probe) skips format detection.
+    """
+    date_format, transactions = parse_pages(pages, date_format)
+    transactions = page_selection.filter_transactions_by_date(transactions, date_from, date_to, date_format)
+
+    # Format output
+    formatted_text = format_transactions_text(transactions)
+
+    return {
+        "status": "success",
+        "filename": filename,
+        "detected_format": date_format,
+        "transaction_count": len(transactions),
+        "formatted_output": formatted_text,
+        "data": transactions  # Structured data is also returned
+    }
+
+def process_statement(file_path: str, filename: str, first_page: Optional[int] = None,
+                      last_page: Optional[int] = None, date_from: Optional[date] = None,
+                      date_to: Optional[date] = None, document_id: Optional[str] = None,
+                      profile: Optional[str] = None, layout: bool = False,
+                      tier: Optional[str] = None) -> dict:
+    """
+    OCRs a saved PDF, stores the page texts and builds the API response.
+    Only pages first_page..last_page are rasterized; a date range narrows them
+    further using a cheap per-page date probe. profile picks the Tesseract
+    tuning from statement_profiles; layout parses by column from word boxes.
+    Without an explicit profile, a probe of the top of page 1 picks the
+    profile and the parser before the full OCR. tier selects the
+    speed / accuracy bundle (processing_tiers).
+    """
+    probe = {"profile": None, "date_format": None, "source": None}
+    if profile is None and format_probe.FORMAT_PROBE:
+        probe = format_probe.probe_statement(file_path)
+        profile = probe["profile"]
+
+    if date_from or date_to:
+        page_range = page_selection.pages_for_date_range(
+            file_path, first_page or 1, last_page, date_from, date_to,
+            date_format=probe["date_format"] or 'DD/MM/YYYY'
+        )
+        if page_range is None:
+            raise HTTPException(status_code=422, detail="No pages match the requested date range.")
+        first_page, last_page = page_range
+        print(f"DEBUG: Date range mapped to pages {first_page}-{last_page}")
+
+    options = processing_tiers.ocr_options(tier)
+    options["layout"] = layout or options["layout"]
+    base_config = statement_profiles.get_config(profile) if profile else bank_statement2_ocr.CUSTOM_CONFIG
+    config = processing_tiers.tier_config(tier, base_config)
+
+    # Use bank_statement2_ocr's extraction as a baseline or choose one
+    pages = bank_statement2_ocr.ocr_pdf_pages(file_path, first_page=first_page, last_page=last_page,
+                                              profile=profile, config=config, **options)
+    extracted_text = "".join(p["text"] for p in pages)
+
+    if not extracted_text:
+        # Nothing finished before the deadline: report that rather than bad input
+        deadline.check()
+        raise HTTPException(status_code=422, detail="Could not extract text from the file.")
+
+    # DEBUG: Save extracted text to file to analyze OCR quality
+    with open("debug_extracted_text.txt", "w", encoding="utf-8") as f:
+        f.write(extracted_text)
+
+    # Keep the raw OCR so parser improvements can be applied without re-OCR
+    document_id = document_id or str(uuid.uuid4())
+    ocr_store.save_document(document_id, pages, filename=filename, profile=profile,
+                            date_format=probe["date_format"], tier=tier or processing_tiers.DEFAULT_TIER)
+
+    response = build_response(pages, filename, date_from, date_to, probe["date_format"])
+    response["document_id"] = document_id
+    response["probe"] = probe
+    response["pages"] = [first_page, last_page]
+    response["profile"] = profile or statement_profiles.DEFAULT_PROFILE
+    response["tier"] = tier or processing_tiers.DEFAULT_TIER
+    response["page_info"] = [{k: v for k, v in p.items() if k not in ("text", "words")} for p in pages]
+    response["deadline"] = deadline_info(pages)
+    return response
+
+def process_image_upload(data: bytes, filename: str, date_from: Optional[date] = None,
+                         date_to: Optional[date] = None, document_id: Optional[str] = None,
+                         profile: Optional[str] = None, layout: bool = False,
+                         tier: Optional[str] = None) -> dict:
+    """
+    OCRs an uploaded screenshot in memory (nothing is written to disk) and
+    builds the same response as for a one page PDF.
+    """
+    base_config = statement_profiles.get_config(profile) if profile else bank_statement2_ocr.CUSTOM_CONFIG
+    config = processing_tiers.tier_config(tier, base_config)
+    layout = layout or processing_tiers.get_tier(tier)["layout"]
+    try:
+        page = image_pipeline.ocr_image_bytes(data, config, layout=layout)
+    except image_pipeline.InvalidImage as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not page["text"].strip():
+        raise HTTPException(status_code=422, detail="Could not extract text from the file.")
+
+    document_id = document_id or str(uuid.uuid4())
+    ocr_store.save_document(document_id, [page], filename=filename, profile=profile, source="image")
+
+    response = build_response([page], filename, date_from, date_to)
+    response["document_id"] = document_id
+    response["profile"] = profile or statement_profiles.DEFAULT_PROFILE
+    response["page_info"] = [{k: v for k, v in page.items() if k not in ("text", "words")}]
+    return response
+
+def process_image_batch(images: List[bytes], filenames: List[str], date_from: Optional[date] = None,
+                        date_to: Optional[date] = None, profile: Optional[str] = None,
+                        layout: bool = False, tier: Optional[str] = None) -> dict:
+    """
+    OCRs a batch of screenshots in one Tesseract call (image_batch) and
+    parses them together.
+    """
+    base_config = statement_profiles.get_config(profile) if profile else bank_statement2_ocr.CUSTOM_CONFIG
+    config = processing_tiers.tier_config(tier, base_config)
+    layout = layout or processing_tiers.get_tier(tier)["layout"]
+    pages = image_batch.ocr_image_batch(images, config, layout=layout)
+    if not "".join(p["text"] for p in pages).strip():
+        raise HTTPException(status_code=422, detail="Could not extract text from the files.")
+
+    document_id = str(uuid.uuid4())
+    ocr_store.save_document(document_id, pages, filename=", ".join(filenames), profile=profile,
+                            source="image_batch")
+
+    response = build_response(pages, ", ".join(filenames), date_from, date_to)
+    response["document_id"] = document_id
+    response["images"] = [
+        {"filename": name, **{k: v for k, v in p.items() if k not in ("text", "words")}}
+        for name, p in zip(filenames, pages)
+    ]
+    return response
+
+async def run_async_job(job_id: str, file_path: str, filename: str, **options):
+    """
+    Background task body for statements sent to the asynchronous lane.
+    Waits for an OCR slot like any request, but is never rejected.
+    """
+    try:
+        pages = options["last_page"] - options["first_page"] + 1
+        async with admission.controller.admit(reject=False, pages=pages):
+            await run_in_threadpool(job_store.update_job, job_id, status="processing")
+            result = await run_in_threadpool(process_statement, file_path, filename, **options)
+        await run_in_threadpool(job_store.update_job, job_id, status="done", result=result)
+    except HTTPException as e:
+        await run_in_threadpool(job_store.update_job, job_id, status="failed", error=e.detail)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        await run_in_threadpool(job_store.update_job, job_id, status="failed", error=str(e))
+
+def overloaded(e: admission.Overloaded) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+def reject_if_overloaded():
+    """
+    Fast 503 before an upload is read when not even the queue has room.
+    """
+    try:
+        admission.controller.check()
+    except admission.Overloaded as e:
+        raise overloaded(e)
+
+async def run_admitted(request: Request, work_deadline: deadline.Deadline, func, *args,
+                       job_pages: int = 1, abandoned=None, **kwargs) -> dict:
+    """
+    Runs blocking OCR work in the threadpool once the admission controller
+    grants a slot (smaller job_pages go first), under the request's deadline. A client disconnect cancels
+    the deadline, which stops the remaining pages and kills Tesseract.
+    Adds the time spent waiting in the queue to the response.
+    """
+    def call():
+        with deadline.activate(work_deadline):
+            return func(*args, **kwargs)
+
+    tenant = charge_pages(request, job_pages)
+    try:
+        async with admission.controller.admit(timeout=work_deadline.remaining(), pages=job_pages) as waited:
+            task = asyncio.ensure_future(run_in_threadpool(call))
+            while not task.done():
+                await asyncio.wait({task}, timeout=deadline.POLL_INTERVAL * 2)
+                if not task.done() and await (abandoned or request.is_disconnected)():
+                    print("DEBUG: Client disconnected, cancelling OCR")
+                    work_deadline.cancel("client disconnected")
+            response = task.result()
+    except admission.Overloaded as e:
+        # Nothing was OCR'd: the pages do not count against the client
+        rate_limit.limiter.refund(tenant, job_pages)
+        raise overloaded(e)
+    except deadline.DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"Request stopped: {e}.")
+    response["queue_wait_ms"] = round(waited * 1000, 1)
+    return response
+
+def client_tenant(request: Request):
+    """
+    (tenant, limits) of the caller: configured API key, else client IP.
+    """
+    return rate_limit.limiter.identify(request.headers.get(rate_limit.API_KEY_HEADER),
+                                       request.client.host if request.client else None)
+
+async def run_once(request: Request, content_digest: str, options: dict, work_deadline: deadline.Deadline,
+                   func, *args, **kwargs) -> dict:
+    """
+    run_admitted, coalesced with identical requests of the same client: the
+    same Idempotency-Key, or the same upload (content_digest) and options.
+    Attached requests share one OCR run; retries within IDEMPOTENCY_TTL get
+    the stored response, unless it was partial (cut by the deadline).
+    """
+    request_fingerprint = idempotency.fingerprint(content_digest, options)
+    key = idempotency.request_key(client_tenant(request)[0], request.headers.get(idempotency.HEADER),
+                                  request_fingerprint)
+
+    async def compute(abandoned):
+        return await run_admitted(request, work_deadline, func, *args, abandoned=abandoned, **kwargs)
+
+    try:
+        response, outcome = await idempotency.coalescer.run(key, request_fingerprint, compute, client=request,
+                                                            cacheable=complete_response)
+    except idempotency.KeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if outcome != "computed":
+        print(f"DEBUG: Request {outcome} ({key.split(':')[0]} key)")
+        request.state.idempotency = {"Idempotency-Replayed": "true", "X-Coalesced": outcome}
+        response = dict(response)
+    return response
+
+def complete_response(response: dict) -> bool:
+    """
+    Whether a response may be replayed: not cut short by its deadline.
+    """
+    return not (response.get("deadline") or {}).get("partial")
+
+def charge_pages(request: Request, pages: int) -> str:
+    """
+    Takes pages from the client's rate limit bucket (pages=0 only checks it
+    is not exhausted). 429 with Retry-After when the budget is spent.
+    Returns the tenant key for refunds.
+    """
+    tenant, limits = client_tenant(request)
+    decision = rate_limit.limiter.consume(tenant, limits, pages)
+    request.state.rate_limit = rate_limit.headers(decision)
+    if not decision["allowed"]:
+        raise HTTPException(status_code=429, detail=f"Page rate limit exceeded, retry in "
+                            f"{decision['retry_after']}s.", headers=request.state.rate_limit)
+    return tenant
+
+def request_deadline(timeout: Optional[float], partial: bool) -> deadline.Deadline:
+    """
+    Deadline for one request: the timeout query parameter or REQUEST_TIMEOUT.
+    """
+    return deadline.Deadline(timeout or deadline.REQUEST_TIMEOUT, partial=partial)
+
+def deadline_info(pages: List[dict]) -> dict:
+    """
+    Budget summary for a response; partial when pages were cut by the deadline.
+    """
+    active = deadline.current()
+    skipped = [p["page"] for p in pages if p.get("skipped") == "deadline"]
+    return {
+        "budget_s": active.seconds if active else None,
+        "elapsed_s": round(active.elapsed(), 2) if active else None,
+        "partial": bool(skipped),
+        "pages_not_processed": skipped,
+    }
+
+def check_profile_and_tier(profile: Optional[str], tier: Optional[str]):
+    """
+    400 for unknown profile / tier names.
+    """
+    if profile and profile not in statement_profiles.PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown profile '{profile}'. "
+                            f"Available: {', '.join(statement_profiles.PROFILES)}")
+    if tier and tier not in processing_tiers.TIERS:
+        raise HTTPException(status_code=400, detail=f"Unknown tier '{tier}'. "
+                            f"Available: {', '.join(processing_tiers.TIERS)}")
+
+@app.get("/admission")
+async def admission_stats():
+    """
+    OCR concurrency, queue depth, queue wait times, the CPU thread budget,
+    raster memory in flight, rate limiting, the Tesseract image handoff
+    timings and the weak-word refinement cost (this process only; worker
+    processes keep their own counters).
+    """
+    return dict(admission.controller.stats(), cpu=cpu_budget.stats(), raster_memory=raster_budget.budget.stats(),
+                rate_limit=rate_limit.limiter.stats(), coalescing=idempotency.coalescer.stats(),
+                worker=worker_recycle.stats(), handoff=ocr_engine.get_handoff_stats(),
+                refine=refine.get_refine_stats())
+
+@app.get("/tiers")
+async def list_tiers():
+    """
+    Processing tiers with rough latency estimates and what they trade off.
+    """
+    return {"default": processing_tiers.DEFAULT_TIER, "tiers": processing_tiers.describe_tiers()}
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """
+    Rejects uploads from their Content-Length header, before the body is read.
+    Bodies without one are cut off while they arrive (ingest_guard.UploadSizeLimit).
+    """
+    length = request.headers.get("content-length")
+    if request.method == "POST" and length and length.isdigit() \
+            and int(length) > ingest_guard.MAX_UPLOAD_BYTES + ingest_guard.ENVELOPE_BYTES:
+        return JSONResponse(status_code=413, content={"detail": "Upload too large."})
+    response = await call_next(request)
+    # Rate limit and replay headers of the request (see charge_pages, run_once)
+    for name, value in {**getattr(request.state, "rate_limit", {}),
+                        **getattr(request.state, "idempotency", {})}.items():
+        response.headers.setdefault(name, value)
+    # Under gunicorn, a worker that grew too large is replaced after this request
+    worker_recycle.check()
+    return response
+
 @app.post("/extract-transactions")
-async def extract_transactions(file: UploadFile = File(...)):
+async def extract_transactions(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    first_page: Optional[int] = Query(None, ge=1, description="First page to process (1-based)"),
+    last_page: Optional[int] = Query(None, ge=1, description="Last page to process (inclusive)"),
+    date_from: Optional[str] = Query(None, description="Only transactions on/after this date (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Only transactions on/before this date (YYYY-MM-DD)"),
+    profile: Optional[str] = Query(None, description="Tesseract profile: generic, phonepe or paytm"),
+    layout: bool = Query(False, description="Parse columns from word boxes instead of flattened text"),
+    tier: Optional[str] = Query(None, description="Processing tier: fast, balanced (default) or accurate"),
+    timeout: Optional[float] = Query(None, gt=0, description="Time budget in seconds for OCR and parsing"),
+    partial: bool = Query(False, description="Return the pages finished when the time budget runs out"),
+):
     """
-    Upload a bank statement (PDF or Image) and get parsed transactions.
+    Upload a bank statement (PDF) or an app screenshot (PNG/JPG) and get parsed transactions.
+    Large statements are accepted with 202 and processed in the background (see /jobs/{job_id}).
+    Page and date ranges limit OCR to the pages that are actually needed.
     """
     try:
+        if first_page and last_page and last_page < first_page:
+            raise HTTPException(status_code=400, detail="last_page must not be before first_page.")
+        try:
+            range_from = page_selection.parse_iso_date(date_from)
+            range_to = page_selection.parse_iso_date(date_to)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Dates must use the YYYY-MM-DD format.")
+        check_profile_and_tier(profile, tier)
+        charge_pages(request, 0)
+        reject_if_overloaded()
+        work_deadline = request_deadline(timeout, partial)
+
+        # Options that change the result, for request coalescing
+        request_options = {"first_page": first_page, "last_page": last_page, "date_from": range_from,
+                           "date_to": range_to, "profile": profile, "layout": layout, "tier": tier,
+                           "partial": partial}
+
         # Generate a unique filename to avoid collisions
         file_ext = os.path.splitext(file.filename)[1].lower()
-        unique_filename = f"{uuid.uuid4()}{file_ext}"
+
+        document_id = str(uuid.uuid4())
+
+        if file_ext in image_pipeline.IMAGE_EXTENSIONS:
+            # Screenshots are small: read into memory under the same cap, no file saved
+            data = await run_in_threadpool(file.file.read, ingest_guard.MAX_UPLOAD_BYTES + 1)
+            if len(data) > ingest_guard.MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail="Upload too large.")
+            return await run_once(request, hashlib.sha256(data).hexdigest(), dict(request_options, kind="image"),
+                                  work_deadline, process_image_upload, data, file.filename, range_from, range_to,
+                                  document_id=document_id, profile=profile, layout=layout, tier=tier)
+
+        if file_ext not in ['.pdf']:
+            raise HTTPException(status_code=400, detail="Only PDF files and images (PNG, JPG, WEBP, BMP) are supported.")
+
+        unique_filename = f"{document_id}{file_ext}"
         file_path = os.path.join(UPLOAD_DIR, unique_filename)
-        
-        # Save the uploaded file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        # Determine processing method based on extension
-        extracted_text = ""
-        
-        if file_ext in ['.pdf']:
-            # Use bank_statement2_ocr's extraction as a baseline or choose one
-            extracted_text = bank_statement2_ocr.extract_text_from_pdf(file_path)
-        else:
-            # User requested to remove value of image parsing
-            # Only allow PDF
+
+        # Save the uploaded file under the size cap
+        try:
+            upload_digest = hashlib.sha256()
+            await run_in_threadpool(ingest_guard.save_upload_capped, file.file, file_path, digest=upload_digest)
+        except ingest_guard.UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+
+        # Page count and sizes are known before anything is rasterized
+        try:
+            pdf_info = await run_in_threadpool(ingest_guard.inspect_pdf, file_path, first_page=first_page or 1)
+        except ingest_guard.InvalidPDF as e:
             os.remove(file_path)
-            raise HTTPException(status_code=400, detail="Only PDF files are supported. Image processing is disabled.")
+            raise HTTPException(status_code=400, detail=str(e))
 
-        if not extracted_text:
-            raise HTTPException(status_code=422, detail="Could not extract text from the file.")
-            
-        # DEBUG: Save extracted text to file to analyze OCR quality
-        with open("debug_extracted_text.txt", "w", encoding="utf-8") as f:
-            f.write(extracted_text)
+        decision, reason = ingest_guard.check_pdf_limits(pdf_info, first_page, last_page)
+        if decision in (ingest_guard.REJECT, ingest_guard.INVALID):
+            os.remove(file_path)
+            raise HTTPException(status_code=413 if decision == ingest_guard.REJECT else 400, detail=reason)
 
-        # Detect date format and route
-        date_format = detect_date_format(extracted_text)
-        print(f"DEBUG: Detected date format: {date_format}")
-        
-        if date_format == 'MM/DD/YYYY':
-            print("Routing to bank_statement1_ocr (PhonePe/Standard style)")
-            transactions = bank_statement1_ocr.parse_transactions(extracted_text)
-        else:
-            print("Routing to bank_statement2_ocr (Paytm/Custom style)")
-            transactions = bank_statement2_ocr.parse_transactions(extracted_text)
-        
-        # Format output
-        formatted_text = format_transactions_text(transactions)
-        
-        return {
-            "status": "success",
-            "filename": file.filename,
-            "detected_format": date_format,
-            "transaction_count": len(transactions),
-            "formatted_output": formatted_text,
-            "data": transactions  # Structured data is also returned
+        options = {
+            "first_page": first_page or 1,
+            "last_page": min(last_page or pdf_info["pages"], pdf_info["pages"]),
+            "date_from": range_from,
+            "date_to": range_to,
+            "document_id": document_id,
+            "profile": profile,
+            "layout": layout,
+            "tier": tier,
         }
 
+        if decision == ingest_guard.ASYNC:
+            try:
+                charge_pages(request, options["last_page"] - options["first_page"] + 1)
+            except HTTPException:
+                os.remove(file_path)
+                raise
+            job_id = str(uuid.uuid4())
+            await run_in_threadpool(job_store.create_job, job_id, filename=file.filename, pages=pdf_info["pages"])
+            background_tasks.add_task(run_async_job, job_id, file_path, file.filename, **options)
+            return JSONResponse(status_code=202, content={
+                "status": "queued",
+                "job_id": job_id,
+                "status_url": f"/jobs/{job_id}",
+                "pages": pdf_info["pages"],
+                "detail": reason,
+            })
+
+        response = await run_once(request, upload_digest.hexdigest(), dict(request_options, kind="pdf"),
+                                  work_deadline, process_statement, file_path, file.filename,
+                                  job_pages=options["last_page"] - options["first_page"] + 1, **options)
+        if response.get("document_id") != document_id:
+            # Served from another request's OCR run: this copy is not needed
+            os.remove(file_path)
+        return response
+
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/extract-transactions/batch")
+async def extract_transactions_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    date_from: Optional[str] = Query(None, description="Only transactions on/after this date (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Only transactions on/before this date (YYYY-MM-DD)"),
+    profile: Optional[str] = Query(None, description="Tesseract profile: generic, phonepe or paytm"),
+    layout: bool = Query(False, description="Parse columns from word boxes instead of flattened text"),
+    tier: Optional[str] = Query(None, description="Processing tier: fast, balanced (default) or accurate"),
+    timeout: Optional[float] = Query(None, gt=0, description="Time budget in seconds for OCR and parsing"),
+    partial: bool = Query(False, description="Return the pages finished when the time budget runs out"),
+):
+    """
+    Upload many transaction screenshots at once. They are tiled onto one
+    canvas and OCR'd in a single Tesseract call, then parsed together.
+    """
+    try:
+        range_from = page_selection.parse_iso_date(date_from)
+        range_to = page_selection.parse_iso_date(date_to)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must use the YYYY-MM-DD format.")
+    check_profile_and_tier(profile, tier)
+    charge_pages(request, 0)
+    reject_if_overloaded()
+    work_deadline = request_deadline(timeout, partial)
+    if len(files) > image_batch.MAX_BATCH_IMAGES:
+        raise HTTPException(status_code=413, detail=f"At most {image_batch.MAX_BATCH_IMAGES} images per batch.")
+
+    images = []
+    total = 0
+    for upload in files:
+        if os.path.splitext(upload.filename)[1].lower() not in image_pipeline.IMAGE_EXTENSIONS:
+            raise HTTPException(status_code=400, detail=f"{upload.filename}: only images are supported in a batch.")
+        data = await run_in_threadpool(upload.file.read, ingest_guard.MAX_UPLOAD_BYTES - total + 1)
+        total += len(data)
+        if total > ingest_guard.MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="Upload too large.")
+        images.append(data)
+
+    try:
+        filenames = [upload.filename for upload in files]
+        batch_digest = hashlib.sha256()
+        for data in images:
+            batch_digest.update(hashlib.sha256(data).digest())
+        batch_options = {"kind": "batch", "date_from": range_from, "date_to": range_to, "profile": profile,
+                         "layout": layout, "tier": tier, "partial": partial}
+        return await run_once(request, batch_digest.hexdigest(), batch_options,
+                              work_deadline, process_image_batch, images, filenames, range_from, range_to,
+                              job_pages=len(images), profile=profile, layout=layout, tier=tier)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/documents/{document_id}/reparse")
+async def reparse_document(
+    document_id: str,
+    date_from: Optional[str] = Query(None, description="Only transactions on/after this date (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Only transactions on/before this date (YYYY-MM-DD)"),
+):
+    """
+    Runs the current parser over the stored OCR text of an earlier upload (no re-OCR).
+    """
+    try:
+        range_from = page_selection.parse_iso_date(date_from)
+        range_to = page_selection.parse_iso_date(date_to)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must use the YYYY-MM-DD format.")
+
+    document = ocr_store.load_document(document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Unknown document id.")
+
+    response = build_response(document.get("pages", []), document.get("filename"), range_from, range_to,
+                              document.get("date_format"))
+    response["document_id"] = document_id
+    return response
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status (and result once done) of a statement in the asynchronous lane.
+    """
+    job = await run_in_threadpool(job_store.load_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id.")
+    return {"job_id": job_id, **job}
+
 if __name__ == "__main__":
     import uvicorn
     print("🚀 Starting Bank OCR API Server...")
     print("📝 Documentation available at: http://127.0.0.1:8000/docs")
+    print("ℹ️ Development server; in production run: gunicorn -c gunicorn_conf.py main:app")
     uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+Image handoff to the Tesseract binary.
+
+pytesseract saves every NumPy/PIL image as a compressed PNG in the temp
+directory and Tesseract decodes it again straight away. For a 300 DPI page
+that encode/decode round trip is pure overhead, so this module hands the
+raster over as uncompressed PNM (PGM for grayscale, PPM for colour) instead:
+
+- "pipe":        PNM bytes are written to Tesseract's stdin (no file at all)
+- "tmpfs":       PNM file in /dev/shm (RAM backed), removed after the call
+- "pytesseract": the old PNG path, kept for comparison / fallback
+
+The mode is chosen with the OCR_HANDOFF environment variable (default "pipe").
+Timing counters per mode are kept in HANDOFF_STATS so the saving per page can
+be read from get_handoff_stats() (served under "handoff" by GET /admission).
+
+Under an active request deadline (deadline.py) the Tesseract process is
+killed as soon as the budget is spent or the request is cancelled.
+"""
+
+import os
+import shlex
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy as np
+import pytesseract
+from pytesseract import TesseractError, TesseractNotFoundError
+
+import cpu_budget
+import deadline
+
+HANDOFF_MODES = ("pipe", "tmpfs", "pytesseract")
+
+OCR_HANDOFF = os.environ.get("OCR_HANDOFF", "pipe")
+if OCR_HANDOFF not in HANDOFF_MODES:
+    print(f"WARNING: Unknown OCR_HANDOFF '{OCR_HANDOFF}', using 'pipe'")
+    OCR_HANDOFF = "pipe"
+
+# RAM backed directory for the "tmpfs" mode (falls back to the normal temp dir)
+TMPFS_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+# Per mode: pages handled, seconds spent encoding and seconds spent in total
+HANDOFF_STATS = {mode: {"pages": 0, "encode_seconds": 0.0, "total_seconds": 0.0} for mode in HANDOFF_MODES}
+_stats_lock = threading.Lock()
+
+
+def to_pnm_bytes(image):
+    """
+    Serializes an image as binary PNM without any compression.
+    2D arrays become PGM (P5), 3 channel arrays PPM (P6).
+    """
+    if not isinstance(image, np.ndarray):
+        # PIL image
+        if image.mode not in ("L", "RGB"):
+            image = image.convert("RGB")
+        image = np.asarray(image)
+
+    if image.dtype != np.uint8:
+        image = np.clip(image, 0, 255).astype(np.uint8)
+
+    if image.ndim == 2:
+        magic = b"P5"
+    elif image.ndim == 3 and image.shape[2] == 3:
+        magic = b"P6"
+    elif image.ndim == 3 and image.shape[2] == 1:
+        magic = b"P5"
+        image = image[:, :, 0]
+    else:
+        raise ValueError(f"Unsupported image shape for PNM handoff: {image.shape}")
+
+    height, width = image.shape[:2]
+    header = b"%s\n%d %d\n255\n" % (magic, width, height)
+    return header + np.ascontiguousarray(image).tobytes()
+
+
+def _build_command(input_name, config, lang, extension=None):
+    cmd = [pytesseract.pytesseract.tesseract_cmd, input_name, "stdout"]
+    if lang:
+        cmd += ["-l", lang]
+    if config:
+        cmd += shlex.split(config)
+    if extension:
+        cmd.append(extension)
+    return cmd
+
+
+def _run(cmd, stdin_bytes=None, timeout=None):
+    active = deadline.current()
+    # OpenMP threads of this Tesseract process come out of the shared CPU budget
+    with cpu_budget.ocr_call() as env:
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE if stdin_bytes is not None else None,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=env,
+            )
+        except FileNotFoundError:
+            raise TesseractNotFoundError()
+
+        limit = time.monotonic() + timeout if timeout is not None else None
+        pending_input = stdin_bytes
+        while True:
+            # Wake up regularly under a deadline to notice cancellation
+            wait = deadline.POLL_INTERVAL if active is not None else None
+            if limit is not None:
+                left = max(0.0, limit - time.monotonic())
+                wait = left if wait is None else min(wait, left)
+            try:
+                stdout, stderr = proc.communicate(input=pending_input, timeout=wait)
+                break
+            except subprocess.TimeoutExpired:
+                # Input was handed over on the first call
+                pending_input = None
+                if active is not None and active.expired():
+                    proc.kill()
+                    proc.communicate()
+                    active.check()
+                if limit is not None and time.monotonic() >= limit:
+                    proc.kill()
+                    proc.communicate()
+                    raise
+
+        if proc.returncode:
+            message = stderr.decode("utf-8", errors="replace").strip()
+            raise TesseractError(proc.returncode, message)
+        return stdout.decode("utf-8", errors="replace")
+
+
+def _record(mode, encode_seconds, total_seconds):
+    with _stats_lock:
+        stats = HANDOFF_STATS[mode]
+        stats["pages"] += 1
+        stats["encode_seconds"] += encode_seconds
+        stats["total_seconds"] += total_seconds
+
+
+def run_tesseract(image, config="", lang="eng", extension=None, mode=None, timeout=None):
+    """
+    Runs Tesseract on an in-memory image and returns its stdout as text.
+    `extension` selects an output config such as "tsv".
+    """
+    mode = mode or OCR_HANDOFF
+    deadline.check()
+    timeout = deadline.call_timeout(timeout)
+    start = time.perf_counter()
+
+    if mode == "pytesseract":
+        try:
+            if extension == "tsv":
+                text = pytesseract.image_to_data(image, lang=lang, config=config, timeout=timeout or 0)
+            else:
+                text = pytesseract.image_to_string(image, lang=lang, config=config, timeout=timeout or 0)
+        except RuntimeError:
+            # pytesseract's timeout error: report it as the deadline when that is why
+            deadline.check()
+            raise
+        # pytesseract hides its PNG encode inside the call
+        _record(mode, 0.0, time.perf_counter() - start)
+        return text
+
+    pnm = to_pnm_bytes(image)
+    encoded = time.perf_counter()
+
+    if mode == "pipe":
+        text = _run(_build_command("stdin", config, lang, extension), stdin_bytes=pnm, timeout=timeout)
+    else:
+        path = os.path.join(TMPFS_DIR, f"ocr_{uuid.uuid4().hex}.pnm")
+        try:
+            with open(path, "wb") as f:
+                f.write(pnm)
+            encoded = time.perf_counter()
+            text = _run(_build_command(path, config, lang, extension), timeout=timeout)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    _record(mode, encoded - start, time.perf_counter() - start)
+    return text
+
+
+def image_to_string(image, config="", lang="eng", mode=None, timeout=None):
+    """
+    Drop-in replacement for pytesseract.image_to_string using the raw handoff.
+    """
+    return run_tesseract(image, config=config, lang=lang, mode=mode, timeout=timeout)
+
+
+def get_handoff_stats():
+    """
+    Returns the timing counters with per page averages in milliseconds.
+    """
+    with _stats_lock:
+        report = {}
+        for mode, stats in HANDOFF_STATS.items():
+            pages = stats["pages"]
+            report[mode] = {
+                "pages": pages,
+                "avg_encode_ms": round(stats["encode_seconds"] * 1000 / pages, 2) if pages else 0.0,
+                "avg_total_ms": round(stats["total_seconds"] * 1000 / pages, 2) if pages else 0.0,
+            }
+    report["active_mode"] = OCR_HANDOFF
+    return report
+
+
+def reset_handoff_stats():
+    with _stats_lock:
+        for stats in HANDOFF_STATS.values():
+            stats["pages"] = 0
+            stats["encode_seconds"] = 0.0
+            stats["total_seconds"] = 0.0
+
+
+# ---------------------------------------------------------
+# Word level output (TSV)
+# ---------------------------------------------------------
+TSV_INT_FIELDS = ("level", "page_num", "block_num", "par_num", "line_num", "word_num",
+                  "left", "top", "width", "height")
+
+
+def parse_tsv(tsv_text):
+    """
+    Parses Tesseract TSV output into word dicts (empty boxes are dropped).
+    conf is a float, -1 for non-word rows.
+    """
+    lines = tsv_text.splitlines()
+    if not lines:
+        return []
+    header = lines[0].split("\t")
+    words = []
+    for line in lines[1:]:
+        cols = line.split("\t")
+        if len(cols) < len(header):
+            # Word text may be missing entirely
+            cols += [""] * (len(header) - len(cols))
+        row = dict(zip(header, cols))
+        text = row.get("text", "").strip()
+        if not text:
+            continue
+        word = {k: int(row[k]) for k in TSV_INT_FIELDS if k in row}
+        word["conf"] = float(row.get("conf", -1))
+        word["text"] = text
+        words.append(word)
+    return words
+
+
+def image_to_data(image, config="", lang="eng", mode=None, timeout=None):
+    """
+    Runs Tesseract once with TSV output and returns the recognized words
+    with their boxes and confidences.
+    """
+    return parse_tsv(run_tesseract(image, config=config, lang=lang, extension="tsv", mode=mode, timeout=timeout))
+
+
+def words_to_text(words):
+    """
+    Rebuilds plain text (one line per Tesseract line, blank line between blocks)
+    from word dicts, close to what image_to_string returns.
+    """
+    lines = []
+    current_key = None
+    current_block = None
+    for w in words:
+        key = (w.get("page_num", 1), w.get("block_num", 0), w.get("par_num", 0), w.get("line_num", 0))
+        if key != current_key:
+            block = key[:2]
+            if current_block is not None and block != current_block:
+                lines.append("")
+            lines.append(w["text"])
+            current_key = key
+            current_block = block
+        else:
+            lines[-1] += " " + w["text"]
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def mean_confidence(words):
+    """
+    Average word confidence (0-100), or 0.0 when nothing was recognized.
+    """
+    confs = [w["conf"] for w in words if w["conf"] >= 0]
+    return sum(confs) / len(confs) if confs else 0.0
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Compressed store of raw per-page OCR text.
+
+Every processed document keeps its OCR output under its document ID as
+gzip-compressed JSON, so parser or category rule changes can be re-applied
+with `POST /documents/{id}/reparse` or `python reparse_documents.py` instead
+of paying for OCR again.
+"""
+
+import gzip
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+OCR_STORE_DIR = os.environ.get("OCR_STORE_DIR", os.path.join("data", "ocr_store"))
+
+# Document IDs are UUIDs; anything else could escape the store directory
+DOCUMENT_ID_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$')
+
+
+def _document_path(document_id):
+    if not DOCUMENT_ID_RE.match(document_id or ""):
+        raise ValueError(f"Invalid document id: {document_id!r}")
+    return os.path.join(OCR_STORE_DIR, f"{document_id}.json.gz")
+
+
+def save_document(document_id, pages, first_page=1, filename=None, **metadata):
+    """
+    Stores the OCR text of each page. `pages` holds page records
+    ({"page": n, "text": ..., ...}) or plain texts numbered from first_page.
+    """
+    os.makedirs(OCR_STORE_DIR, exist_ok=True)
+    record = {
+        "document_id": document_id,
+        "filename": filename,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "pages": [
+            page if isinstance(page, dict) else {"page": first_page + i, "text": page}
+            for i, page in enumerate(pages)
+        ],
+        **metadata,
+    }
+
+    path = _document_path(document_id)
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False)
+    # Readers never see a half written file
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_document(document_id):
+    """
+    Returns the stored record, or None if the document is unknown.
+    """
+    try:
+        path = _document_path(document_id)
+    except ValueError:
+        return None
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def document_text(document):
+    """
+    Joins the page texts back into the text the parsers expect.
+    """
+    return "".join(page["text"] for page in document.get("pages", []))
+
+
+def list_documents():
+    if not os.path.isdir(OCR_STORE_DIR):
+        return []
+    return sorted(
+        name[: -len(".json.gz")]
+        for name in os.listdir(OCR_STORE_DIR)
+        if name.endswith(".json.gz")
+    )
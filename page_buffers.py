@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+Shared-memory page buffers for OCR worker processes.
+
+A 300 DPI page is 8-25 MB. Sending it to a worker through pickle copies it
+(twice, once per direction of the pipe). Instead the rasterizer writes each
+page once into a multiprocessing.shared_memory segment and only a tiny
+descriptor (segment name, shape, dtype) travels to the worker, which reads
+the page as a zero-copy NumPy view.
+
+Segments are reference counted by the PageBufferPool of the parent process
+and unlinked when the last reference goes away, or all at once when the
+pool is closed (e.g. on failure).
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import cpu_budget
+import deadline
+
+# Number of OCR worker processes (1 = OCR in the request thread, no pool)
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", "1"))
+
+
+class PageBuffer:
+    """
+    One page raster living in a shared memory segment.
+    """
+
+    def __init__(self, pool, shape, dtype):
+        self.pool = pool
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        nbytes = max(1, int(np.prod(self.shape)) * self.dtype.itemsize)
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+        self.refcount = 1
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def descriptor(self):
+        """
+        Small picklable handle for a worker process.
+        """
+        return (self.shm.name, self.shape, self.dtype.str)
+
+    def retain(self):
+        self.pool.retain(self)
+        return self
+
+    def release(self):
+        self.pool.release(self)
+
+
+class PageBufferPool:
+    """
+    Owns the shared memory segments of the parent process.
+    Use as a context manager so every segment is unlinked even on errors.
+    """
+
+    def __init__(self):
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def allocate(self, shape, dtype=np.uint8):
+        buf = PageBuffer(self, shape, dtype)
+        with self._lock:
+            self._buffers[buf.name] = buf
+        return buf
+
+    def put(self, array):
+        """
+        Copies an existing array into a new segment.
+        Prefer allocate() + writing into buf.array to avoid this copy.
+        """
+        buf = self.allocate(array.shape, array.dtype)
+        buf.array[...] = array
+        return buf
+
+    def retain(self, buf):
+        with self._lock:
+            buf.refcount += 1
+
+    def release(self, buf):
+        with self._lock:
+            buf.refcount -= 1
+            if buf.refcount > 0:
+                return
+            self._buffers.pop(buf.name, None)
+        _destroy(buf)
+
+    def live_segments(self):
+        with self._lock:
+            return len(self._buffers)
+
+    def close_all(self):
+        with self._lock:
+            buffers = list(self._buffers.values())
+            self._buffers.clear()
+        for buf in buffers:
+            _destroy(buf)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close_all()
+        return False
+
+
+def _destroy(buf):
+    # Drop the NumPy view first, otherwise close() fails with BufferError
+    buf.array = None
+    try:
+        buf.shm.close()
+        buf.shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+@contextmanager
+def attach(descriptor):
+    """
+    Worker side: maps the segment and yields a read-only zero-copy view.
+    The worker never unlinks; the owning pool does.
+    """
+    name, shape, dtype = descriptor
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    else:
+        # Pool workers share the parent's resource tracker, so attaching
+        # only re-registers a name the parent already owns
+        shm = shared_memory.SharedMemory(name=name)
+    view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    view.flags.writeable = False
+    try:
+        yield view
+    finally:
+        # The view must be gone before the mapping can be closed
+        del view
+        shm.close()
+
+
+# ---------------------------------------------------------
+# Worker pool
+# ---------------------------------------------------------
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_worker_pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Each worker gets its share of the cores for Tesseract and OpenCV
+            _executor = ProcessPoolExecutor(max_workers=OCR_WORKERS, initializer=cpu_budget.configure_worker,
+                                            initargs=(OCR_WORKERS,))
+        return _executor
+
+
+def pool_status():
+    """
+    Worker pool state for the readiness probe.
+    """
+    with _executor_lock:
+        return {
+            "workers": OCR_WORKERS,
+            "started": _executor is not None,
+            # Set by ProcessPoolExecutor when a worker died abruptly
+            "broken": bool(getattr(_executor, "_broken", False)),
+        }
+
+
+def shutdown_worker_pool():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(cancel_futures=True)
+            _executor = None
+
+
+def _ocr_shared_page(descriptor, config, layout=False, refine_weak=False, timeout=None):
+    # Runs inside the worker process; timeout is the request's remaining budget.
+    # Very tall pages are tiled on this worker's share of the cores.
+    import page_tiles
+    import refine
+    workers = cpu_budget.share(OCR_WORKERS)
+    with attach(descriptor) as page:
+        if layout:
+            words = page_tiles.image_to_data(page, config=config, workers=workers, timeout=timeout)
+            if refine_weak:
+                words, _ = refine.refine_words(page, words)
+            return words
+        return page_tiles.image_to_string(page, config=config, workers=workers, timeout=timeout)
+
+
+def _collect_until_deadline(futures, active):
+    """
+    Waits for the futures while watching the deadline. With a partial
+    deadline, pages that did not finish in time come back as None.
+    """
+    results = []
+    for f in futures:
+        while True:
+            try:
+                results.append(f.result(timeout=deadline.POLL_INTERVAL))
+                break
+            except FutureTimeout:
+                if not active.expired():
+                    continue
+            except Exception:
+                # Tesseract killed by its timeout in the worker
+                if not active.expired():
+                    raise
+            if not active.partial:
+                active.check()
+            return results + [None] * (len(futures) - len(results))
+    return results
+
+
+def ocr_buffers_in_workers(buffers, config, layout=False, refine_weak=False):
+    """
+    OCRs already rasterized page buffers in the worker pool.
+    Returns the texts (word lists with layout=True, weak words re-read with
+    refine_weak) in page order and releases every buffer. Under a deadline,
+    pages still queued when it expires are cancelled (None with partial).
+    """
+    pool = get_worker_pool()
+    futures = []
+    active = deadline.current()
+    timeout = deadline.call_timeout()
+    try:
+        for buf in buffers:
+            futures.append(pool.submit(_ocr_shared_page, buf.descriptor(), config, layout, refine_weak, timeout))
+        if active is None:
+            return [f.result() for f in futures]
+        return _collect_until_deadline(futures, active)
+    finally:
+        for f in futures:
+            f.cancel()
+        for buf in buffers:
+            buf.release()
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Maps a date range to the PDF pages that can contain it.
+
+Statements are sorted by date (PhonePe newest first, others oldest first), so
+the first transaction date of every page is enough to know which pages a date
+range touches. That date is probed cheaply: the page is rendered at PROBE_DPI
+and only the left-hand date column is OCR'd. Because the dates are sorted,
+the two ends of the range are found by bisection, probing O(log n) pages
+instead of all of them. The full 300 DPI pass then runs only on the selected
+pages.
+"""
+
+import re
+from datetime import date, datetime
+
+import numpy as np
+from pdf2image import convert_from_path
+
+import deadline
+import ocr_engine
+
+PROBE_DPI = 100
+# Fraction of the page width holding the Date column
+PROBE_COLUMN_WIDTH = 0.4
+PROBE_CONFIG = r'--oem 3 --psm 6'
+
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+
+DATE_PATTERN = re.compile(
+    r'(?P<mdy>(?P<mon1>Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+(?P<day1>\d{1,2})[.,\s]+\s*(?P<year1>\d{4}))'
+    r'|'
+    r'(?P<num>(?P<a>\d{1,2})/(?P<b>\d{1,2})/(?P<year2>\d{4}))'
+    r'|'
+    r'(?P<dm>(?P<day3>\d{1,2})\s+(?P<mon3>Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*)',
+    re.IGNORECASE
+)
+
+
+def parse_iso_date(value):
+    """
+    Parses a YYYY-MM-DD query parameter, None stays None.
+    """
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def find_first_date(text, date_format='DD/MM/YYYY', default_year=None):
+    """
+    Returns the first statement date found in text as a datetime.date, or None.
+    Day-month dates without a year ("14 Dec") use default_year.
+    """
+    for m in DATE_PATTERN.finditer(text):
+        try:
+            if m.group('mdy'):
+                month = MONTHS.index(m.group('mon1')[:3].lower()) + 1
+                return date(int(m.group('year1')), month, int(m.group('day1')))
+            if m.group('num'):
+                a, b = int(m.group('a')), int(m.group('b'))
+                day, month = (b, a) if date_format == 'MM/DD/YYYY' else (a, b)
+                return date(int(m.group('year2')), month, day)
+            if m.group('dm') and default_year:
+                month = MONTHS.index(m.group('mon3')[:3].lower()) + 1
+                return date(default_year, month, int(m.group('day3')))
+        except ValueError:
+            # OCR noise such as "31 Feb"
+            continue
+    return None
+
+
+def probe_page_date(pdf_path, page_no, date_format='DD/MM/YYYY', default_year=None):
+    """
+    Renders one page at PROBE_DPI and OCRs only its date column.
+    """
+    pages = convert_from_path(pdf_path, dpi=PROBE_DPI, first_page=page_no, last_page=page_no, grayscale=True,
+                              timeout=deadline.call_timeout())
+    if not pages:
+        return None
+    gray = np.array(pages[0])
+    column = gray[:, : int(gray.shape[1] * PROBE_COLUMN_WIDTH)]
+    text = ocr_engine.image_to_string(column, config=PROBE_CONFIG)
+    return find_first_date(text, date_format=date_format, default_year=default_year)
+
+
+def select_pages(first_dates, date_from=None, date_to=None):
+    """
+    Given the first date of every page (None if unknown), returns the
+    (first_page, last_page) range (1-based) covering [date_from, date_to],
+    or None when no page can contain the range.
+
+    Page i holds the dates between its own first date and the next page's
+    first date; the last page is open ended in the direction of the sort.
+    """
+    low = date_from or date.min
+    high = date_to or date.max
+
+    known = [d for d in first_dates if d is not None]
+    if not known:
+        # Nothing could be probed: keep every page rather than drop data
+        return (1, len(first_dates)) if first_dates else None
+    descending = len(known) >= 2 and known[0] > known[-1]
+
+    selected = []
+    for i, start in enumerate(first_dates):
+        if start is None:
+            # Unknown page: keep it only if it sits next to a selected one
+            selected.append(None)
+            continue
+
+        end = next((d for d in first_dates[i + 1:] if d is not None), None)
+        if end is None:
+            end = date.min if descending else date.max
+
+        span_low, span_high = min(start, end), max(start, end)
+        selected.append(span_low <= high and span_high >= low)
+
+    hits = [i for i, s in enumerate(selected) if s]
+    if not hits:
+        return None
+
+    first, last = hits[0], hits[-1]
+    # Pages without a readable date right before/after the range are included to be safe
+    while first > 0 and selected[first - 1] is None:
+        first -= 1
+    while last < len(selected) - 1 and selected[last + 1] is None:
+        last += 1
+    return first + 1, last + 1
+
+
+def pages_for_date_range(pdf_path, first_page, last_page, date_from=None, date_to=None, date_format='DD/MM/YYYY'):
+    """
+    Returns the (first_page, last_page) sub-range of first_page..last_page
+    for the requested dates, or None when nothing matches. Same selection
+    as select_pages over every page's first date, but only the pages a
+    bisection needs are probed.
+    """
+    default_year = (date_to or date_from or date.today()).year
+    probed = {}
+
+    def first_date(page_no):
+        if page_no not in probed:
+            try:
+                probed[page_no] = probe_page_date(pdf_path, page_no, date_format, default_year)
+            except deadline.DeadlineExceeded:
+                raise
+            except Exception as e:
+                print(f"⚠️ Date probe failed on page {page_no}: {e}")
+                probed[page_no] = None
+        return probed[page_no]
+
+    def known_page(pages):
+        return next((p for p in pages if first_date(p) is not None), None)
+
+    top = known_page(range(first_page, last_page + 1))
+    if top is None:
+        # Nothing could be probed: keep every page rather than drop data
+        return first_page, last_page
+    bottom = known_page(range(last_page, top - 1, -1))
+    descending = first_date(top) > first_date(bottom)
+
+    # Bounds in reading order: pages move towards `reached` dates
+    enter, leave = (date_to or date.max, date_from or date.min) if descending else \
+        (date_from or date.min, date_to or date.max)
+
+    def reached(d, bound):
+        return d <= bound if descending else d >= bound
+
+    def first_page_where(test):
+        """
+        First page whose date passes test (last_page + 1 if none). Unreadable
+        pages are judged by the next readable one; with none left, as passing.
+        """
+        lo, hi = first_page, last_page + 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            known = known_page(range(mid, hi))
+            if known is None or test(first_date(known)):
+                hi = mid
+            else:
+                lo = known + 1
+        return lo
+
+    # Page i holds the dates from its first date to the next page's first date
+    first = max(first_page, first_page_where(lambda d: reached(d, enter)) - 1)
+    last = first_page_where(lambda d: reached(d, leave) and d != leave) - 1
+    print(f"DEBUG: Probed page dates: {dict(sorted(probed.items()))}")
+    if last < first:
+        return None
+
+    # Pages without a readable date right before/after the range are included to be safe
+    while first > first_page and first_date(first - 1) is None:
+        first -= 1
+    while last < last_page and first_date(last + 1) is None:
+        last += 1
+    return first, last
+
+
+def filter_transactions_by_date(transactions, date_from=None, date_to=None, date_format='DD/MM/YYYY'):
+    """
+    Keeps the transactions whose Date lies inside [date_from, date_to].
+    Rows with an unreadable date are kept.
+    """
+    if not date_from and not date_to:
+        return transactions
+
+    default_year = (date_to or date_from).year
+    low = date_from or date.min
+    high = date_to or date.max
+    kept = []
+    for t in transactions:
+        d = find_first_date(t.get('Date') or "", date_format=date_format, default_year=default_year)
+        if d is None or low <= d <= high:
+            kept.append(t)
+    return kept
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel OCR of very tall pages.
+
+Some banks export a whole month as one long PDF page. Page level
+parallelism does nothing for those, and Tesseract refuses images taller
+than 32767 px. Such pages are cut into horizontal tiles:
+
+1. the binarized page is split into text line bands (table_region)
+2. cuts go into the blank gaps between bands, as close as possible to
+   equal tile heights, so no text line is ever cut through
+3. the tiles are OCR'd in parallel threads (each Tesseract call is its
+   own process and gets its share of the cores from cpu_budget)
+4. text is joined and word boxes are shifted back in reading order
+
+A page taller than TESSERACT_MAX_HEIGHT gets enough tiles to fit under
+the limit whatever TILE_SPLIT, TILE_MIN_HEIGHT or the worker count say
+(the tiles then run on fewer threads than there are tiles). A tile that
+is still too tall, because the page has no blank gap in the right place,
+is cut at the limit even if that goes through a text line.
+
+image_to_string / image_to_data are drop-in replacements for the
+ocr_engine functions that only tile pages of TILE_MIN_HEIGHT px or more.
+"""
+
+import contextvars
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cpu_budget
+import ocr_engine
+import table_region
+
+TILE_SPLIT = os.environ.get("TILE_SPLIT", "1") == "1"
+# Pages at least this tall (px) are tiled; 300 DPI A4 is ~3500
+TILE_MIN_HEIGHT = int(os.environ.get("TILE_MIN_HEIGHT", "6000"))
+# Tiles shorter than this are not worth a Tesseract start
+MIN_TILE_PX = 1500
+TILE_WORKERS = int(os.environ.get("TILE_WORKERS", str(cpu_budget.CORES)))
+# Blank rows a gap needs before a cut may go through it
+MIN_CUT_GAP = 3
+# Tesseract rejects images taller (or wider) than this
+TESSERACT_MAX_HEIGHT = 32767
+
+
+def plan_tiles(height, workers=None):
+    """
+    Number of tiles for a page of the given height (1 = do not split).
+    """
+    required = max(1, math.ceil(height / TESSERACT_MAX_HEIGHT))
+    if not TILE_SPLIT or height < TILE_MIN_HEIGHT:
+        return required
+    workers = workers or TILE_WORKERS
+    return max(required, min(workers, height // MIN_TILE_PX))
+
+
+def find_gaps(gray):
+    """
+    Rows in the middle of the blank gaps between text lines.
+    """
+    bands = table_region.find_line_bands(table_region.binarize(gray), min_gap=MIN_CUT_GAP)
+    return [(bottom + top) // 2 for (_, bottom), (top, _) in zip(bands, bands[1:])]
+
+
+def find_cuts(gray, parts, gaps=None):
+    """
+    Rows to cut at: the middle of a blank gap between text lines, nearest
+    to each of the parts - 1 evenly spaced positions. Returns a sorted list
+    (shorter when the page has too few gaps).
+    """
+    height = gray.shape[0]
+    gaps = find_gaps(gray) if gaps is None else gaps
+    if not gaps:
+        return []
+
+    cuts = []
+    min_tile = height // (parts * 2)
+    for k in range(1, parts):
+        target = height * k // parts
+        best = min(gaps, key=lambda y: abs(y - target))
+        previous = cuts[-1] if cuts else 0
+        if best - previous >= min_tile and height - best >= min_tile:
+            cuts.append(best)
+    return cuts
+
+
+def limit_tile_heights(edges, gaps, max_height=TESSERACT_MAX_HEIGHT):
+    """
+    Adds cuts until no tile is taller than max_height: at the lowest gap
+    that keeps the tile under the limit, else right at the limit.
+    """
+    limited = [edges[0]]
+    for edge in edges[1:]:
+        while edge - limited[-1] > max_height:
+            top = limited[-1]
+            fitting = [y for y in gaps if top < y <= top + max_height]
+            if fitting:
+                limited.append(max(fitting))
+            else:
+                print(f"⚠️ No blank gap within {max_height} px of row {top}: cutting through text")
+                limited.append(top + max_height)
+        limited.append(edge)
+    return limited
+
+
+def split_page(gray, workers=None):
+    """
+    [(top, bottom), ...] row ranges covering the whole page, none taller
+    than TESSERACT_MAX_HEIGHT.
+    """
+    height = gray.shape[0]
+    parts = plan_tiles(height, workers)
+    if parts < 2:
+        return [(0, height)]
+    gaps = find_gaps(gray)
+    edges = limit_tile_heights([0] + find_cuts(gray, parts, gaps) + [height], gaps)
+    return list(zip(edges, edges[1:]))
+
+
+def _ocr_tiles(func, gray, tiles, config, workers=None, **kwargs):
+    with ThreadPoolExecutor(max_workers=min(len(tiles), workers or TILE_WORKERS)) as pool:
+        # A context copy per thread, so the request deadline reaches every call
+        futures = [pool.submit(contextvars.copy_context().run, func, gray[top:bottom], config=config, **kwargs)
+                   for top, bottom in tiles]
+        return [f.result() for f in futures]
+
+
+def stitch_words(tile_words, tiles):
+    """
+    Shifts tile word boxes back onto the page and renumbers the blocks so
+    lines of different tiles never merge in words_to_text.
+    """
+    words = []
+    block_offset = 0
+    for (top, _), batch in zip(tiles, tile_words):
+        for w in batch:
+            words.append(dict(w, top=w["top"] + top, block_num=w.get("block_num", 0) + block_offset))
+        block_offset += max((w.get("block_num", 0) for w in batch), default=0) + 1
+    return words
+
+
+def image_to_data(gray, config="", workers=None, **kwargs):
+    """
+    kwargs (e.g. timeout in worker processes) go to every ocr_engine call.
+    """
+    tiles = split_page(gray, workers)
+    if len(tiles) == 1:
+        return ocr_engine.image_to_data(gray, config=config, **kwargs)
+    print(f"DEBUG: Tall page ({gray.shape[0]} px) OCR'd as {len(tiles)} tiles")
+    return stitch_words(_ocr_tiles(ocr_engine.image_to_data, gray, tiles, config, workers, **kwargs), tiles)
+
+
+def image_to_string(gray, config="", workers=None, **kwargs):
+    tiles = split_page(gray, workers)
+    if len(tiles) == 1:
+        return ocr_engine.image_to_string(gray, config=config, **kwargs)
+    print(f"DEBUG: Tall page ({gray.shape[0]} px) OCR'd as {len(tiles)} tiles")
+    texts = _ocr_tiles(ocr_engine.image_to_string, gray, tiles, config, workers, **kwargs)
+    return "\n".join(text.strip("\n") for text in texts if text.strip()) + "\n"
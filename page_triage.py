@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Cheap page triage before OCR.
+
+Statements often end with blank pages or repeat the same terms-and-conditions
+page. Each page is reduced to a small ink thumbnail (SIGNATURE_WIDTH px wide,
+fraction of dark pixels per cell) which is enough to:
+
+- skip near-empty pages (total ink coverage below BLANK_INK_COVERAGE)
+- find repeat candidates: a page whose thumbnail differs from an already
+  kept page of the same document by less than DUPLICATE_DISTANCE
+
+A 64 px thumbnail cannot tell digits or payee names apart, so pages with
+the same layout and different transactions can look alike there. A
+candidate is only skipped after a confirmation at CONFIRM_WIDTH px: at most
+CONFIRM_MAX_PIXELS of its ink pixels may have no ink of the kept page next to
+them (and vice versa). The one pixel tolerance absorbs scan noise and
+anti-aliasing; a single changed digit leaves a whole stroke unmatched.
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+PAGE_TRIAGE = os.environ.get("PAGE_TRIAGE", "1") == "1"
+
+SIGNATURE_WIDTH = 64
+INK_LEVEL = 128
+# Fraction of inked pixels below which a page counts as blank
+BLANK_INK_COVERAGE = 0.001
+# Normalized L1 distance between signatures below which pages are duplicates
+DUPLICATE_DISTANCE = 0.06
+# Width of the ink mask that confirms a duplicate, and the unmatched ink
+# pixels it tolerates (one changed digit leaves 5+ at this width)
+CONFIRM_WIDTH = 800
+CONFIRM_MAX_PIXELS = 2
+
+
+def ink_signature(gray):
+    """
+    Ink fraction per cell of a SIGNATURE_WIDTH px wide thumbnail.
+    Works on any DPI since the thumbnail width is fixed.
+    """
+    ink = (gray < INK_LEVEL).astype(np.float32)
+    height = max(1, int(round(gray.shape[0] * SIGNATURE_WIDTH / gray.shape[1])))
+    return cv2.resize(ink, (SIGNATURE_WIDTH, height), interpolation=cv2.INTER_AREA)
+
+
+def ink_mask(gray):
+    """
+    Boolean ink mask at CONFIRM_WIDTH px, detailed enough to see digits.
+    """
+    height = max(1, int(round(gray.shape[0] * CONFIRM_WIDTH / gray.shape[1])))
+    small = cv2.resize(gray, (CONFIRM_WIDTH, height), interpolation=cv2.INTER_AREA)
+    return small < INK_LEVEL
+
+
+def unmatched_pixels(a, b):
+    """
+    Ink pixels of either mask with no ink of the other within one pixel.
+    """
+    if a.shape != b.shape:
+        return a.size + b.size
+    kernel = np.ones((3, 3), np.uint8)
+    near_a = cv2.dilate(a.astype(np.uint8), kernel).astype(bool)
+    near_b = cv2.dilate(b.astype(np.uint8), kernel).astype(bool)
+    return int(np.count_nonzero(a & ~near_b) + np.count_nonzero(b & ~near_a))
+
+
+def signature_distance(a, b):
+    if a.shape != b.shape:
+        # Different page sizes are never duplicates
+        return 1.0
+    total = max(float(a.sum()), float(b.sum()), 1e-6)
+    return float(np.abs(a - b).sum()) / total
+
+
+class PageTriage:
+    """
+    Remembers the kept pages of one document and decides which pages to skip.
+    """
+
+    def __init__(self):
+        self.kept = []  # (page_no, signature, ink mask)
+
+    def check(self, gray, page_no):
+        """
+        Returns (skip_reason, ink_coverage). skip_reason is None for pages
+        that must be OCR'd; those are remembered for duplicate detection.
+        """
+        signature = ink_signature(gray)
+        coverage = float(signature.mean())
+
+        if coverage < BLANK_INK_COVERAGE:
+            return "blank", coverage
+
+        mask = None
+        for kept_page, kept_signature, kept_mask in self.kept:
+            if signature_distance(signature, kept_signature) >= DUPLICATE_DISTANCE:
+                continue
+            # Same layout; only identical content makes it a duplicate
+            mask = ink_mask(gray) if mask is None else mask
+            if unmatched_pixels(mask, kept_mask) <= CONFIRM_MAX_PIXELS:
+                return f"duplicate of page {kept_page}", coverage
+
+        self.kept.append((page_no, signature, ink_mask(gray) if mask is None else mask))
+        return None, coverage
+
+
+def skipped_record(page_no, reason, coverage, **extra):
+    """
+    Page record for a page that was not OCR'd.
+    """
+    print(f"DEBUG: Skipping page {page_no}: {reason}")
+    return {"page": page_no, "text": "", "skipped": reason, "ink_coverage": round(coverage, 4), **extra}
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Named processing tiers: one switch for the speed / accuracy trade-off.
+
+Each tier bundles the rasterization DPI, the Tesseract engine mode (and
+optionally a traineddata directory), the preprocessing steps and the
+refinement passes. The times below are rough estimates for a 3 page
+PhonePe statement on one core (Tesseract 5), not measurements of this
+deployment; hardware, page content and load move them a lot:
+
+fast       ~1.5 s   150 DPI, LSTM only (--oem 1), blank/repeat pages skipped,
+                    OCR limited to the transaction table, no refinement.
+                    Good enough for dates, types and round amounts; small
+                    print and paise digits are read less reliably.
+                    Point TESSDATA_FAST_DIR at tessdata_fast, which should
+                    be about twice as fast again.
+balanced   ~3-4 s   300 DPI (the profile's DPI), default engine (--oem 3),
+                    page triage. The classic setup and the default tier;
+                    the other stages keep their environment defaults (weak
+                    words are only re-read where ADAPTIVE_DPI gives word
+                    boxes).
+accurate   ~8-12 s  adaptive DPI (MIN_DPI-MAX_DPI per page, see adaptive_dpi;
+                    it replaces the tier's and the profile's DPI) with
+                    escalation on low confidence, table crop, weak words
+                    re-read, column parsing from word boxes. For
+                    back-office jobs where every paisa counts.
+                    Point TESSDATA_BEST_DIR at tessdata_best for the best
+                    (and slowest) LSTM models.
+
+Settings left at None fall back to the environment defaults of the
+individual stages (ADAPTIVE_DPI, TABLE_CROP, PAGE_TRIAGE, REFINE). Whenever
+adaptive DPI ends up on, the dpi setting (tier or profile) is not used.
+expected_seconds_per_page is the same kind of estimate, for ordering the
+tiers and for client hints, not a guarantee.
+"""
+
+import os
+import shlex
+
+DEFAULT_TIER = os.environ.get("DEFAULT_TIER", "balanced")
+
+TIERS = {
+    "fast": {
+        "description": "Interactive: lowest latency, good accuracy on clean statements.",
+        "expected_seconds_per_page": 0.5,
+        "dpi": 150,
+        "oem": 1,
+        "tessdata_dir": os.environ.get("TESSDATA_FAST_DIR"),
+        "adaptive": False,
+        "triage": True,
+        "crop_table": True,
+        "refine_weak": False,
+        "layout": False,
+    },
+    "balanced": {
+        "description": "Default: 300 DPI, blank and repeated pages skipped.",
+        "expected_seconds_per_page": 1.2,
+        "dpi": None,
+        "oem": 3,
+        "tessdata_dir": None,
+        "adaptive": None,
+        "triage": True,
+        "crop_table": None,
+        # Needs word boxes; plain text OCR has none to refine
+        "refine_weak": None,
+        "layout": False,
+    },
+    "accurate": {
+        "description": "Back-office: adaptive DPI, escalation, refinement and column parsing.",
+        "expected_seconds_per_page": 3.5,
+        # Adaptive DPI picks each page's DPI itself
+        "dpi": None,
+        "oem": 3,
+        "tessdata_dir": os.environ.get("TESSDATA_BEST_DIR"),
+        "adaptive": True,
+        "triage": True,
+        "crop_table": True,
+        "refine_weak": True,
+        "layout": True,
+    },
+}
+
+# Keys passed straight to bank_statement2_ocr.ocr_pdf_pages
+OCR_OPTIONS = ("dpi", "adaptive", "triage", "crop_table", "refine_weak", "layout")
+
+
+def get_tier(name=None):
+    """
+    Returns the tier dict; unknown names raise KeyError.
+    """
+    return TIERS[name or DEFAULT_TIER]
+
+
+def tier_config(name, base_config):
+    """
+    Applies the tier's engine mode and traineddata directory to a Tesseract
+    config string (CUSTOM_CONFIG or a statement profile config).
+    """
+    tier = get_tier(name)
+    args = shlex.split(base_config)
+    if "--oem" in args:
+        i = args.index("--oem")
+        del args[i:i + 2]
+    args = ["--oem", str(tier["oem"])] + args
+    if tier["tessdata_dir"]:
+        args = ["--tessdata-dir", tier["tessdata_dir"]] + args
+    return " ".join(shlex.quote(a) for a in args)
+
+
+def ocr_options(name):
+    """
+    ocr_pdf_pages keyword arguments of a tier.
+    """
+    tier = get_tier(name)
+    return {key: tier[key] for key in OCR_OPTIONS}
+
+
+def describe_tiers():
+    """
+    Public summary for the API (no paths).
+    """
+    return {
+        name: {k: v for k, v in tier.items() if k != "tessdata_dir"}
+        for name, tier in TIERS.items()
+    }
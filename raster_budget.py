@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Memory budget for page rasters.
+
+Request and slot counts say little about memory: an A4 page at 300 DPI is
+~25 MB as RGB, an A3 or large-format page several times that. Every page
+is therefore rendered under a reservation of its estimated raster size,
+computed from the page dimensions pdfinfo reports and the DPI, and a
+reservation only goes through while the pages in flight stay under
+RASTER_MEMORY_MB. Other pages wait (up to the request deadline) until
+memory is released.
+
+A single page larger than the whole budget still runs, but only when
+nothing else holds memory, so a burst of big statements is serialized
+instead of running the process out of memory.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import deadline
+import ingest_guard
+
+RASTER_MEMORY_MB = int(os.environ.get("RASTER_MEMORY_MB", "1024"))
+
+# RGB raster from pdftoppm + the grayscale working copy
+BYTES_PER_PIXEL = 4
+# Grayscale render (adaptive DPI) + its NumPy copy
+GRAY_BYTES_PER_PIXEL = 2
+# A4 in points, for pages pdfinfo did not list
+DEFAULT_PAGE_SIZE = (595.0, 842.0)
+
+
+def page_pixels(size_pts, dpi):
+    width, height = size_pts
+    return int(round(width / 72.0 * dpi)) * int(round(height / 72.0 * dpi))
+
+
+def estimate_page_bytes(size_pts, dpi, bytes_per_pixel=BYTES_PER_PIXEL):
+    """
+    Memory one page needs while it is rendered and prepared.
+    """
+    return page_pixels(size_pts or DEFAULT_PAGE_SIZE, dpi) * bytes_per_pixel
+
+
+def page_sizes(pdf_path, first_page, last_page=None):
+    """
+    Page count and {page: (width, height)} in points from pdfinfo.
+    Never raises: unknown sizes fall back to DEFAULT_PAGE_SIZE later.
+    """
+    try:
+        max_pages = (last_page - first_page) if last_page else ingest_guard.MAX_PDF_PAGES
+        info = ingest_guard.inspect_pdf(pdf_path, max_pages=max_pages, first_page=first_page)
+        return info["pages"], info["page_sizes"]
+    except Exception as e:
+        print(f"⚠️ Could not read page sizes: {e}")
+        return None, {}
+
+
+class MemoryBudget:
+    def __init__(self, limit_bytes=RASTER_MEMORY_MB * 1024 * 1024):
+        self.limit = limit_bytes
+        self.in_use = 0
+        self.peak = 0
+        self.reservations = 0
+        self.waits = 0
+        self.oversized = 0
+        self.wait_seconds = 0.0
+        self._cond = threading.Condition()
+
+    def fits(self, nbytes):
+        # Anything fits into an empty budget, otherwise big pages could never run
+        return self.in_use == 0 or self.in_use + nbytes <= self.limit
+
+    def acquire(self, nbytes):
+        """
+        Blocks until nbytes fit into the budget. Waits are cut short by the
+        request deadline (DeadlineExceeded).
+        """
+        start = time.perf_counter()
+        with self._cond:
+            if not self.fits(nbytes):
+                self.waits += 1
+            while not self.fits(nbytes):
+                self._cond.wait(timeout=deadline.POLL_INTERVAL)
+                deadline.check()
+            self._take(nbytes)
+            self.wait_seconds += time.perf_counter() - start
+
+    def try_acquire(self, nbytes):
+        """
+        Takes nbytes only if they fit right now; never waits. For callers
+        that already hold memory and would otherwise wait on themselves.
+        """
+        with self._cond:
+            if not self.fits(nbytes):
+                return False
+            self._take(nbytes)
+            return True
+
+    def _take(self, nbytes):
+        if nbytes > self.limit:
+            self.oversized += 1
+        self.in_use += nbytes
+        self.peak = max(self.peak, self.in_use)
+        self.reservations += 1
+
+    def release(self, nbytes):
+        with self._cond:
+            self.in_use -= nbytes
+            self._cond.notify_all()
+
+    @contextmanager
+    def reserve(self, nbytes):
+        self.acquire(nbytes)
+        try:
+            yield nbytes
+        finally:
+            self.release(nbytes)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit_mb": round(self.limit / 1024 / 1024, 1),
+                "in_use_mb": round(self.in_use / 1024 / 1024, 1),
+                "peak_mb": round(self.peak / 1024 / 1024, 1),
+                "reservations": self.reservations,
+                "waits": self.waits,
+                "oversized_pages": self.oversized,
+                "wait_seconds": round(self.wait_seconds, 2),
+            }
+
+
+budget = MemoryBudget()
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Per-tenant rate limiting, counted in pages.
+
+Every tenant has a token bucket that refills at pages_per_minute and holds
+at most burst pages. A request costs the pages it will OCR (the selected
+PDF page range, one per screenshot), so one tenant's batch script cannot
+take all OCR capacity from the others.
+
+Limiting is off unless RATE_LIMIT=1. Tenants are identified by the
+X-API-Key header when the key is configured, otherwise by client IP
+(unknown keys do not get their own bucket, or minting keys would bypass
+the limit). Behind a reverse proxy the client IP is only right when the
+server trusts the proxy's X-Forwarded-For header (gunicorn_conf.py:
+FORWARDED_ALLOW_IPS); otherwise all anonymous clients share one bucket. Limits come from RATE_LIMITS_FILE, a
+JSON file:
+
+    {"default": {"pages_per_minute": 60, "burst": 120},
+     "tenants": {"<api key>": {"name": "acme", "pages_per_minute": 600, "burst": 900}}}
+
+A request larger than the burst is allowed when the bucket is full and
+leaves it in debt, so big statements are slowed, not refused forever.
+Decisions come with the RateLimit-Limit / -Remaining / -Reset headers.
+
+Buckets live in process memory. Under gunicorn each of the WEB_CONCURRENCY
+workers keeps its own buckets, so every worker enforces 1/WEB_CONCURRENCY
+of the configured rate and burst. With requests spread over the workers
+the tenant gets about the configured limit in total, but it is not exact:
+a tenant whose requests all land on one worker is held to that worker's
+share, and the RateLimit-* headers describe the worker's bucket.
+"""
+
+import json
+import os
+import threading
+import time
+
+# Opt-in: without trusted proxy headers every client behind a proxy is one IP
+RATE_LIMIT = os.environ.get("RATE_LIMIT", "0") == "1"
+RATE_LIMITS_FILE = os.environ.get("RATE_LIMITS_FILE")
+DEFAULT_PAGES_PER_MINUTE = float(os.environ.get("RATE_LIMIT_PAGES_PER_MINUTE", "60"))
+DEFAULT_BURST = float(os.environ.get("RATE_LIMIT_BURST", "120"))
+# Idle buckets are dropped once more than this many clients are tracked
+MAX_TRACKED_CLIENTS = 10000
+# Longest wait reported to a client (a tenant with pages_per_minute=0)
+MAX_RETRY_AFTER = 24 * 3600
+# Gunicorn workers that each hold a share of every tenant's limit
+WORKERS = max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+
+API_KEY_HEADER = "x-api-key"
+
+
+class TokenBucket:
+    def __init__(self, pages_per_minute, burst, now=None):
+        self.rate = pages_per_minute / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic() if now is None else now
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def seconds_until(self, tokens):
+        """
+        Seconds until the bucket holds `tokens` (capped at a full bucket).
+        """
+        missing = min(tokens, self.burst) - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate if self.rate else float("inf")
+
+    def consume(self, cost, now):
+        """
+        Takes cost tokens; returns 0.0 on success, else the seconds to wait.
+        cost=0 only checks that the bucket is not in debt.
+        """
+        self.refill(now)
+        if cost == 0:
+            return 0.0 if self.tokens > 0 else self.seconds_until(1)
+        if self.tokens >= cost or (cost > self.burst and self.tokens >= self.burst):
+            self.tokens -= cost
+            return 0.0
+        return self.seconds_until(cost)
+
+
+def load_limits(path=RATE_LIMITS_FILE):
+    limits = {
+        "default": {"pages_per_minute": DEFAULT_PAGES_PER_MINUTE, "burst": DEFAULT_BURST},
+        "tenants": {},
+    }
+    if path:
+        with open(path, encoding="utf-8") as f:
+            configured = json.load(f)
+        limits["default"].update(configured.get("default", {}))
+        limits["tenants"].update(configured.get("tenants", {}))
+    return limits
+
+
+class RateLimiter:
+    def __init__(self, limits=None, enabled=RATE_LIMIT, workers=WORKERS):
+        self.limits = limits or load_limits()
+        self.enabled = enabled
+        self.workers = workers
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.throttled = 0
+
+    def identify(self, api_key, client_ip):
+        """
+        Returns (tenant, limits) for a request.
+        """
+        tenant = self.limits["tenants"].get(api_key) if api_key else None
+        if tenant is not None:
+            return f"tenant:{tenant.get('name', api_key[:6])}", dict(self.limits["default"], **tenant)
+        return f"ip:{client_ip or 'unknown'}", self.limits["default"]
+
+    def _bucket(self, tenant, limits, now):
+        bucket = self._buckets.get(tenant)
+        if bucket is None:
+            if len(self._buckets) >= MAX_TRACKED_CLIENTS:
+                self._prune(now)
+            bucket = self._buckets[tenant] = TokenBucket(limits["pages_per_minute"] / self.workers,
+                                                         limits["burst"] / self.workers, now)
+        return bucket
+
+    def _prune(self, now):
+        for name, bucket in list(self._buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.burst:
+                del self._buckets[name]
+
+    def consume(self, tenant, limits, cost):
+        """
+        Charges cost pages. Returns {"allowed", "limit", "remaining", "reset", "retry_after"}.
+        """
+        if not self.enabled:
+            return {"allowed": True, "limit": None, "remaining": None, "reset": 0, "retry_after": 0}
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(tenant, limits, now)
+            wait = bucket.consume(cost, now)
+            if wait:
+                self.throttled += 1
+            elif cost:
+                self.allowed += 1
+            return {
+                "allowed": not wait,
+                "limit": int(bucket.burst),
+                "remaining": max(0, int(bucket.tokens)),
+                "reset": int(round(min(MAX_RETRY_AFTER, bucket.seconds_until(bucket.burst)))),
+                "retry_after": max(1, int(round(min(MAX_RETRY_AFTER, wait)))) if wait else 0,
+            }
+
+    def refund(self, tenant, cost):
+        """
+        Gives pages back when the work was never done (e.g. server overloaded).
+        """
+        with self._lock:
+            bucket = self._buckets.get(tenant)
+            if bucket is not None:
+                bucket.tokens = min(bucket.burst, bucket.tokens + cost)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "workers": self.workers,
+                "tracked_clients": len(self._buckets),
+                "allowed": self.allowed,
+                "throttled": self.throttled,
+            }
+
+
+def headers(decision):
+    """
+    RateLimit-* response headers (IETF draft) for a decision.
+    """
+    if decision["limit"] is None:
+        return {}
+    result = {
+        "RateLimit-Limit": str(decision["limit"]),
+        "RateLimit-Remaining": str(decision["remaining"]),
+        "RateLimit-Reset": str(decision["reset"]),
+    }
+    if not decision["allowed"]:
+        result["Retry-After"] = str(decision["retry_after"])
+    return result
+
+
+limiter = RateLimiter()
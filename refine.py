@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Selective re-OCR of weak words.
+
+After a page was read with image_to_data, most words are fine and a few
+(typically amounts, dates and times) come back with low confidence. Instead
+of re-running the whole page, only those spots are OCR'd again:
+
+1. words below REFINE_CONFIDENCE are collected; neighbours on the same
+   Tesseract line are merged into one span
+2. each span is cropped with some padding and upscaled by UPSCALE
+3. the crops are stacked on one canvas (image_batch) and read with a single
+   Tesseract call, so the process start and model load are paid once per
+   page, not per span; numeric spans go on a second canvas read with a
+   digit whitelist
+4. the new words replace the span only if their mean confidence is higher
+
+A page therefore costs at most two extra Tesseract calls (more only when a
+canvas passes image_batch.MAX_CANVAS_HEIGHT), and the pixels re-read are
+capped at MAX_AREA_SHARE of the page and at MAX_SPANS spans, so a bad page
+costs a fraction of a full re-run. Time, call and area counters are kept in
+REFINE_STATS (see get_refine_stats(), served by GET /admission).
+"""
+
+import os
+import re
+import threading
+import time
+
+import cv2
+
+import ocr_engine
+
+REFINE = os.environ.get("REFINE", "1") == "1"
+REFINE_CONFIDENCE = float(os.environ.get("REFINE_CONFIDENCE", "60"))
+
+UPSCALE = 2.0
+PADDING = 6
+MAX_SPANS = 40
+MAX_AREA_SHARE = 0.25
+# Words closer than this many word heights are re-read together
+MERGE_GAP = 2.0
+
+# The canvas holds one crop per span, top to bottom: read it as a block
+CANVAS_CONFIG = "--oem 3 --psm 6"
+DIGIT_CONFIG = CANVAS_CONFIG + " -c tessedit_char_whitelist=0123456789.,:/-₹"
+
+NUMERIC_WORD = re.compile(r'^[₹\d.,:/-]*\d[₹\d.,:/-]*$')
+
+REFINE_STATS = {"pages": 0, "spans": 0, "improved": 0, "calls": 0, "pixels": 0, "page_pixels": 0, "seconds": 0.0}
+_stats_lock = threading.Lock()
+
+
+def _line_key(word):
+    return (word.get("page_num", 1), word.get("block_num", 0), word.get("par_num", 0), word.get("line_num", 0))
+
+
+def weak_spans(words, threshold=None):
+    """
+    Groups the weak words into spans of word indexes, in reading order.
+    Adjacent weak words of one line form one span.
+    """
+    threshold = REFINE_CONFIDENCE if threshold is None else threshold
+    spans = []
+    current = []
+    for i, w in enumerate(words):
+        weak = 0 <= w["conf"] < threshold
+        if weak and current:
+            prev = words[current[-1]]
+            gap = w["left"] - (prev["left"] + prev["width"])
+            if _line_key(prev) == _line_key(w) and gap <= MERGE_GAP * max(prev["height"], w["height"]):
+                current.append(i)
+                continue
+        if current:
+            spans.append(current)
+            current = []
+        if weak:
+            current = [i]
+    if current:
+        spans.append(current)
+    return spans
+
+
+def span_box(words, span, shape):
+    """
+    (top, bottom, left, right) of a span plus PADDING, clipped to the image.
+    """
+    height, width = shape[:2]
+    top = min(words[i]["top"] for i in span) - PADDING
+    bottom = max(words[i]["top"] + words[i]["height"] for i in span) + PADDING
+    left = min(words[i]["left"] for i in span) - PADDING
+    right = max(words[i]["left"] + words[i]["width"] for i in span) + PADDING
+    return max(0, top), min(height, bottom), max(0, left), min(width, right)
+
+
+def _crop(gray, box):
+    top, bottom, left, right = box
+    return cv2.resize(gray[top:bottom, left:right], None, fx=UPSCALE, fy=UPSCALE, interpolation=cv2.INTER_CUBIC)
+
+
+def _reread(crops, config):
+    """
+    OCRs the crops stacked on canvases, one Tesseract call per canvas.
+    Returns (words per crop in crop coordinates, calls made).
+    """
+    # image_pipeline (imported by image_batch) imports adaptive_dpi, which imports this module
+    import image_batch
+
+    results = [[] for _ in crops]
+    plans = image_batch.plan_canvases([crop.shape for crop in crops])
+    for plan in plans:
+        words = ocr_engine.image_to_data(image_batch.compose(crops, plan), config=config)
+        for index, crop_words in image_batch.split_words(words, crops, plan).items():
+            results[index] = crop_words
+    return results, len(plans)
+
+
+def _to_page(new_words, box, template):
+    """
+    Maps words read on an upscaled crop back to page coordinates, keeping
+    the line numbering of the span they replace.
+    """
+    top, _, left, _ = box
+    mapped = []
+    for n, w in enumerate(new_words):
+        word = {k: template[k] for k in ("level", "page_num", "block_num", "par_num", "line_num") if k in template}
+        word.update(
+            word_num=template.get("word_num", 0) + n,
+            left=left + int(w["left"] / UPSCALE),
+            top=top + int(w["top"] / UPSCALE),
+            width=int(w["width"] / UPSCALE),
+            height=int(w["height"] / UPSCALE),
+            conf=w["conf"],
+            text=w["text"],
+            refined=True,
+        )
+        mapped.append(word)
+    return mapped
+
+
+def refine_words(gray, words, threshold=None):
+    """
+    Re-OCRs the weak spans of one page. Returns (words, improved_spans);
+    the input list is not modified.
+    """
+    start = time.perf_counter()
+    spans = weak_spans(words, threshold)
+    page_pixels = gray.shape[0] * gray.shape[1]
+    budget = page_pixels * MAX_AREA_SHARE
+
+    selected = {False: [], True: []}  # numeric -> [(span, box)]
+    pixels = 0
+    for span in spans[:MAX_SPANS]:
+        box = span_box(words, span, gray.shape)
+        area = (box[1] - box[0]) * (box[3] - box[2])
+        if area <= 0:
+            continue
+        if pixels + area > budget:
+            break
+        pixels += area
+        numeric = all(NUMERIC_WORD.match(words[i]["text"]) for i in span)
+        selected[numeric].append((span, box))
+
+    replacements = {}
+    calls = 0
+    for numeric, chosen in selected.items():
+        if not chosen:
+            continue
+        results, made = _reread([_crop(gray, box) for _, box in chosen], DIGIT_CONFIG if numeric else CANVAS_CONFIG)
+        calls += made
+        for (span, box), new_words in zip(chosen, results):
+            old_conf = ocr_engine.mean_confidence([words[i] for i in span])
+            if new_words and ocr_engine.mean_confidence(new_words) > old_conf:
+                replacements[span[0]] = (span, _to_page(new_words, box, words[span[0]]))
+
+    refined = []
+    skip = set()
+    for i, w in enumerate(words):
+        if i in skip:
+            continue
+        if i in replacements:
+            span, new_words = replacements[i]
+            skip.update(span)
+            refined.extend(new_words)
+        else:
+            refined.append(w)
+
+    with _stats_lock:
+        REFINE_STATS["pages"] += 1
+        REFINE_STATS["spans"] += min(len(spans), MAX_SPANS)
+        REFINE_STATS["improved"] += len(replacements)
+        REFINE_STATS["calls"] += calls
+        REFINE_STATS["pixels"] += pixels
+        REFINE_STATS["page_pixels"] += page_pixels
+        REFINE_STATS["seconds"] += time.perf_counter() - start
+
+    if replacements:
+        print(f"DEBUG: Refined {len(replacements)}/{len(spans)} weak spans ({pixels / page_pixels:.1%} of the page)")
+    return refined, len(replacements)
+
+
+def get_refine_stats():
+    """
+    Refinement counters with the share of page pixels that were re-read.
+    """
+    with _stats_lock:
+        stats = dict(REFINE_STATS)
+    stats["area_share"] = round(stats["pixels"] / stats["page_pixels"], 4) if stats["page_pixels"] else 0.0
+    stats["seconds"] = round(stats["seconds"], 3)
+    return stats
+
+
+def reset_refine_stats():
+    with _stats_lock:
+        for key in REFINE_STATS:
+            REFINE_STATS[key] = 0.0 if key == "seconds" else 0
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Batch re-parse of stored OCR text.
+
+Runs the current parsers over documents kept in the OCR store, without any
+OCR. Used to back-fill old uploads after a parser or category rule change.
+
+Examples:
+    python reparse_documents.py --all --out data/reparsed
+    python reparse_documents.py 2552fcbd-f0c3-4ad8-aa57-dbcb826a9e85
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+import ocr_store
+from statement_router import parse_pages
+
+
+def reparse(document_id):
+    """
+    Returns the re-parsed result of one stored document, or None if unknown.
+    """
+    document = ocr_store.load_document(document_id)
+    if document is None:
+        return None
+
+    # The parsers print debug output per block; keep the batch output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        # The format the first-page probe found at upload time, if any
+        date_format, transactions = parse_pages(document.get("pages", []), document.get("date_format"))
+
+    return {
+        "document_id": document_id,
+        "filename": document.get("filename"),
+        "detected_format": date_format,
+        "transaction_count": len(transactions),
+        "data": transactions,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-parse stored OCR text without re-running OCR.")
+    parser.add_argument("document_ids", nargs="*", help="Document IDs to re-parse")
+    parser.add_argument("--all", action="store_true", help="Re-parse every stored document")
+    parser.add_argument("--out", help="Directory for one <document_id>.json result per document")
+    args = parser.parse_args(argv)
+
+    document_ids = ocr_store.list_documents() if args.all else args.document_ids
+    if not document_ids:
+        parser.error("give document IDs or --all")
+
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+
+    start = time.perf_counter()
+    done = 0
+    missing = 0
+    for document_id in document_ids:
+        result = reparse(document_id)
+        if result is None:
+            print(f"⚠️ Unknown document: {document_id}")
+            missing += 1
+            continue
+
+        done += 1
+        if args.out:
+            with open(os.path.join(args.out, f"{document_id}.json"), "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+        else:
+            print(f"{document_id}: {result['transaction_count']} transactions ({result['detected_format']})")
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Re-parsed {done} documents in {elapsed:.2f}s ({missing} missing)")
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Per statement profile Tesseract tuning.
+
+CUSTOM_CONFIG ('--oem 3 --psm 6') is generic. Each statement layout here can
+ship its own:
+- dpi / psm / oem
+- character whitelist (no ©, ®, } ... that only show up as misreads)
+- user words (DEBIT, CREDIT, Paid to, Received from, UPI Ref No ...)
+- user patterns for dates, times and amounts (Tesseract pattern syntax:
+  \\d digit, \\c letter, \\* repeat the previous class)
+
+so Tesseract stops producing "Mothle recharged", "Receaved trom" or reading
+the rupee sign as 7/2. The word and pattern files are written once per
+process and the config string is cached, so selecting a profile per request
+costs nothing.
+"""
+
+import os
+import shlex
+import tempfile
+from functools import lru_cache
+
+PROFILE_CACHE_DIR = os.path.join(tempfile.gettempdir(), "ocr_profiles")
+
+DEFAULT_PROFILE = "generic"
+
+COMMON_WORDS = [
+    "DEBIT", "CREDIT", "Paid", "to", "Received", "from", "Money", "sent",
+    "Transaction", "ID", "UTR", "No", "UPI", "Ref", "Bank", "Order",
+    "Mobile", "recharged", "Date", "Details", "Type", "Amount", "Rs",
+]
+
+# Letters, digits, the rupee sign and the punctuation statements actually use
+STATEMENT_WHITELIST = (
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+    "₹.,:;/-@&#()'+*_"
+)
+
+PROFILES = {
+    "generic": {
+        "dpi": 300,
+        "oem": 3,
+        "psm": 6,
+    },
+    # bank_statement1_ocr: "Oct 23, 2025" | Transaction Details | Type | Amount
+    "phonepe": {
+        "dpi": 300,
+        "oem": 3,
+        "psm": 6,
+        "whitelist": STATEMENT_WHITELIST,
+        "user_words": COMMON_WORDS + ["PhonePe", "Statement", "PM", "AM"],
+        "user_patterns": [
+            r"₹\d\*",
+            r"₹\d\*.\d\d",
+            r"\d\*.\d\d",
+            r"\d\d:\d\d",
+            r"\d\d,",
+            r"\d\d\d\d",
+        ],
+    },
+    # bank_statement2_ocr: "14 Dec" ... "- Rs.690.64"
+    "paytm": {
+        "dpi": 300,
+        "oem": 3,
+        "psm": 6,
+        "whitelist": STATEMENT_WHITELIST,
+        "user_words": COMMON_WORDS + ["Paytm", "Tag", "Axis", "Of", "PM", "AM", "PhonePe"],
+        "user_patterns": [
+            r"Rs.\d\*",
+            r"Rs.\d\*.\d\d",
+            r"\d\d:\d\d",
+            r"\d\d/\d\d/\d\d\d\d",
+            r"\d\*@\c\*",
+        ],
+    },
+}
+
+
+def get_profile(name):
+    """
+    Returns the profile dict; unknown names raise KeyError.
+    """
+    return PROFILES[name or DEFAULT_PROFILE]
+
+
+def _write_list(path, items):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(items) + "\n")
+    os.replace(tmp_path, path)
+
+
+@lru_cache(maxsize=None)
+def get_config(name=None, psm=None):
+    """
+    Tesseract command line options for a profile, compiled once per process.
+    psm overrides the profile's page segmentation mode (e.g. 7 for one line).
+    """
+    name = name or DEFAULT_PROFILE
+    profile = get_profile(name)
+    parts = [f"--oem {profile['oem']}", f"--psm {psm or profile['psm']}"]
+
+    if profile.get("user_words") or profile.get("user_patterns"):
+        os.makedirs(PROFILE_CACHE_DIR, exist_ok=True)
+    if profile.get("user_words"):
+        path = os.path.join(PROFILE_CACHE_DIR, f"{name}.user-words")
+        _write_list(path, profile["user_words"])
+        parts.append(f"--user-words {shlex.quote(path)}")
+    if profile.get("user_patterns"):
+        path = os.path.join(PROFILE_CACHE_DIR, f"{name}.user-patterns")
+        _write_list(path, profile["user_patterns"])
+        parts.append(f"--user-patterns {shlex.quote(path)}")
+    if profile.get("whitelist"):
+        parts.append("-c " + shlex.quote(f"tessedit_char_whitelist={profile['whitelist']}"))
+
+    return " ".join(parts)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Routes OCR text to the parser of the matching statement format.
+
+Kept free of FastAPI so the batch re-parse CLI can use it as well.
+"""
+
+import re
+
+import bank_statement1_ocr
+import bank_statement2_ocr
+import layout_parser
+
+
+def detect_date_format(text: str) -> str:
+    """
+    Heuristic to detect date format in text.
+    Returns 'MM/DD/YYYY' or 'DD/MM/YYYY'.
+    Defaults to 'DD/MM/YYYY' if ambiguous or not found.
+    """
+    # Look for numeric dates like XX/YY/ZZZZ
+    matches = re.findall(r'(\d{1,2})/(\d{1,2})/(\d{4})', text)
+    
+    for m in matches:
+        val1, val2, year = map(int, m)
+        
+        # If val1 > 12, it must be Day => DD/MM/YYYY
+        if val1 > 12:
+            return 'DD/MM/YYYY'
+        # If val2 > 12, it must be Day => MM/DD/YYYY
+        if val2 > 12:
+            return 'MM/DD/YYYY'
+            
+    # Fallback to checking Month names if numeric not found
+    if re.search(r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},\s+\d{4}', text):
+        return 'MM/DD/YYYY' # bank_statement1_ocr style
+        
+    return 'DD/MM/YYYY' # Default to 2
+
+
+def profile_for_format(date_format: str) -> str:
+    """
+    Tesseract profile (statement_profiles) of the parser a date format routes to.
+    """
+    if date_format == 'MM/DD/YYYY':
+        return bank_statement1_ocr.PROFILE
+    return bank_statement2_ocr.PROFILE
+
+
+def parse_extracted_text(text: str, date_format: str = None):
+    """
+    Detects the date format (unless already known, e.g. from format_probe)
+    and runs the matching parser. Returns (date_format, transactions).
+    """
+    date_format = date_format or detect_date_format(text)
+    print(f"DEBUG: Detected date format: {date_format}")
+
+    if date_format == 'MM/DD/YYYY':
+        print("Routing to bank_statement1_ocr (PhonePe/Standard style)")
+        transactions = bank_statement1_ocr.parse_transactions(text)
+    else:
+        print("Routing to bank_statement2_ocr (Paytm/Custom style)")
+        transactions = bank_statement2_ocr.parse_transactions(text)
+    return date_format, transactions
+
+
+def parse_pages(pages, date_format: str = None):
+    """
+    Like parse_extracted_text but for page records. Pages OCR'd with word
+    boxes are parsed by column position (layout_parser) when the statement
+    has the column table; otherwise the joined text goes to the text parsers.
+    """
+    text = "".join(page["text"] for page in pages)
+    if any(page.get("words") for page in pages):
+        date_format = date_format or detect_date_format(text)
+        if date_format == 'MM/DD/YYYY':
+            transactions = layout_parser.parse_pages(pages)
+            if transactions is not None:
+                print("Parsed by column layout (word boxes)")
+                return date_format, transactions
+    return parse_extracted_text(text, date_format)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Layout pre-pass that finds the transaction table on a statement page.
+
+Logos, promotional banners, "Your Account" boxes, footers and whitespace are
+cut away before OCR, so Tesseract reads fewer pixels and the parsers see less
+noise. Works on projection profiles only (no OCR):
+
+1. the horizontal ink profile splits the page into text line bands
+2. inside each band a horizontally dilated column profile counts the text
+   segments; transaction rows have several well separated segments
+   (date | details | type | amount) spanning most of the page width
+3. the table is the span from the first to the last such row
+
+Pages without a clear table (fewer than MIN_TABLE_ROWS rows) are left alone.
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+TABLE_CROP = os.environ.get("TABLE_CROP", "0") == "1"
+
+MIN_TABLE_ROWS = 3
+# A table row has at least this many text segments...
+MIN_ROW_SEGMENTS = 2
+# ...spread over at least this fraction of the page width
+MIN_ROW_SPAN = 0.5
+# Gap (fraction of page width) that separates two segments of one row
+SEGMENT_GAP = 0.03
+# Rows of the profile with less ink than this fraction of the width are blank
+INK_THRESHOLD = 0.002
+PADDING = 12
+
+
+def binarize(gray):
+    """
+    Ink = 255, paper = 0.
+    """
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return binary
+
+
+def _runs(mask):
+    """
+    (start, end) pairs of the True runs of a 1D boolean array.
+    """
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+def _close_1d(mask, gap):
+    """
+    Fills False runs shorter than `gap` that lie between two True values.
+    """
+    closed = mask.copy()
+    for start, end in _runs(~mask):
+        if start > 0 and end < len(mask) and end - start < gap:
+            closed[start:end] = True
+    return closed
+
+
+def find_line_bands(binary, min_gap=None):
+    """
+    Returns [(top, bottom), ...] of the text line bands of a binarized page.
+    Blank runs shorter than min_gap rows do not split a band.
+    """
+    height, width = binary.shape
+    min_gap = min_gap if min_gap is not None else max(2, height // 400)
+
+    inked = np.count_nonzero(binary, axis=1) > width * INK_THRESHOLD
+    return _runs(_close_1d(inked, min_gap))
+
+
+def row_segments(binary, top, bottom):
+    """
+    Horizontal text segments [(left, right), ...] inside one line band.
+    """
+    width = binary.shape[1]
+    gap = max(3, int(width * SEGMENT_GAP))
+    cols = np.count_nonzero(binary[top:bottom], axis=0) > 0
+    # Close gaps narrower than `gap` so words of one cell merge
+    return _runs(_close_1d(cols, gap))
+
+
+def is_table_row(segments, width):
+    if len(segments) < MIN_ROW_SEGMENTS:
+        return False
+    span = segments[-1][1] - segments[0][0]
+    return span >= width * MIN_ROW_SPAN
+
+
+def find_table_region(gray):
+    """
+    Returns (top, bottom, left, right) of the transaction table, or None when
+    the page has no clear table.
+    """
+    binary = binarize(gray)
+    height, width = binary.shape
+    bands = find_line_bands(binary)
+
+    table_rows = []
+    for top, bottom in bands:
+        segments = row_segments(binary, top, bottom)
+        if is_table_row(segments, width):
+            table_rows.append((top, bottom, segments[0][0], segments[-1][1]))
+
+    if len(table_rows) < MIN_TABLE_ROWS:
+        return None
+
+    top = table_rows[0][0]
+    bottom = table_rows[-1][1]
+    # Multi-line cells (Transaction ID, UTR...) below the last row belong to it
+    following = [b for b in bands if b[0] >= bottom]
+    if following:
+        row_height = int(np.median([r[1] - r[0] for r in table_rows]))
+        for band_top, band_bottom in following:
+            if band_top - bottom > row_height * 2:
+                break
+            bottom = band_bottom
+
+    left = min(r[2] for r in table_rows)
+    right = max(r[3] for r in table_rows)
+    return (
+        max(0, top - PADDING),
+        min(height, bottom + PADDING),
+        max(0, left - PADDING),
+        min(width, right + PADDING),
+    )
+
+
+def crop_to_table(gray):
+    """
+    Returns (cropped_image, region). The page is returned unchanged with
+    region None when no table was found.
+    """
+    region = find_table_region(gray)
+    if region is None:
+        return gray, None
+    top, bottom, left, right = region
+    return gray[top:bottom, left:right], region
@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import cv2
+import numpy as np
+
+import adaptive_dpi
+import bank_statement2_ocr
+import ocr_engine
+import raster_budget
+
+def render_text_page(font_scale, thickness=1):
+    page = np.full((800, 600), 255, dtype=np.uint8)
+    for i, line in enumerate(["Paid to RAKESH KUMAR 40", "Received from ANAM 300", "Mobile recharged 150.14"]):
+        cv2.putText(page, line, (20, 100 + i * 150), cv2.FONT_HERSHEY_SIMPLEX, font_scale, 0, thickness)
+    return page
+
+class TestAdaptiveDPI(unittest.TestCase):
+    def test_large_print_needs_lower_dpi(self):
+        small = adaptive_dpi.estimate_glyph_height(render_text_page(0.5))
+        large = adaptive_dpi.estimate_glyph_height(render_text_page(1.2, 2))
+        self.assertGreater(large, small)
+        self.assertLessEqual(adaptive_dpi.choose_dpi(large), adaptive_dpi.choose_dpi(small))
+
+    def test_dpi_is_clamped_and_stepped(self):
+        self.assertEqual(adaptive_dpi.choose_dpi(100.0), adaptive_dpi.MIN_DPI)
+        self.assertEqual(adaptive_dpi.choose_dpi(1.0), adaptive_dpi.MAX_DPI)
+        self.assertEqual(adaptive_dpi.choose_dpi(None), 300)
+        self.assertEqual(adaptive_dpi.choose_dpi(8.0) % adaptive_dpi.DPI_STEP, 0)
+
+    def test_blank_page_has_no_glyphs(self):
+        self.assertIsNone(adaptive_dpi.estimate_glyph_height(np.full((200, 200), 255, dtype=np.uint8)))
+
+class TestTSV(unittest.TestCase):
+    TSV = (
+        "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n"
+        "5\t1\t1\t1\t1\t1\t10\t10\t40\t12\t96.5\tPaid\n"
+        "5\t1\t1\t1\t1\t2\t55\t10\t20\t12\t91\tto\n"
+        "4\t1\t1\t1\t2\t0\t10\t30\t100\t12\t-1\t\n"
+        "5\t1\t1\t1\t2\t1\t10\t30\t40\t12\t40\t₹40\n"
+        "5\t1\t2\t1\t1\t1\t10\t80\t40\t12\t88\tDEBIT\n"
+    )
+
+    def test_parse_and_rebuild_text(self):
+        words = ocr_engine.parse_tsv(self.TSV)
+        self.assertEqual([w["text"] for w in words], ["Paid", "to", "₹40", "DEBIT"])
+        self.assertEqual(words[0]["left"], 10)
+        self.assertEqual(ocr_engine.words_to_text(words), "Paid to\n₹40\n\nDEBIT\n")
+        self.assertAlmostEqual(ocr_engine.mean_confidence(words), (96.5 + 91 + 40 + 88) / 4)
+
+    def test_failed_page_does_not_discard_the_others(self):
+        def fake_render(pdf_path, page_no, dpi, crop_table=False):
+            # Page 3 renders as a preview, then pdftoppm fails on it
+            return None if page_no == 3 and dpi != adaptive_dpi.PREVIEW_DPI else render_text_page(1.0, 2)
+
+        def fake_ocr(gray, config=""):
+            self.assertIsNotNone(gray)
+            return [{"text": "Paid", "conf": 95.0, "left": 0, "top": 0, "width": 10, "height": 10,
+                     "block_num": 1, "par_num": 1, "line_num": 1}]
+
+        fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+        try:
+            with mock.patch.object(adaptive_dpi, "render_gray", fake_render), \
+                    mock.patch.object(adaptive_dpi.page_tiles, "image_to_data", fake_ocr), \
+                    mock.patch.object(raster_budget, "page_sizes", lambda *args: (5, {})):
+                records = bank_statement2_ocr.ocr_pdf_pages(pdf_path, adaptive=True, triage=False, crop_table=False)
+        finally:
+            os.remove(pdf_path)
+        self.assertEqual([r["page"] for r in records], [1, 2, 3, 4, 5])
+        self.assertEqual(records[2]["skipped"], "render failed")
+        self.assertEqual(records[4]["text"].strip(), "Paid")
+
+    def test_tesseract_errors_are_not_swallowed(self):
+        fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+        try:
+            with mock.patch.object(adaptive_dpi, "render_gray", lambda *a, **k: render_text_page(1.0, 2)), \
+                    mock.patch.object(adaptive_dpi.page_tiles, "image_to_data",
+                                      mock.Mock(side_effect=RuntimeError("tesseract failed"))), \
+                    mock.patch.object(raster_budget, "page_sizes", lambda *args: (2, {})):
+                with self.assertRaises(RuntimeError):
+                    bank_statement2_ocr.ocr_pdf_pages(pdf_path, adaptive=True, triage=False, crop_table=False)
+        finally:
+            os.remove(pdf_path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import unittest
+import sys
+import os
+import asyncio
+import time
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import admission
+
+class TestAdmission(unittest.TestCase):
+    def test_concurrency_is_bounded(self):
+        async def scenario():
+            controller = admission.AdmissionController(max_concurrent=2, max_queue=10, queue_timeout=5)
+            peak = 0
+
+            async def job():
+                nonlocal peak
+                async with controller.admit():
+                    peak = max(peak, controller.in_flight)
+                    await asyncio.sleep(0.01)
+
+            await asyncio.gather(*(job() for _ in range(8)))
+            return peak, controller.stats()
+
+        peak, stats = asyncio.run(scenario())
+        self.assertEqual(peak, 2)
+        self.assertEqual(stats["admitted"], 8)
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertGreater(stats["max_wait_ms"], 0)
+
+    def test_full_queue_rejects_fast(self):
+        async def scenario():
+            controller = admission.AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5)
+            release = asyncio.Event()
+
+            async def holder():
+                async with controller.admit():
+                    await release.wait()
+
+            tasks = [asyncio.create_task(holder()) for _ in range(2)]
+            await asyncio.sleep(0.01)  # one running, one queued
+            try:
+                async with controller.admit():
+                    pass
+            except admission.Overloaded as e:
+                error = e
+            release.set()
+            await asyncio.gather(*tasks)
+            return error, controller.stats()
+
+        error, stats = asyncio.run(scenario())
+        self.assertGreaterEqual(error.retry_after, 1)
+        self.assertEqual(stats["rejected"], 1)
+        self.assertEqual(stats["admitted"], 2)
+
+    def test_queue_timeout(self):
+        async def scenario():
+            controller = admission.AdmissionController(max_concurrent=1, max_queue=5, queue_timeout=0.02)
+            release = asyncio.Event()
+
+            async def holder():
+                async with controller.admit():
+                    await release.wait()
+
+            task = asyncio.create_task(holder())
+            await asyncio.sleep(0.01)
+            with self.assertRaises(admission.Overloaded):
+                async with controller.admit():
+                    pass
+            release.set()
+            await task
+            # The slot is usable again after the timeout
+            async with controller.admit():
+                pass
+            return controller.stats()
+
+        stats = asyncio.run(scenario())
+        self.assertEqual(stats["timed_out"], 1)
+        self.assertEqual(stats["queue_depth"], 0)
+
+    def test_background_jobs_wait_instead_of_failing(self):
+        async def scenario():
+            controller = admission.AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=0.01)
+            done = []
+
+            async def job(n):
+                async with controller.admit(reject=False):
+                    await asyncio.sleep(0.02)
+                    done.append(n)
+
+            await asyncio.gather(*(job(n) for n in range(3)))
+            return done
+
+        self.assertEqual(asyncio.run(scenario()), [0, 1, 2])
+
+    def test_shortest_job_first(self):
+        async def scenario():
+            controller = admission.AdmissionController(max_concurrent=1, max_queue=10, queue_timeout=5)
+            release = asyncio.Event()
+            order = []
+
+            async def holder():
+                async with controller.admit():
+                    await release.wait()
+
+            async def job(pages):
+                async with controller.admit(pages=pages):
+                    order.append(pages)
+
+            task = asyncio.create_task(holder())
+            await asyncio.sleep(0.01)
+            jobs = []
+            for pages in (80, 2, 20):
+                jobs.append(asyncio.create_task(job(pages)))
+                await asyncio.sleep(0.001)
+            release.set()
+            await asyncio.gather(task, *jobs)
+            return order
+
+        self.assertEqual(asyncio.run(scenario()), [2, 20, 80])
+
+    def test_aging_prevents_starvation(self):
+        controller = admission.AdmissionController(max_concurrent=1)
+        # 80 pages that waited 100 s beat 2 pages that just arrived
+        self.assertLess(controller.priority(80, since=0, now=100), controller.priority(2, since=100, now=100))
+        self.assertGreater(controller.priority(80, since=99, now=100), controller.priority(2, since=100, now=100))
+        fifo = admission.AdmissionController(max_concurrent=1, scheduler="fifo")
+        self.assertLess(fifo.priority(80, since=0), fifo.priority(2, since=1))
+
+    def test_long_job_yields_between_page_batches(self):
+        async def scenario():
+            controller = admission.AdmissionController(max_concurrent=1, max_queue=10, queue_timeout=5)
+            order = []
+
+            def long_job(pages):
+                # Runs in a thread like process_statement
+                for done in range(pages):
+                    admission.checkpoint(done, pages - done)
+                    order.append("long")
+                    time.sleep(0.005)
+
+            async def long_request():
+                async with controller.admit(pages=24):
+                    await asyncio.to_thread(long_job, 24)
+
+            async def short_request():
+                async with controller.admit(pages=2):
+                    order.append("short")
+
+            task = asyncio.create_task(long_request())
+            await asyncio.sleep(0.02)
+            await asyncio.gather(task, short_request())
+            return order, controller.stats()
+
+        order, stats = asyncio.run(scenario())
+        self.assertEqual(order.count("long"), 24)
+        # The short request ran at the first batch boundary, not after all 24 pages
+        self.assertEqual(order.index("short"), admission.PAGE_BATCH)
+        self.assertEqual(stats["yielded"], 1)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_checkpoint_without_slot_is_a_no_op(self):
+        self.assertFalse(admission.checkpoint(admission.PAGE_BATCH, 10))
+
+if __name__ == '__main__':
+    unittest.main()
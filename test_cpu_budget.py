@@ -0,0 +1,74 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import cpu_budget
+
+class TestCpuBudget(unittest.TestCase):
+    def setUp(self):
+        self.saved = (cpu_budget.CORES, cpu_budget._fixed_threads, cpu_budget._last_autotune,
+                      os.environ.get("OMP_THREAD_LIMIT"))
+        cpu_budget.CORES = 8
+        cpu_budget._fixed_threads = None
+
+    def tearDown(self):
+        cpu_budget.CORES, cpu_budget._fixed_threads, cpu_budget._last_autotune, omp = self.saved
+        if omp is None:
+            os.environ.pop("OMP_THREAD_LIMIT", None)
+        else:
+            os.environ["OMP_THREAD_LIMIT"] = omp
+
+    def test_share(self):
+        self.assertEqual(cpu_budget.share(1), 8)
+        self.assertEqual(cpu_budget.share(3), 2)
+        self.assertEqual(cpu_budget.share(16), 1)
+        self.assertEqual(cpu_budget.share(1, cap=4), 4)
+
+    def test_threads_shrink_with_concurrent_calls(self):
+        with cpu_budget.ocr_call() as env:
+            self.assertEqual(env["OMP_THREAD_LIMIT"], "4")
+            with cpu_budget.ocr_call() as second:
+                with cpu_budget.ocr_call() as third:
+                    self.assertEqual(third["OMP_THREAD_LIMIT"], "2")
+        self.assertEqual(cpu_budget.stats()["active_tesseract_calls"], 0)
+
+    def test_worker_share_is_fixed(self):
+        cpu_budget.configure_worker(4)
+        self.assertEqual(cpu_budget._fixed_threads, 2)
+        self.assertEqual(os.environ["OMP_THREAD_LIMIT"], "2")
+        with cpu_budget.ocr_call() as env:
+            self.assertEqual(env["OMP_THREAD_LIMIT"], "2")
+
+    def test_candidates_fit_the_machine(self):
+        pairs = cpu_budget.candidates(cores=4)
+        self.assertIn((1, 1), pairs)
+        self.assertIn((4, 1), pairs)
+        for concurrency, threads in pairs:
+            self.assertLessEqual(concurrency * threads, 8)
+
+    def test_autotune_picks_fastest(self):
+        seen = []
+
+        def fake_ocr(image):
+            # Pretend 2 threads per call is the sweet spot
+            threads = cpu_budget.tesseract_threads()
+            seen.append(threads)
+            time.sleep(0.002 if threads == 2 else 0.01)
+            return ""
+
+        best = cpu_budget.autotune(ocr=fake_ocr, image=cpu_budget.synthetic_page(),
+                                   pairs=[(1, 1), (1, 2), (1, 4)])
+        self.assertEqual(best["threads"], 2)
+        self.assertEqual(len(best["results"]), 3)
+        self.assertEqual(cpu_budget._fixed_threads, 2)
+        self.assertEqual(set(seen), {1, 2, 4})
+        # What gunicorn workers find after the master ran it
+        self.assertIs(cpu_budget.last_autotune(), best)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+import subprocess
+import threading
+import time
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import deadline
+import ocr_engine
+import bank_statement2_ocr
+
+class TestDeadline(unittest.TestCase):
+    def test_budget(self):
+        d = deadline.Deadline(0.05)
+        self.assertFalse(d.expired())
+        self.assertLessEqual(d.remaining(), 0.05)
+        self.assertLessEqual(d.timeout(10), 0.05)
+        time.sleep(0.06)
+        self.assertTrue(d.expired())
+        with self.assertRaises(deadline.DeadlineExceeded):
+            d.check()
+
+    def test_no_budget(self):
+        d = deadline.Deadline()
+        self.assertIsNone(d.remaining())
+        self.assertEqual(d.timeout(3), 3)
+        d.check()
+        d.cancel("client disconnected")
+        with self.assertRaisesRegex(deadline.DeadlineExceeded, "client disconnected"):
+            d.check()
+
+    def test_activate_is_scoped(self):
+        self.assertIsNone(deadline.current())
+        d = deadline.Deadline(5)
+        with deadline.activate(d):
+            self.assertIs(deadline.current(), d)
+            self.assertLessEqual(deadline.call_timeout(30), 5)
+        self.assertIsNone(deadline.current())
+        self.assertEqual(deadline.call_timeout(30), 30)
+
+    def test_subprocess_killed_at_deadline(self):
+        start = time.monotonic()
+        with deadline.activate(deadline.Deadline(0.3)):
+            with self.assertRaises(deadline.DeadlineExceeded):
+                ocr_engine._run(["sleep", "5"])
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_subprocess_killed_on_cancel(self):
+        d = deadline.Deadline()
+        threading.Timer(0.2, d.cancel, args=("client disconnected",)).start()
+        start = time.monotonic()
+        with deadline.activate(d):
+            with self.assertRaisesRegex(deadline.DeadlineExceeded, "client disconnected"):
+                ocr_engine._run(["sleep", "5"])
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_plain_timeout_without_deadline(self):
+        with self.assertRaises(subprocess.TimeoutExpired):
+            ocr_engine._run(["sleep", "5"], timeout=0.2)
+        self.assertEqual(ocr_engine._run(["cat"], stdin_bytes=b"P5\n"), "P5\n")
+
+    def test_partial_results(self):
+        records = [{"page": 1, "text": "Oct 23, 2025"}]
+        with deadline.activate(deadline.Deadline(1, partial=True)):
+            result = bank_statement2_ocr.stop_at_deadline(records, 2, 4, deadline.DeadlineExceeded("late"))
+        self.assertEqual([r["page"] for r in result], [1, 2, 3, 4])
+        self.assertEqual(result[-1]["skipped"], "deadline")
+        with deadline.activate(deadline.Deadline(1)):
+            with self.assertRaises(deadline.DeadlineExceeded):
+                bank_statement2_ocr.stop_at_deadline([], 1, 2, deadline.DeadlineExceeded("late"))
+
+if __name__ == '__main__':
+    unittest.main()
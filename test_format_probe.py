@@ -0,0 +1,40 @@
+import unittest
+import sys
+import os
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import format_probe
+from statement_router import parse_extracted_text
+
+class TestFormatProbe(unittest.TestCase):
+    def test_brand_in_header(self):
+        result = format_probe.classify_text("Phone Pe\nTransaction Statement for 98765XXXXX\nOct 01, 2025 - Oct 31, 2025")
+        self.assertEqual(result, {"profile": "phonepe", "date_format": "MM/DD/YYYY", "source": "brand"})
+
+    def test_first_brand_wins(self):
+        text = "Paytm Statement\n14 Dec Paid to PhonePe Merchant - Rs.50"
+        self.assertEqual(format_probe.classify_text(text)["profile"], "paytm")
+
+    def test_dates_when_no_brand(self):
+        self.assertEqual(format_probe.classify_text("Date Details\n25/10/2025 UPI")["date_format"], "DD/MM/YYYY")
+        self.assertEqual(format_probe.classify_text("10/25/2025 UPI")["profile"], "phonepe")
+        self.assertEqual(format_probe.classify_text("Oct 23, 2025 Paid to X")["profile"], "phonepe")
+        self.assertEqual(format_probe.classify_text("14 Dec\n9:30 PM")["profile"], "paytm")
+
+    def test_inconclusive(self):
+        # 05/06/2025 could be either way; leave the choice to the full pass
+        result = format_probe.classify_text("Statement 05/06/2025")
+        self.assertEqual(result, {"profile": None, "date_format": None, "source": None})
+
+    def test_missing_pdf_does_not_raise(self):
+        self.assertIsNone(format_probe.probe_statement("does_not_exist.pdf")["profile"])
+
+    def test_probed_format_skips_detection(self):
+        text = "Oct 23, 2025 Paid to RAKESH KUMAR DEBIT ₹40\n"
+        date_format, _ = parse_extracted_text(text, date_format="DD/MM/YYYY")
+        self.assertEqual(date_format, "DD/MM/YYYY")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import admission
+import health
+
+class TestHealth(unittest.TestCase):
+    def setUp(self):
+        health._self_test = None
+
+    def tearDown(self):
+        health._self_test = None
+
+    def test_self_test_is_cached(self):
+        calls = []
+        with mock.patch.object(health, "check_tesseract", lambda: calls.append("t") or {"text": "OCR 4021"}), \
+                mock.patch.object(health, "check_poppler", lambda: calls.append("p") or {"pages": 1}):
+            first = health.self_test()
+            second = health.self_test()
+            self.assertTrue(first["ok"])
+            self.assertEqual(calls, ["t", "p"])
+            self.assertEqual(second["checked_at"], first["checked_at"])
+            health.self_test(force=True)
+            self.assertEqual(len(calls), 4)
+
+    def test_broken_tesseract_is_not_ready(self):
+        def broken():
+            raise RuntimeError("tesseract is not installed")
+
+        with mock.patch.object(health, "check_tesseract", broken), \
+                mock.patch.object(health, "check_poppler", lambda: {"pages": 1}):
+            ready, report = health.readiness()
+        self.assertFalse(ready)
+        self.assertEqual(report["problems"], ["tesseract"])
+        self.assertIn("not installed", report["self_test"]["tesseract"]["error"])
+
+    def test_saturated_instance_is_not_ready(self):
+        with mock.patch.object(health, "check_tesseract", lambda: {"text": "OCR 4021"}), \
+                mock.patch.object(health, "check_poppler", lambda: {"pages": 1}), \
+                mock.patch.object(admission.controller, "is_full", lambda: True):
+            ready, report = health.readiness()
+        self.assertFalse(ready)
+        self.assertIn("saturated", report["problems"])
+        self.assertTrue(report["load"]["saturated"])
+
+    def test_liveness(self):
+        self.assertEqual(health.liveness()["status"], "ok")
+
+if __name__ == '__main__':
+    unittest.main()
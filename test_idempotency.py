@@ -0,0 +1,140 @@
+import unittest
+import sys
+import os
+import asyncio
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import idempotency
+
+class FakeClient:
+    def __init__(self, gone=False):
+        self.gone = gone
+
+    async def is_disconnected(self):
+        return self.gone
+
+class TestIdempotency(unittest.TestCase):
+    def test_concurrent_requests_share_one_run(self):
+        async def scenario():
+            coalescer = idempotency.Coalescer(ttl=60)
+            runs = []
+
+            async def compute(abandoned):
+                runs.append(1)
+                await asyncio.sleep(0.02)
+                return {"transactions": [1, 2]}
+
+            fp = idempotency.fingerprint("abc", {"tier": "fast"})
+            key = idempotency.request_key("ip:1", None, fp)
+            results = await asyncio.gather(*(coalescer.run(key, fp, compute) for _ in range(3)))
+            replay = await coalescer.run(key, fp, compute)
+            return runs, results, replay, coalescer.stats()
+
+        runs, results, replay, stats = asyncio.run(scenario())
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(sorted(outcome for _, outcome in results), ["computed", "joined", "joined"])
+        self.assertEqual(replay, ({"transactions": [1, 2]}, "replayed"))
+        self.assertEqual(stats["replayed"], 1)
+
+    def test_failures_are_not_stored(self):
+        async def scenario():
+            coalescer = idempotency.Coalescer(ttl=60)
+            attempts = []
+
+            async def flaky(abandoned):
+                attempts.append(1)
+                await asyncio.sleep(0.01)
+                if len(attempts) == 1:
+                    raise RuntimeError("OCR failed")
+                return {"ok": True}
+
+            first = asyncio.gather(coalescer.run("k", "fp", flaky), coalescer.run("k", "fp", flaky),
+                                   return_exceptions=True)
+            errors = await first
+            retry = await coalescer.run("k", "fp", flaky)
+            return errors, retry
+
+        errors, retry = asyncio.run(scenario())
+        self.assertTrue(all(isinstance(e, RuntimeError) for e in errors))
+        self.assertEqual(retry, ({"ok": True}, "computed"))
+
+    def test_key_reuse_with_other_content(self):
+        async def scenario():
+            coalescer = idempotency.Coalescer(ttl=60)
+
+            async def compute(abandoned):
+                return {}
+
+            await coalescer.run("key:ip:1:retry-1", "fp-1", compute)
+            await coalescer.run("key:ip:1:retry-1", "fp-2", compute)
+
+        with self.assertRaises(idempotency.KeyReused):
+            asyncio.run(scenario())
+
+    def test_abandoned_only_when_every_client_left(self):
+        async def scenario():
+            coalescer = idempotency.Coalescer(ttl=60)
+            first, second = FakeClient(), FakeClient()
+            seen = []
+
+            async def compute(abandoned):
+                await asyncio.sleep(0.01)
+                first.gone = True
+                seen.append(await abandoned())
+                second.gone = True
+                seen.append(await abandoned())
+                return {}
+
+            await asyncio.gather(coalescer.run("k", "fp", compute, client=first),
+                                 coalescer.run("k", "fp", compute, client=second))
+            return seen
+
+        self.assertEqual(asyncio.run(scenario()), [False, True])
+
+    def test_expired_entries_run_again(self):
+        async def scenario():
+            coalescer = idempotency.Coalescer(ttl=0)
+
+            async def compute(abandoned):
+                return {}
+
+            await coalescer.run("k", "fp", compute)
+            return await coalescer.run("k", "fp", compute)
+
+        self.assertEqual(asyncio.run(scenario())[1], "computed")
+
+    def test_partial_responses_are_shared_but_not_replayed(self):
+        async def scenario():
+            coalescer = idempotency.Coalescer(ttl=60)
+            runs = []
+
+            async def compute(abandoned):
+                runs.append(1)
+                await asyncio.sleep(0.02)
+                return {"deadline": {"partial": len(runs) == 1, "pages_not_processed": [2, 3]}}
+
+            def complete(response):
+                return not response["deadline"]["partial"]
+
+            first = await asyncio.gather(*(coalescer.run("k", "fp", compute, cacheable=complete) for _ in range(2)))
+            retry = await coalescer.run("k", "fp", compute, cacheable=complete)
+            replay = await coalescer.run("k", "fp", compute, cacheable=complete)
+            return runs, first, retry, replay
+
+        runs, first, retry, replay = asyncio.run(scenario())
+        self.assertEqual(sorted(outcome for _, outcome in first), ["computed", "joined"])
+        # The retry runs again instead of getting the truncated result
+        self.assertEqual(retry[1], "computed")
+        self.assertFalse(retry[0]["deadline"]["partial"])
+        self.assertEqual(replay[1], "replayed")
+        self.assertEqual(len(runs), 2)
+
+    def test_fingerprint_covers_options(self):
+        self.assertNotEqual(idempotency.fingerprint("abc", {"tier": "fast"}),
+                            idempotency.fingerprint("abc", {"tier": "accurate"}))
+        self.assertEqual(idempotency.request_key("ip:1", "k", "fp"), "key:ip:1:k")
+
+if __name__ == '__main__':
+    unittest.main()
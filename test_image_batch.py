@@ -0,0 +1,52 @@
+import unittest
+import sys
+import os
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import image_batch
+
+def word(text, left, top, width=60, height=20):
+    return {"left": left, "top": top, "width": width, "height": height, "conf": 90.0, "text": text,
+            "block_num": 1, "par_num": 1, "line_num": top, "word_num": 1}
+
+class TestImageBatch(unittest.TestCase):
+    def test_plan_stacks_tiles_with_separators(self):
+        plans = image_batch.plan_canvases([(100, 300), (50, 400)], separator=10)
+        self.assertEqual(len(plans), 1)
+        self.assertEqual(plans[0]["tiles"], [(0, 10, 10), (1, 120, 10)])
+        self.assertEqual(plans[0]["shape"], (180, 420))
+
+    def test_plan_splits_tall_batches(self):
+        plans = image_batch.plan_canvases([(100, 300)] * 5, separator=10, max_height=250)
+        self.assertEqual([len(p["tiles"]) for p in plans], [2, 2, 1])
+        self.assertTrue(all(p["shape"][0] <= 250 for p in plans))
+        self.assertEqual([t[0] for p in plans for t in p["tiles"]], [0, 1, 2, 3, 4])
+
+    def test_compose_keeps_separators_blank(self):
+        tiles = {0: np.zeros((100, 300), np.uint8), 1: np.zeros((50, 400), np.uint8)}
+        plan = image_batch.plan_canvases([(100, 300), (50, 400)], separator=10)[0]
+        canvas = image_batch.compose(tiles, plan)
+        self.assertTrue((canvas[110:120] == 255).all())
+        self.assertTrue((canvas[10:110, 10:310] == 0).all())
+
+    def test_words_split_back_to_tiles(self):
+        tiles = {0: np.zeros((100, 300), np.uint8), 1: np.zeros((50, 400), np.uint8)}
+        plan = image_batch.plan_canvases([(100, 300), (50, 400)], separator=10)[0]
+        words = [word("Paid", 20, 20), word("₹40", 200, 80), word("Received", 20, 130), word("~", 20, 111, height=6)]
+        by_tile = image_batch.split_words(words, tiles, plan)
+        self.assertEqual([w["text"] for w in by_tile[0]], ["Paid", "₹40"])
+        self.assertEqual([w["text"] for w in by_tile[1]], ["Received"])
+        # Coordinates are relative to the source screenshot
+        self.assertEqual((by_tile[1][0]["left"], by_tile[1][0]["top"]), (10, 10))
+
+    def test_undecodable_images_are_reported(self):
+        records = image_batch.ocr_image_batch([b"not an image", b""], config="")
+        self.assertEqual([r["page"] for r in records], [1, 2])
+        self.assertTrue(all("error" in r and r["text"] == "" for r in records))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import cv2
+import numpy as np
+
+import image_pipeline
+
+def screenshot(dark=False, font_scale=0.6):
+    img = np.full((800, 480), 255, dtype=np.uint8)
+    for i, line in enumerate(["Paid to RAKESH KUMAR", "Oct 23, 2025", "Rs 40", "Mobile recharged"] * 3):
+        cv2.putText(img, line, (20, 60 + i * 55), cv2.FONT_HERSHEY_SIMPLEX, font_scale, 0, 1)
+    if dark:
+        img = 255 - img
+    return img
+
+def encode(img, ext=".png"):
+    ok, buf = cv2.imencode(ext, img)
+    assert ok
+    return buf.tobytes()
+
+class TestImagePipeline(unittest.TestCase):
+    def test_decode_to_grayscale(self):
+        colour = cv2.cvtColor(screenshot(), cv2.COLOR_GRAY2BGR)
+        gray = image_pipeline.decode_image(encode(colour, ".jpg"))
+        self.assertEqual(gray.ndim, 2)
+        self.assertEqual(gray.shape, (800, 480))
+
+    def test_rejects_garbage_and_huge_images(self):
+        with self.assertRaises(image_pipeline.InvalidImage):
+            image_pipeline.decode_image(b"%PDF-1.4 not an image")
+        with self.assertRaises(image_pipeline.InvalidImage):
+            image_pipeline.decode_image(encode(screenshot()), max_pixels=1000)
+
+    def test_small_text_is_upscaled_before_threshold(self):
+        binary = image_pipeline.preprocess(screenshot(font_scale=0.5))
+        self.assertGreater(binary.shape[0], 800)
+        self.assertEqual(set(np.unique(binary)), {0, 255})
+        self.assertLessEqual(binary.shape[0], 800 * image_pipeline.MAX_SCALE)
+
+    def test_dark_mode_is_inverted(self):
+        binary = image_pipeline.preprocess(screenshot(dark=True))
+        # Mostly white paper with dark text, like a light screenshot
+        self.assertGreater(binary.mean(), 200)
+
+    def test_buffers_are_reused(self):
+        first = image_pipeline.preprocess(screenshot())
+        second = image_pipeline.preprocess(screenshot())
+        self.assertIs(first, second)
+
+    def test_upscale_is_capped_and_large_buffers_not_kept(self):
+        gray = screenshot(font_scale=0.5)
+        with mock.patch.object(image_pipeline, "MAX_SCALED_PIXELS", 800 * 480 * 2), \
+                mock.patch.object(image_pipeline, "MAX_REUSED_PIXELS", 800 * 480):
+            binary = image_pipeline.preprocess(gray)
+            self.assertLessEqual(binary.size, 800 * 480 * 2)
+            self.assertIsNot(image_pipeline.preprocess(gray), binary)
+        self.assertFalse(any(buf.size > 800 * 480 for buf in image_pipeline._local.buffers.values()))
+
+    def test_tall_screenshot_is_ocrd_in_tiles(self):
+        heights = []
+
+        def fake_ocr(tile, config=""):
+            heights.append(tile.shape[0])
+            return "Paid\n"
+
+        tall = np.full((40000, 300), 255, dtype=np.uint8)
+        with mock.patch.object(image_pipeline, "choose_scale", lambda gray: 1.0), \
+                mock.patch.object(image_pipeline.page_tiles.ocr_engine, "image_to_string", fake_ocr):
+            record = image_pipeline.ocr_image_bytes(encode(tall), "")
+        self.assertGreater(len(heights), 1)
+        self.assertLessEqual(max(heights), image_pipeline.page_tiles.TESSERACT_MAX_HEIGHT)
+        self.assertEqual(record["image_size"], [300, 40000])
+
+    def test_no_debug_file_written(self):
+        cwd = os.getcwd()
+        before = os.path.exists(os.path.join(cwd, "processed.jpg"))
+        image_pipeline.preprocess(screenshot())
+        self.assertEqual(os.path.exists(os.path.join(cwd, "processed.jpg")), before)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import io
+import sys
+import os
+import tempfile
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import ingest_guard
+
+PDFINFO_OUTPUT = """Producer:       PhonePe
+Pages:          3
+Page    1 size: 595.32 x 841.92 pts (A4)
+Page    2 size: 595.32 x 841.92 pts (A4)
+Page    3 size: 595.32 x 4000 pts
+"""
+
+class TestIngestGuard(unittest.TestCase):
+    def test_parse_pdfinfo(self):
+        info = ingest_guard.parse_pdfinfo(PDFINFO_OUTPUT)
+        self.assertEqual(info["pages"], 3)
+        self.assertEqual(info["page_sizes"][1], (595.32, 841.92))
+        self.assertEqual(len(info["page_sizes"]), 3)
+
+    def test_limits(self):
+        a4 = (595.32, 841.92)
+        self.assertEqual(ingest_guard.check_pdf_limits({"pages": 2, "page_sizes": {1: a4, 2: a4}})[0], ingest_guard.ACCEPT)
+
+        pages = ingest_guard.ASYNC_PAGE_THRESHOLD + 1
+        self.assertEqual(ingest_guard.check_pdf_limits({"pages": pages, "page_sizes": {1: a4}})[0], ingest_guard.ASYNC)
+
+        pages = ingest_guard.MAX_PDF_PAGES + 1
+        self.assertEqual(ingest_guard.check_pdf_limits({"pages": pages, "page_sizes": {1: a4}})[0], ingest_guard.REJECT)
+
+        # Only the requested page range counts
+        pages = ingest_guard.MAX_PDF_PAGES + 50
+        info = {"pages": pages, "page_sizes": {51: a4}}
+        self.assertEqual(ingest_guard.check_pdf_limits(info, first_page=51, last_page=52)[0], ingest_guard.ACCEPT)
+
+        # One huge page is rejected even in a short document
+        info = ingest_guard.parse_pdfinfo(PDFINFO_OUTPUT)
+        decision, reason = ingest_guard.check_pdf_limits(info)
+        self.assertEqual(decision, ingest_guard.REJECT)
+        self.assertIn("Page 3", reason)
+        # ...unless it is outside the requested range
+        self.assertEqual(ingest_guard.check_pdf_limits(info, first_page=1, last_page=2)[0], ingest_guard.ACCEPT)
+
+        # A range outside the document is a bad request, not an oversized one
+        self.assertEqual(ingest_guard.check_pdf_limits(info, first_page=5, last_page=6)[0], ingest_guard.INVALID)
+
+    def test_chunked_upload_is_cut_off_while_it_arrives(self):
+        app = FastAPI()
+        app.add_middleware(ingest_guard.UploadSizeLimit, max_bytes=64 * 1024)
+        reached = []
+
+        @app.post("/upload")
+        async def upload(file: UploadFile = File(...)):
+            reached.append(file.filename)
+            return {"size": len(await file.read())}
+
+        def multipart(size):
+            yield b'--b\r\nContent-Disposition: form-data; name="file"; filename="s.pdf"\r\n\r\n'
+            for _ in range(size // 1024):
+                yield b"x" * 1024
+            yield b"\r\n--b--\r\n"
+
+        client = TestClient(app)
+        headers = {"Content-Type": "multipart/form-data; boundary=b"}
+        # No Content-Length: the body is streamed in chunks
+        response = client.post("/upload", content=multipart(1024 * 1024), headers=headers)
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(reached, [])
+        response = client.post("/upload", content=multipart(8 * 1024), headers=headers)
+        self.assertEqual(response.json(), {"size": 8 * 1024})
+
+    def test_upload_cap_removes_partial_file(self):
+        path = os.path.join(tempfile.mkdtemp(), "upload.pdf")
+        with self.assertRaises(ingest_guard.UploadTooLarge):
+            ingest_guard.save_upload_capped(io.BytesIO(b"x" * 5000), path, max_bytes=1000)
+        self.assertFalse(os.path.exists(path))
+
+        self.assertEqual(ingest_guard.save_upload_capped(io.BytesIO(b"%PDF-1.4"), path, max_bytes=1000), 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import job_store
+
+class TestJobStore(unittest.TestCase):
+    def setUp(self):
+        self._old_dir = job_store.JOB_STORE_DIR
+        job_store.JOB_STORE_DIR = tempfile.mkdtemp()
+
+    def tearDown(self):
+        job_store.JOB_STORE_DIR = self._old_dir
+
+    def test_job_lifecycle(self):
+        job_store.create_job("job-1", filename="Statement.pdf", pages=120)
+        self.assertEqual(job_store.load_job("job-1")["status"], "queued")
+
+        job_store.update_job("job-1", status="done", result={"transaction_count": 3})
+        job = job_store.load_job("job-1")
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["filename"], "Statement.pdf")
+        self.assertEqual(job["result"]["transaction_count"], 3)
+        self.assertEqual(os.listdir(job_store.JOB_STORE_DIR), ["job-1.json"])
+
+    def test_unknown_and_invalid_ids(self):
+        self.assertIsNone(job_store.load_job("missing"))
+        self.assertIsNone(job_store.load_job("../../etc/passwd"))
+        with self.assertRaises(ValueError):
+            job_store.create_job("../evil")
+
+if __name__ == '__main__':
+    unittest.main()
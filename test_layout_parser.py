@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import layout_parser
+from statement_router import parse_pages
+
+# Header x positions of the PhonePe table at 300 DPI
+COLUMN_X = {"date": 60, "details": 420, "type": 1500, "amount": 1900}
+
+def words_for(lines, top=200, conf=95.0):
+    """
+    lines: [{column: text}, ...] -> Tesseract like word dicts
+    """
+    words = []
+    for i, line in enumerate(lines):
+        y = top + i * 50
+        for column, text in line.items():
+            x = COLUMN_X[column]
+            for token in text.split():
+                words.append({"left": x, "top": y, "width": 20 * len(token), "height": 30,
+                              "conf": conf, "text": token})
+                x += 20 * len(token) + 15
+    return words
+
+HEADER = {"date": "Date", "details": "Transaction Details", "type": "Type", "amount": "Amount"}
+
+PAGE = [
+    HEADER,
+    {"date": "Oct 23, 2025", "details": "Paid to RAKESH KUMAR", "type": "DEBIT", "amount": "₹40"},
+    {"date": "10:15 am", "details": "Transaction ID T2510231015"},
+    {"details": "UTR No. 529612345678"},
+    {"date": "Oct 21, 2025", "details": "Mobile recharged 9876543210", "type": "DEBIT", "amount": "₹150.14"},
+    {"date": "08:02 pm", "details": "Transaction ID T2510210802"},
+    {"date": "Oct 01, 2025", "details": "Received from ANAM ANSARI", "type": "CREDIT", "amount": "₹2,300"},
+    {"details": "Paid by XXXXXX1234"},
+]
+
+class TestLayoutParser(unittest.TestCase):
+    def test_columns_from_header(self):
+        transactions = layout_parser.parse_pages([{"page": 1, "words": words_for(PAGE)}])
+        self.assertEqual([t["Date"] for t in transactions], ["Oct 23, 2025", "Oct 21, 2025", "Oct 01, 2025"])
+        self.assertEqual([t["Type"] for t in transactions], ["DEBIT", "DEBIT", "CREDIT"])
+        # Amounts starting with 2 are kept when the rupee sign was read
+        self.assertEqual([t["Amount"] for t in transactions], ["40", "150.14", "2300"])
+        self.assertEqual(transactions[0]["Description"], "Paid to RAKESH KUMAR")
+        self.assertEqual(transactions[0]["Category"], "Personal")
+        self.assertEqual(transactions[2]["Description"], "Received from ANAM ANSARI")
+
+    def test_number_in_details_is_not_the_amount(self):
+        transactions = layout_parser.parse_pages([{"page": 1, "words": words_for(PAGE)}])
+        self.assertEqual(transactions[1]["Description"], "Mobile recharged 9876543210")
+        self.assertEqual(transactions[1]["Amount"], "150.14")
+
+    def test_wrapped_description(self):
+        page = [
+            HEADER,
+            {"date": "Oct 05, 2025", "details": "Paid to ARCHAEOLOGICAL SURVEY", "type": "DEBIT", "amount": "₹60"},
+            {"date": "09:00 am", "details": "OF INDIA"},
+            {"details": "Transaction ID T1"},
+        ]
+        transactions = layout_parser.parse_pages([{"page": 1, "words": words_for(page)}])
+        self.assertEqual(transactions[0]["Description"], "Paid to ARCHAEOLOGICAL SURVEY OF INDIA")
+
+    def test_misread_rupee_sign(self):
+        self.assertEqual(layout_parser.parse_amount("740"), "40")
+        self.assertEqual(layout_parser.parse_amount("₹740"), "740")
+        self.assertEqual(layout_parser.parse_amount("Rs. 1,250.00"), "1250.00")
+        self.assertIsNone(layout_parser.parse_amount("—"))
+
+    def test_header_carries_over_pages(self):
+        second = [{"date": "Sep 30, 2025", "details": "Paid to Flipkart", "type": "DEBIT", "amount": "₹756"}]
+        pages = [{"page": 1, "words": words_for(PAGE)}, {"page": 2, "words": words_for(second)}]
+        transactions = layout_parser.parse_pages(pages)
+        self.assertEqual(len(transactions), 4)
+        self.assertEqual(transactions[-1]["Amount"], "756")
+
+    def test_no_header_falls_back(self):
+        self.assertIsNone(layout_parser.parse_pages([{"page": 1, "words": words_for(PAGE[1:])}]))
+
+    def test_router_uses_layout(self):
+        text = "Oct 23, 2025 Paid to RAKESH KUMAR DEBIT 740\n"
+        pages = [{"page": 1, "text": text, "words": words_for(PAGE)}]
+        date_format, transactions = parse_pages(pages)
+        self.assertEqual(date_format, "MM/DD/YYYY")
+        self.assertEqual(len(transactions), 3)
+        self.assertIn("Confidence", transactions[0])
+
+if __name__ == '__main__':
+    unittest.main()
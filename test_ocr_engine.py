@@ -0,0 +1,39 @@
+import unittest
+import sys
+import os
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import ocr_engine
+
+class TestRawHandoff(unittest.TestCase):
+    def test_grayscale_becomes_pgm(self):
+        img = np.full((4, 5), 200, dtype=np.uint8)
+        data = ocr_engine.to_pnm_bytes(img)
+
+        self.assertTrue(data.startswith(b"P5\n5 4\n255\n"))
+        # Raw pixels, no compression
+        self.assertEqual(len(data), len(b"P5\n5 4\n255\n") + 20)
+
+    def test_colour_becomes_ppm(self):
+        img = np.zeros((2, 3, 3), dtype=np.uint8)
+        data = ocr_engine.to_pnm_bytes(img)
+
+        self.assertTrue(data.startswith(b"P6\n3 2\n255\n"))
+        self.assertEqual(len(data), len(b"P6\n3 2\n255\n") + 18)
+
+    def test_stats_report_averages(self):
+        ocr_engine.reset_handoff_stats()
+        ocr_engine._record("pipe", 0.001, 0.010)
+        ocr_engine._record("pipe", 0.003, 0.030)
+
+        stats = ocr_engine.get_handoff_stats()
+        self.assertEqual(stats["pipe"]["pages"], 2)
+        self.assertEqual(stats["pipe"]["avg_encode_ms"], 2.0)
+        self.assertEqual(stats["pipe"]["avg_total_ms"], 20.0)
+        ocr_engine.reset_handoff_stats()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import ocr_store
+import reparse_documents
+
+PAGE_1 = """
+Oct 23, 2025
+Paid to RAKESH KUMAR
+DEBIT
+₹40
+"""
+
+PAGE_2 = """
+Oct 18, 2025
+Paid to Flipkart
+DEBIT ₹756
+"""
+
+class TestOCRStore(unittest.TestCase):
+    def setUp(self):
+        self._old_dir = ocr_store.OCR_STORE_DIR
+        ocr_store.OCR_STORE_DIR = tempfile.mkdtemp()
+
+    def tearDown(self):
+        ocr_store.OCR_STORE_DIR = self._old_dir
+
+    def test_round_trip(self):
+        ocr_store.save_document("doc-1", [PAGE_1, PAGE_2], first_page=3, filename="Statement.pdf")
+
+        document = ocr_store.load_document("doc-1")
+        self.assertEqual([p["page"] for p in document["pages"]], [3, 4])
+        self.assertEqual(ocr_store.document_text(document), PAGE_1 + PAGE_2)
+        self.assertEqual(ocr_store.list_documents(), ["doc-1"])
+
+    def test_rejects_path_traversal(self):
+        self.assertIsNone(ocr_store.load_document("../../etc/passwd"))
+        with self.assertRaises(ValueError):
+            ocr_store.save_document("../evil", [PAGE_1])
+
+    def test_reparse_without_ocr(self):
+        ocr_store.save_document("doc-2", [PAGE_1, PAGE_2])
+
+        result = reparse_documents.reparse("doc-2")
+        self.assertEqual(result["detected_format"], "MM/DD/YYYY")
+        self.assertEqual(result["transaction_count"], 2)
+        self.assertIsNone(reparse_documents.reparse("missing"))
+
+    def test_reparse_keeps_stored_date_format(self):
+        ocr_store.save_document("doc-3", [PAGE_1, PAGE_2], date_format="DD/MM/YYYY")
+
+        result = reparse_documents.reparse("doc-3")
+        self.assertEqual(result["detected_format"], "DD/MM/YYYY")
+
+if __name__ == '__main__':
+    unittest.main()
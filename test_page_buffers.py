@@ -0,0 +1,48 @@
+import unittest
+import sys
+import os
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+import page_buffers
+
+def _sum_page(descriptor):
+    with page_buffers.attach(descriptor) as page:
+        return int(page.sum())
+
+class TestPageBuffers(unittest.TestCase):
+    def test_worker_reads_shared_page(self):
+        page = np.arange(60 * 40, dtype=np.uint32).reshape(60, 40)
+        with page_buffers.PageBufferPool() as pool:
+            buf = pool.put(page)
+            with ProcessPoolExecutor(max_workers=1) as ex:
+                total = ex.submit(_sum_page, buf.descriptor()).result()
+        self.assertEqual(total, int(page.sum()))
+
+    def test_refcount_unlinks_on_last_release(self):
+        pool = page_buffers.PageBufferPool()
+        buf = pool.allocate((10, 10))
+        buf.retain()
+
+        buf.release()
+        self.assertEqual(pool.live_segments(), 1)
+        buf.release()
+        self.assertEqual(pool.live_segments(), 0)
+
+    def test_segments_cleaned_up_on_failure(self):
+        pool = page_buffers.PageBufferPool()
+        try:
+            with pool:
+                pool.allocate((10, 10))
+                pool.allocate((20, 20))
+                raise RuntimeError("rasterizer failed")
+        except RuntimeError:
+            pass
+        self.assertEqual(pool.live_segments(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
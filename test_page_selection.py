@@ -0,0 +1,59 @@
+import unittest
+import sys
+import os
+from datetime import date, timedelta
+from unittest import mock
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import page_selection
+from page_selection import find_first_date, select_pages, filter_transactions_by_date
+
+class TestPageSelection(unittest.TestCase):
+    def test_find_first_date(self):
+        self.assertEqual(find_first_date("Date\nOct 23, 2025 06:12 PM"), date(2025, 10, 23))
+        self.assertEqual(find_first_date("14/12/2025 Paid to"), date(2025, 12, 14))
+        self.assertEqual(find_first_date("10/23/2025", date_format='MM/DD/YYYY'), date(2025, 10, 23))
+        self.assertEqual(find_first_date("14 Dec 10:20 PM", default_year=2025), date(2025, 12, 14))
+        self.assertIsNone(find_first_date("Statement summary"))
+
+    def test_descending_statement(self):
+        # PhonePe: newest first, one page per month
+        first_dates = [date(2025, 12, 28), date(2025, 11, 30), date(2025, 10, 29), date(2025, 9, 30)]
+        self.assertEqual(select_pages(first_dates, date(2025, 12, 1), date(2025, 12, 31)), (1, 1))
+        self.assertEqual(select_pages(first_dates, date(2025, 11, 15), date(2025, 12, 5)), (1, 2))
+        self.assertEqual(select_pages(first_dates, date(2025, 9, 1), date(2025, 9, 15)), (4, 4))
+        self.assertIsNone(select_pages(first_dates, date(2026, 1, 1), date(2026, 1, 31)))
+
+    def test_ascending_statement_with_unreadable_page(self):
+        first_dates = [date(2025, 1, 2), date(2025, 2, 1), None, date(2025, 4, 1)]
+        # Page 3 has no readable date but sits between the matching pages
+        self.assertEqual(select_pages(first_dates, date(2025, 3, 10), date(2025, 3, 20)), (2, 3))
+        self.assertEqual(select_pages(first_dates, date(2025, 4, 10)), (3, 4))
+
+    def test_date_range_bisects_instead_of_probing_every_page(self):
+        # 40 pages, newest first, page 12 unreadable
+        first_dates = [date(2025, 12, 31) - timedelta(days=7 * i) for i in range(40)]
+        first_dates[11] = None
+        probed = []
+
+        def probe(pdf_path, page_no, date_format, default_year):
+            probed.append(page_no)
+            return first_dates[page_no - 1]
+
+        with mock.patch.object(page_selection, "probe_page_date", probe):
+            for date_from, date_to in [(date(2025, 10, 1), date(2025, 10, 20)), (date(2025, 9, 1), None),
+                                       (None, date(2024, 1, 1)), (date(2026, 1, 1), None)]:
+                probed.clear()
+                self.assertEqual(page_selection.pages_for_date_range("x.pdf", 1, 40, date_from, date_to),
+                                 select_pages(first_dates, date_from, date_to))
+                self.assertLess(len(set(probed)), 20)
+
+    def test_filter_transactions(self):
+        rows = [{"Date": "Oct 23, 2025"}, {"Date": "Sep 30, 2025"}, {"Date": "???"}]
+        kept = filter_transactions_by_date(rows, date(2025, 10, 1), date(2025, 10, 31))
+        self.assertEqual([r["Date"] for r in kept], ["Oct 23, 2025", "???"])
+
+if __name__ == '__main__':
+    unittest.main()
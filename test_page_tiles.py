@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import threading
+from unittest import mock
+
+import cv2
+import numpy as np
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import page_tiles
+
+def tall_page(rows=120, row_height=70):
+    page = np.full((rows * row_height + 100, 1200), 255, dtype=np.uint8)
+    for i in range(rows):
+        cv2.putText(page, f"Oct {i % 28 + 1:02d}, 2025  Paid to Store {i}  DEBIT  Rs {i}.00",
+                    (40, 60 + i * row_height), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+    return page
+
+class TestPageTiles(unittest.TestCase):
+    def test_short_pages_are_not_split(self):
+        self.assertEqual(page_tiles.plan_tiles(3508, workers=8), 1)
+        self.assertEqual(page_tiles.plan_tiles(9000, workers=8), 6)
+        self.assertEqual(page_tiles.plan_tiles(9000, workers=2), 2)
+
+    def test_pages_over_the_tesseract_limit_are_always_split(self):
+        self.assertEqual(page_tiles.plan_tiles(40000, workers=1), 2)
+        self.assertEqual(page_tiles.plan_tiles(70000, workers=2), 3)
+
+    def test_single_worker_tall_page_fits_tesseract(self):
+        page = tall_page(rows=575)
+        self.assertGreater(page.shape[0], page_tiles.TESSERACT_MAX_HEIGHT)
+        tiles = page_tiles.split_page(page, workers=1)
+        self.assertEqual(len(tiles), 2)
+        self.assertTrue((page[tiles[0][1] - 1:tiles[0][1] + 2] == 255).all())
+        self.assertLessEqual(max(b - t for t, b in tiles), page_tiles.TESSERACT_MAX_HEIGHT)
+
+    def test_cut_is_forced_when_there_is_no_gap(self):
+        page = np.full((40000, 200), 255, dtype=np.uint8)
+        page[:, 90:110] = 0
+        tiles = page_tiles.split_page(page, workers=1)
+        self.assertEqual(tiles, [(0, page_tiles.TESSERACT_MAX_HEIGHT), (page_tiles.TESSERACT_MAX_HEIGHT, 40000)])
+
+    def test_cuts_fall_between_text_lines(self):
+        page = tall_page()
+        tiles = page_tiles.split_page(page, workers=4)
+        self.assertEqual(len(tiles), 4)
+        self.assertEqual(tiles[0][0], 0)
+        self.assertEqual(tiles[-1][1], page.shape[0])
+        for (_, bottom), (top, _) in zip(tiles, tiles[1:]):
+            self.assertEqual(bottom, top)
+            # The cut row and its neighbours are blank paper
+            self.assertTrue((page[bottom - 1:bottom + 2] == 255).all())
+        heights = [b - t for t, b in tiles]
+        self.assertLess(max(heights) - min(heights), 300)
+
+    def test_tiles_run_in_parallel_and_stitch_in_order(self):
+        page = tall_page()
+        barrier = threading.Barrier(4, timeout=5)
+
+        def fake_ocr(tile, config=""):
+            # Every tile must be in flight at once to pass the barrier
+            barrier.wait()
+            return [{"text": f"h{tile.shape[0]}", "top": 5, "left": 0, "width": 10, "height": 10,
+                     "block_num": 1, "par_num": 1, "line_num": 1}]
+
+        with mock.patch.object(page_tiles.ocr_engine, "image_to_data", fake_ocr):
+            words = page_tiles.image_to_data(page, workers=4)
+        tiles = page_tiles.split_page(page, workers=4)
+        self.assertEqual([w["top"] for w in words], [top + 5 for top, _ in tiles])
+        self.assertEqual([w["block_num"] for w in words], [1, 3, 5, 7])
+
+    def test_text_is_joined_in_reading_order(self):
+        page = tall_page()
+        with mock.patch.object(page_tiles.ocr_engine, "image_to_string",
+                               lambda tile, config="": f"rows {tile.shape[0]}\n"):
+            text = page_tiles.image_to_string(page, workers=3)
+        heights = [b - t for t, b in page_tiles.split_page(page, workers=3)]
+        self.assertEqual(text, "".join(f"rows {h}\n" for h in heights))
+
+if __name__ == '__main__':
+    unittest.main()
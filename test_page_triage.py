@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import cv2
+import numpy as np
+
+import page_triage
+
+def render_page(rows, noise=False):
+    page = np.full((1754, 1240), 255, dtype=np.uint8)
+    cv2.putText(page, "Transaction Statement", (50, 280), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 0, 3)
+    for i, (date, desc, amount) in enumerate(rows):
+        y = 400 + i * 140
+        cv2.putText(page, date, (50, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+        cv2.putText(page, desc, (350, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+        cv2.putText(page, amount, (1050, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+    if noise:
+        rng = np.random.default_rng(0)
+        page = np.clip(page.astype(np.int16) + rng.integers(-40, 40, page.shape), 0, 255).astype(np.uint8)
+    return page
+
+PAGE_A = [("Oct 23, 2025", "Paid to RAKESH KUMAR", "Rs 40"), ("Oct 21, 2025", "Mobile recharged", "Rs 150.14")] * 4
+PAGE_B = [("Oct 18, 2025", "Paid to Flipkart", "Rs 756"), ("Oct 01, 2025", "Received from ANAM ANSARI", "Rs 300")] * 4
+
+class TestPageTriage(unittest.TestCase):
+    def test_blank_page_is_skipped(self):
+        triage = page_triage.PageTriage()
+        reason, coverage = triage.check(np.full((1754, 1240), 255, dtype=np.uint8), 4)
+        self.assertEqual(reason, "blank")
+        self.assertLess(coverage, page_triage.BLANK_INK_COVERAGE)
+
+    def test_repeated_page_is_skipped(self):
+        triage = page_triage.PageTriage()
+        self.assertIsNone(triage.check(render_page(PAGE_A), 1)[0])
+        self.assertIsNone(triage.check(render_page(PAGE_B), 2)[0])
+        # Same page again, with scan noise
+        self.assertEqual(triage.check(render_page(PAGE_A, noise=True), 3)[0], "duplicate of page 1")
+
+    def test_same_layout_different_rows_is_kept(self):
+        triage = page_triage.PageTriage()
+        triage.check(render_page(PAGE_A), 1)
+        rows = [("Sep 30, 2025", "Received from Abhishek Kumar Jha", "Rs 10000")] * 8
+        self.assertIsNone(triage.check(render_page(rows), 2)[0])
+
+    def test_same_layout_different_digits_and_names_is_kept(self):
+        triage = page_triage.PageTriage()
+        triage.check(render_page(PAGE_A), 1)
+        rows = [("Oct 22, 2025", "Paid to RAKESH SINGH", "Rs 60"), ("Oct 20, 2025", "Mobile recharged", "Rs 150.40")] * 4
+        page = render_page(rows)
+        # The thumbnails alone would call this a duplicate
+        self.assertLess(page_triage.signature_distance(page_triage.ink_signature(page),
+                                                       page_triage.ink_signature(render_page(PAGE_A))),
+                        page_triage.DUPLICATE_DISTANCE)
+        self.assertIsNone(triage.check(page, 2)[0])
+
+    def test_single_changed_amount_is_kept(self):
+        triage = page_triage.PageTriage()
+        triage.check(render_page(PAGE_A), 1)
+        rows = PAGE_A[:-1] + [(PAGE_A[-1][0], PAGE_A[-1][1], "Rs 150.15")]
+        self.assertIsNone(triage.check(render_page(rows), 2)[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+import shlex
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import processing_tiers
+
+class TestProcessingTiers(unittest.TestCase):
+    def test_every_tier_has_all_settings(self):
+        for name, tier in processing_tiers.TIERS.items():
+            for key in processing_tiers.OCR_OPTIONS + ("oem", "tessdata_dir", "description",
+                                                       "expected_seconds_per_page"):
+                self.assertIn(key, tier, f"{name} misses {key}")
+
+    def test_refinement_is_only_forced_with_word_boxes(self):
+        # refine_weak only acts on word boxes (layout or adaptive OCR)
+        for name, tier in processing_tiers.TIERS.items():
+            if tier["refine_weak"]:
+                self.assertTrue(tier["layout"] or tier["adaptive"], name)
+
+    def test_tiers_are_ordered_by_latency(self):
+        seconds = [processing_tiers.TIERS[n]["expected_seconds_per_page"] for n in ("fast", "balanced", "accurate")]
+        self.assertEqual(seconds, sorted(seconds))
+
+    def test_tier_config_replaces_engine_mode(self):
+        config = processing_tiers.tier_config("fast", "--oem 3 --psm 6")
+        self.assertEqual(shlex.split(config)[:2], ["--oem", "1"])
+        self.assertEqual(shlex.split(config).count("--oem"), 1)
+        self.assertIn("--psm 6", config)
+
+    def test_tier_config_keeps_quoted_whitelist(self):
+        base = "--oem 3 --psm 6 -c 'tessedit_char_whitelist=0123456789 ₹'"
+        args = shlex.split(processing_tiers.tier_config("accurate", base))
+        self.assertIn("tessedit_char_whitelist=0123456789 ₹", args)
+
+    def test_tessdata_dir(self):
+        old = processing_tiers.TIERS["fast"]["tessdata_dir"]
+        processing_tiers.TIERS["fast"]["tessdata_dir"] = "/opt/tessdata fast"
+        try:
+            args = shlex.split(processing_tiers.tier_config("fast", "--psm 6"))
+        finally:
+            processing_tiers.TIERS["fast"]["tessdata_dir"] = old
+        self.assertEqual(args[:2], ["--tessdata-dir", "/opt/tessdata fast"])
+
+    def test_default_tier_and_unknown(self):
+        self.assertEqual(processing_tiers.get_tier(None), processing_tiers.TIERS[processing_tiers.DEFAULT_TIER])
+        with self.assertRaises(KeyError):
+            processing_tiers.get_tier("turbo")
+        self.assertNotIn("tessdata_dir", processing_tiers.describe_tiers()["fast"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import deadline
+import raster_budget
+
+A4 = (595.0, 842.0)
+A3 = (842.0, 1191.0)
+
+class TestRasterBudget(unittest.TestCase):
+    def test_estimates(self):
+        # A4 at 300 DPI is 2480 x 3508 px, ~26 MB as RGB
+        self.assertEqual(raster_budget.page_pixels(A4, 300), 2479 * 3508)
+        self.assertAlmostEqual(raster_budget.estimate_page_bytes(A4, 300, 3) / 1e6, 26.1, delta=0.5)
+        self.assertAlmostEqual(raster_budget.estimate_page_bytes(A3, 300) / raster_budget.estimate_page_bytes(A4, 300),
+                               2.0, delta=0.05)
+        self.assertEqual(raster_budget.estimate_page_bytes(None, 300), raster_budget.estimate_page_bytes(A4, 300))
+
+    def test_in_flight_memory_stays_under_budget(self):
+        budget = raster_budget.MemoryBudget(limit_bytes=100)
+        peak = []
+
+        def page():
+            with budget.reserve(40):
+                peak.append(budget.in_use)
+                time.sleep(0.01)
+
+        threads = [threading.Thread(target=page) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertLessEqual(max(peak), 80)
+        stats = budget.stats()
+        self.assertEqual(stats["reservations"], 6)
+        self.assertGreater(stats["waits"], 0)
+        self.assertEqual(budget.in_use, 0)
+
+    def test_oversized_page_runs_alone(self):
+        budget = raster_budget.MemoryBudget(limit_bytes=100)
+        with budget.reserve(500):
+            self.assertEqual(budget.in_use, 500)
+        self.assertEqual(budget.stats()["oversized_pages"], 1)
+        self.assertEqual(budget.in_use, 0)
+
+    def test_wait_respects_deadline(self):
+        budget = raster_budget.MemoryBudget(limit_bytes=100)
+        budget.acquire(80)
+        with deadline.activate(deadline.Deadline(0.05)):
+            with self.assertRaises(deadline.DeadlineExceeded):
+                budget.acquire(40)
+        budget.release(80)
+        self.assertEqual(budget.in_use, 0)
+
+if __name__ == '__main__':
+    unittest.main()
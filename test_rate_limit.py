@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import rate_limit
+
+LIMITS = {
+    "default": {"pages_per_minute": 60, "burst": 10},
+    "tenants": {"secret-key": {"name": "acme", "pages_per_minute": 600, "burst": 100}},
+}
+
+class TestRateLimit(unittest.TestCase):
+    def test_bucket_counts_pages_and_refills(self):
+        bucket = rate_limit.TokenBucket(pages_per_minute=60, burst=10, now=0)
+        self.assertEqual(bucket.consume(8, now=0), 0.0)
+        # 2 left, 5 needed: 3 pages at 1 page/s
+        self.assertAlmostEqual(bucket.consume(5, now=0), 3.0)
+        self.assertEqual(bucket.consume(5, now=3), 0.0)
+
+    def test_oversized_request_runs_on_full_bucket_and_leaves_debt(self):
+        bucket = rate_limit.TokenBucket(pages_per_minute=60, burst=10, now=0)
+        self.assertEqual(bucket.consume(25, now=0), 0.0)
+        self.assertEqual(bucket.tokens, -15)
+        self.assertGreater(bucket.consume(0, now=5), 0)
+        self.assertEqual(bucket.consume(0, now=16), 0.0)
+
+    def test_tenants_by_key_and_unknown_keys_by_ip(self):
+        limiter = rate_limit.RateLimiter(limits=LIMITS, enabled=True)
+        tenant, limits = limiter.identify("secret-key", "10.0.0.1")
+        self.assertEqual(tenant, "tenant:acme")
+        self.assertEqual(limits["burst"], 100)
+        self.assertEqual(limiter.identify("made-up", "10.0.0.1")[0], "ip:10.0.0.1")
+
+    def test_clients_are_limited_separately(self):
+        limiter = rate_limit.RateLimiter(limits=LIMITS, enabled=True)
+        first, limits = limiter.identify(None, "10.0.0.1")
+        second, _ = limiter.identify(None, "10.0.0.2")
+        self.assertTrue(limiter.consume(first, limits, 10)["allowed"])
+        decision = limiter.consume(first, limits, 5)
+        self.assertFalse(decision["allowed"])
+        self.assertGreaterEqual(decision["retry_after"], 1)
+        self.assertEqual(rate_limit.headers(decision)["Retry-After"], str(decision["retry_after"]))
+        self.assertTrue(limiter.consume(second, limits, 5)["allowed"])
+
+        limiter.refund(first, 5)
+        self.assertTrue(limiter.consume(first, limits, 5)["allowed"])
+        self.assertEqual(limiter.stats()["throttled"], 1)
+
+    def test_headers(self):
+        limiter = rate_limit.RateLimiter(limits=LIMITS, enabled=True)
+        tenant, limits = limiter.identify(None, "10.0.0.1")
+        result = rate_limit.headers(limiter.consume(tenant, limits, 4))
+        self.assertEqual(result["RateLimit-Limit"], "10")
+        self.assertEqual(result["RateLimit-Remaining"], "6")
+        self.assertNotIn("Retry-After", result)
+
+    def test_limits_are_split_between_workers(self):
+        limiter = rate_limit.RateLimiter(limits=LIMITS, enabled=True, workers=2)
+        tenant, limits = limiter.identify(None, "10.0.0.1")
+        decision = limiter.consume(tenant, limits, 5)
+        self.assertTrue(decision["allowed"])
+        self.assertEqual(decision["limit"], 5)
+        self.assertFalse(limiter.consume(tenant, limits, 1)["allowed"])
+
+    def test_disabled(self):
+        limiter = rate_limit.RateLimiter(limits=LIMITS, enabled=False)
+        decision = limiter.consume("ip:1", LIMITS["default"], 1000)
+        self.assertTrue(decision["allowed"])
+        self.assertEqual(rate_limit.headers(decision), {})
+
+if __name__ == '__main__':
+    unittest.main()
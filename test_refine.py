@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import refine
+
+def word(text, left, conf, line=1, top=100):
+    return {"level": 5, "page_num": 1, "block_num": 1, "par_num": 1, "line_num": line, "word_num": 1,
+            "left": left, "top": top, "width": 20 * len(text), "height": 30, "conf": conf, "text": text}
+
+WORDS = [
+    word("Paid", 420, 96.0), word("to", 520, 95.0), word("RAKESH", 580, 91.0),
+    word("DEBIT", 1500, 93.0), word("₹4O", 1900, 31.0),
+    word("Oct", 60, 42.0, line=2, top=160), word("2S,", 150, 38.0, line=2, top=160),
+    word("2025", 230, 90.0, line=2, top=160),
+]
+
+class TestRefine(unittest.TestCase):
+    def setUp(self):
+        refine.reset_refine_stats()
+
+    def test_weak_spans_merge_neighbours(self):
+        spans = refine.weak_spans(WORDS, threshold=60)
+        self.assertEqual(spans, [[4], [5, 6]])
+
+    def test_no_merge_across_lines(self):
+        words = [word("12", 60, 10.0, line=1), word("34", 100, 10.0, line=2, top=160)]
+        self.assertEqual(refine.weak_spans(words, threshold=60), [[0], [1]])
+
+    def test_span_box_is_padded_and_clipped(self):
+        box = refine.span_box(WORDS, [5, 6], (200, 2400))
+        self.assertEqual(box, (160 - refine.PADDING, 190 + refine.PADDING, 60 - refine.PADDING,
+                               150 + 60 + refine.PADDING))
+        self.assertEqual(refine.span_box([word("x", 0, 1.0, top=0)], [0], (20, 20)), (0, 20, 0, 20))
+
+    def test_words_mapped_back_to_page(self):
+        new = [{"left": 24, "top": 12, "width": 80, "height": 60, "conf": 94.0, "text": "₹40"}]
+        mapped = refine._to_page(new, (94, 136, 1894, 1966), WORDS[4])
+        self.assertEqual(mapped[0]["left"], 1894 + 12)
+        self.assertEqual(mapped[0]["height"], 30)
+        self.assertEqual(mapped[0]["line_num"], 1)
+        self.assertTrue(mapped[0]["refined"])
+
+    def test_area_budget_limits_rereads(self):
+        gray = np.full((300, 2400), 255, dtype=np.uint8)
+        old_share = refine.MAX_AREA_SHARE
+        refine.MAX_AREA_SHARE = 0.0
+        try:
+            words, improved = refine.refine_words(gray, WORDS, threshold=60)
+        finally:
+            refine.MAX_AREA_SHARE = old_share
+        self.assertEqual(improved, 0)
+        self.assertEqual(words, WORDS)
+        stats = refine.get_refine_stats()
+        self.assertEqual(stats["pages"], 1)
+        self.assertEqual(stats["area_share"], 0.0)
+
+    def test_all_spans_share_one_call_per_kind(self):
+        gray = np.full((300, 2400), 255, dtype=np.uint8)
+        words = [word("120", 60, 20.0), word("Paid", 400, 96.0), word("345", 700, 20.0),
+                 word("Oc1", 60, 30.0, line=2, top=160), word("RAKE5H", 700, 30.0, line=2, top=160)]
+        calls = []
+
+        def fake_ocr(canvas, config=""):
+            calls.append(config)
+            # A confident word on the first crop of each canvas
+            return [{"text": "fixed", "conf": 95.0, "left": 70, "top": 70, "width": 40, "height": 40}]
+
+        with mock.patch.object(refine.ocr_engine, "image_to_data", fake_ocr):
+            refined, improved = refine.refine_words(gray, words, threshold=60)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(sum("whitelist" in config for config in calls), 1)
+        self.assertEqual(improved, 2)
+        self.assertEqual(refine.get_refine_stats()["calls"], 2)
+        self.assertEqual([w["text"] for w in refined], ["fixed", "Paid", "345", "fixed", "RAKE5H"])
+
+    def test_numeric_words(self):
+        self.assertTrue(refine.NUMERIC_WORD.match("₹1,250.00"))
+        self.assertTrue(refine.NUMERIC_WORD.match("10:15"))
+        self.assertFalse(refine.NUMERIC_WORD.match("Oct"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+import shlex
+import tempfile
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import statement_profiles
+from statement_router import profile_for_format
+
+class TestStatementProfiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old_dir = statement_profiles.PROFILE_CACHE_DIR
+        statement_profiles.PROFILE_CACHE_DIR = self.tmp.name
+        statement_profiles.get_config.cache_clear()
+
+    def tearDown(self):
+        statement_profiles.PROFILE_CACHE_DIR = self.old_dir
+        statement_profiles.get_config.cache_clear()
+        self.tmp.cleanup()
+
+    def test_generic_matches_custom_config(self):
+        self.assertEqual(statement_profiles.get_config(), "--oem 3 --psm 6")
+
+    def test_profile_writes_word_and_pattern_files(self):
+        args = shlex.split(statement_profiles.get_config("phonepe"))
+        words_path = args[args.index("--user-words") + 1]
+        patterns_path = args[args.index("--user-patterns") + 1]
+
+        with open(words_path, encoding="utf-8") as f:
+            words = f.read().split("\n")
+        self.assertIn("DEBIT", words)
+        self.assertIn("recharged", words)
+        self.assertTrue(all(" " not in w for w in words))
+
+        with open(patterns_path, encoding="utf-8") as f:
+            self.assertIn(r"\d\d:\d\d", f.read())
+
+    def test_whitelist_is_one_argument(self):
+        args = shlex.split(statement_profiles.get_config("paytm"))
+        option = args[args.index("-c") + 1]
+        self.assertEqual(option, "tessedit_char_whitelist=" + statement_profiles.STATEMENT_WHITELIST)
+        self.assertIn("₹", option)
+
+    def test_psm_override_and_cache(self):
+        config = statement_profiles.get_config("paytm", psm=7)
+        self.assertIn("--psm 7", config)
+        self.assertIs(config, statement_profiles.get_config("paytm", psm=7))
+
+    def test_unknown_profile(self):
+        with self.assertRaises(KeyError):
+            statement_profiles.get_config("hdfc")
+
+    def test_profile_for_format(self):
+        self.assertEqual(profile_for_format("MM/DD/YYYY"), "phonepe")
+        self.assertEqual(profile_for_format("DD/MM/YYYY"), "paytm")
+
+if __name__ == '__main__':
+    unittest.main()
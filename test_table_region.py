@@ -0,0 +1,50 @@
+import unittest
+import sys
+import os
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import cv2
+import numpy as np
+
+import table_region
+
+def render_statement_page():
+    page = np.full((1754, 1240), 255, dtype=np.uint8)
+    # Logo and title above the table
+    cv2.rectangle(page, (50, 50), (300, 200), 0, -1)
+    cv2.putText(page, "Transaction Statement", (50, 280), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 0, 3)
+    for i in range(8):
+        y = 400 + i * 140
+        cv2.putText(page, "Oct 23, 2025", (50, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+        cv2.putText(page, "Paid to RAKESH KUMAR", (350, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+        cv2.putText(page, "DEBIT", (850, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+        cv2.putText(page, "Rs 40", (1050, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 2)
+        cv2.putText(page, "Transaction ID T2510", (350, y + 35), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 0, 1)
+    # Footer
+    cv2.putText(page, "This is a system generated statement", (50, 1700), cv2.FONT_HERSHEY_SIMPLEX, 0.7, 0, 1)
+    return page
+
+class TestTableRegion(unittest.TestCase):
+    def test_crops_away_header_and_footer(self):
+        page = render_statement_page()
+        top, bottom, left, right = table_region.find_table_region(page)
+
+        self.assertGreater(top, 280)       # logo and title excluded
+        self.assertLess(top, 400 - 15)     # first row included
+        self.assertGreater(bottom, 400 + 7 * 140 + 35)  # last Transaction ID line included
+        self.assertLess(bottom, 1680)      # footer excluded
+        self.assertLess(left, 50)
+        self.assertGreater(right, 1100)
+
+    def test_page_without_table_is_left_alone(self):
+        page = np.full((600, 400), 255, dtype=np.uint8)
+        cv2.putText(page, "Terms and conditions", (20, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 0, 1)
+
+        cropped, region = table_region.crop_to_table(page)
+        self.assertIsNone(region)
+        self.assertIs(cropped, page)
+
+if __name__ == '__main__':
+    unittest.main()
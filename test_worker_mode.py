@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+import numpy as np
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import bank_statement2_ocr
+import page_buffers
+import page_tiles
+import raster_budget
+
+DPI = 10
+# A4 at 10 DPI: grayscale copy + RGB render
+PAGE_BYTES = raster_budget.estimate_page_bytes(None, DPI, 1) + raster_budget.estimate_page_bytes(None, DPI, 3)
+
+def fake_render(pdf_path, page_no, dpi):
+    if page_no == 3:
+        return None
+    page = np.full((117, 83, 3), 255, dtype=np.uint8)
+    page[20:30, 10:70] = 0
+    return page
+
+class TestWorkerMode(unittest.TestCase):
+    def setUp(self):
+        fd, self.pdf_path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.pdf_path)
+
+    def ocr_pages(self, budget, last_page=6):
+        batches = []
+
+        def fake_workers(buffers, config, layout=False, refine_weak=False):
+            batches.append((len(buffers), budget.in_use))
+            try:
+                return [f"page {buf.shape}" for buf in buffers]
+            finally:
+                for buf in buffers:
+                    buf.release()
+
+        with mock.patch.object(page_buffers, "OCR_WORKERS", 2), \
+                mock.patch.object(raster_budget, "budget", budget), \
+                mock.patch.object(raster_budget, "page_sizes", lambda *args: (last_page, {})), \
+                mock.patch.object(bank_statement2_ocr, "render_page", fake_render), \
+                mock.patch.object(page_buffers, "ocr_buffers_in_workers", fake_workers):
+            records = bank_statement2_ocr.ocr_pdf_pages(self.pdf_path, last_page=last_page, adaptive=False,
+                                                        crop_table=False, triage=False, dpi=DPI)
+        return records, batches
+
+    def test_failed_render_skips_only_that_page(self):
+        records, _ = self.ocr_pages(raster_budget.MemoryBudget())
+        self.assertEqual([r["page"] for r in records], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(records[2]["skipped"], "render failed")
+        self.assertEqual(records[0]["text"], "page (117, 83)")
+
+    def test_pages_are_reserved_one_by_one_and_batched_to_fit(self):
+        budget = raster_budget.MemoryBudget(limit_bytes=int(PAGE_BYTES * 1.5))
+        records, batches = self.ocr_pages(budget)
+        self.assertEqual(len([r for r in records if "text" in r and not r.get("skipped")]), 5)
+        # The whole document never fits, so pages go to the workers in several batches
+        self.assertGreater(len(batches), 1)
+        self.assertTrue(all(in_use <= budget.limit for _, in_use in batches))
+        self.assertEqual(budget.in_use, 0)
+
+    def test_workers_tile_tall_pages_with_the_request_timeout(self):
+        calls = []
+
+        def fake_ocr(tile, config="", timeout=None):
+            calls.append((tile.shape[0], timeout))
+            return "rows\n"
+
+        page = np.full((40000, 200), 255, dtype=np.uint8)
+        with page_buffers.PageBufferPool() as pool, \
+                mock.patch.object(page_tiles.ocr_engine, "image_to_string", fake_ocr):
+            page_buffers._ocr_shared_page(pool.put(page).descriptor(), "", timeout=5.0)
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(all(height <= page_tiles.TESSERACT_MAX_HEIGHT and timeout == 5.0
+                            for height, timeout in calls))
+
+if __name__ == '__main__':
+    unittest.main()
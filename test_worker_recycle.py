@@ -0,0 +1,45 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add script dir to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import worker_recycle
+
+class TestWorkerRecycle(unittest.TestCase):
+    def setUp(self):
+        worker_recycle._recycling = False
+
+    def tearDown(self):
+        worker_recycle._recycling = False
+
+    def test_rss_is_measured(self):
+        rss = worker_recycle.current_rss_mb()
+        if rss is None:
+            self.skipTest("/proc not available")
+        self.assertGreater(rss, 1)
+
+    def test_under_limit(self):
+        self.assertFalse(worker_recycle.check(limit_mb=1024 * 1024))
+        self.assertFalse(worker_recycle.check(limit_mb=0))
+
+    def test_over_limit_outside_gunicorn_only_reports(self):
+        with mock.patch.object(worker_recycle, "current_rss_mb", lambda: 900.0), \
+                mock.patch.dict(os.environ, {"GUNICORN_WORKER": ""}), \
+                mock.patch.object(worker_recycle.os, "kill") as kill:
+            self.assertTrue(worker_recycle.check(limit_mb=800))
+        kill.assert_not_called()
+        self.assertFalse(worker_recycle._recycling)
+
+    def test_over_limit_in_gunicorn_worker_terminates_once(self):
+        with mock.patch.object(worker_recycle, "current_rss_mb", lambda: 900.0), \
+                mock.patch.dict(os.environ, {"GUNICORN_WORKER": "1"}), \
+                mock.patch.object(worker_recycle.os, "kill") as kill:
+            self.assertTrue(worker_recycle.check(limit_mb=800))
+            self.assertTrue(worker_recycle.check(limit_mb=800))
+        kill.assert_called_once_with(os.getpid(), worker_recycle.signal.SIGTERM)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Recycles a gunicorn worker whose memory grew too large.
+
+Page rasters, Tesseract buffers and allocator fragmentation make a long
+running worker's RSS creep up. After each request the worker compares its
+RSS (/proc/self/statm, a few microseconds) with MAX_WORKER_RSS_MB; over the
+limit it sends itself SIGTERM once. Uvicorn then finishes the requests in
+flight and exits, and the gunicorn master starts a fresh worker.
+
+Outside gunicorn (uvicorn, tests) the check only reports.
+"""
+
+import os
+import signal
+
+MAX_WORKER_RSS_MB = int(os.environ.get("MAX_WORKER_RSS_MB", "0"))
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_recycling = False
+
+
+def current_rss_mb():
+    """
+    Resident set size of this process in MB, None where /proc is missing.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def check(limit_mb=None):
+    """
+    Returns True when this worker is over the limit (and asks gunicorn to
+    replace it when running under gunicorn).
+    """
+    global _recycling
+    limit_mb = MAX_WORKER_RSS_MB if limit_mb is None else limit_mb
+    if not limit_mb or _recycling:
+        return _recycling
+    rss = current_rss_mb()
+    if rss is None or rss <= limit_mb:
+        return False
+
+    print(f"⚠️ Worker {os.getpid()} RSS {rss:.0f} MB over {limit_mb} MB")
+    if os.environ.get("GUNICORN_WORKER") == "1":
+        _recycling = True
+        print(f"DEBUG: Recycling worker {os.getpid()} after the requests in flight")
+        os.kill(os.getpid(), signal.SIGTERM)
+    return True
+
+
+def stats():
+    return {
+        "pid": os.getpid(),
+        "rss_mb": round(current_rss_mb() or 0, 1),
+        "max_rss_mb": MAX_WORKER_RSS_MB or None,
+        "recycling": _recycling,
+    }